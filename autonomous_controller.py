@@ -3,53 +3,120 @@
 # Exposes REST API to trigger predefined behaviors like dumping, cleaning, diagnostics
 
 from flask import Flask, request, jsonify
-import threading
 import dumping_sequence
+import http_client
+import pondbot_motor_control as motor
+import waypoint_nav
+from task_engine import EventLog, TaskEngine
 #import cleaning_cycle   # To be created
 #import diagnostic_mode   # To be created
 
 app = Flask(__name__)
 PORT = 8010
+GPS_URL = "http://localhost:8006/location"
+COVERAGE_URL = "http://localhost:8006/coverage"
+
+# Sweep the pond along the coverage plan; gps_host marks visited cells from the track, so a
+# cancelled or preempted sweep resumes with only the runs still unvisited
+def run_coverage(cancel=None):
+    try:
+        plan = http_client.get(COVERAGE_URL, "status").json()
+    except Exception as e:
+        raise RuntimeError(f"Coverage plan unavailable: {e}")
+    if "waypoints" not in plan:
+        raise RuntimeError(plan.get("error", "Coverage plan unavailable"))
+    events.append(f"Coverage: {len(plan['waypoints'])} waypoints left", task="coverage",
+                  progress=plan["progress"])
+    if not waypoint_nav.navigator().follow([tuple(p) for p in plan["waypoints"]], cancel=cancel):
+        if cancel is not None:
+            cancel.checkpoint()
+        raise RuntimeError("Coverage leg not reached")
 
 # Task registry (can be extended)
 TASKS = {
     "dump": dumping_sequence.run_sequence,
+    "home": waypoint_nav.return_home,
+    "coverage": run_coverage,
     #"clean": cleaning_cycle.run_sequence,
     #"diagnose": diagnostic_mode.run_sequence,
 }
 
-status = {
-    "running": False,
-    "last_task": None,
-    "log": []
+# Higher runs first and preempts a lower-priority task that is already running
+PRIORITIES = {
+    "coverage": 5,
+    "dump": 10,
+    "home": 20,
 }
+STATUS_LOG_LINES = 20  # recent event messages included in /status
 
-# Run task in background
-def launch_task(name):
-    def run():
-        status["running"] = True
-        status["last_task"] = name
-        status["log"].append(f"Started: {name}")
-        try:
-            TASKS[name]()
-            status["log"].append(f"Completed: {name}")
-        except Exception as e:
-            status["log"].append(f"Error in {name}: {str(e)}")
-        status["running"] = False
-    threading.Thread(target=run, daemon=True).start()
+events = EventLog()
+engine = TaskEngine(TASKS, PRIORITIES, on_stop=motor.emergency_stop, log=events)
 
+# Queue a task; optional JSON body {"priority": n} overrides its default priority
 @app.route("/run/<task>", methods=["POST"])
 def run_task(task):
     if task not in TASKS:
         return jsonify({"error": "Invalid task"}), 400
-    if status["running"]:
-        return jsonify({"error": "Task already running"}), 409
-    launch_task(task)
-    return jsonify({"message": f"Task {task} launched"})
+    priority = (request.get_json(silent=True) or {}).get("priority")
+    if priority is not None and (not isinstance(priority, int) or isinstance(priority, bool)):
+        return jsonify({"error": "Invalid priority: must be an integer"}), 400
+    job = engine.submit(task, priority)
+    return jsonify({"message": f"Task {task} queued", "job": job.id, "priority": job.priority})
+
+# Cancel the running task, or a queued/running job given as {"job": id}
+@app.route("/cancel", methods=["POST"])
+def cancel_task():
+    job = engine.cancel((request.get_json(silent=True) or {}).get("job"))
+    if job is None:
+        return jsonify({"error": "No such task running or queued"}), 404
+    return jsonify({"message": f"Task {job.name} cancelled", "job": job.id})
+
+@app.route("/emergency_stop", methods=["POST"])
+def emergency_stop():
+    engine.emergency_stop()
+    return jsonify({"message": "Emergency stop: tasks cancelled, motors stopped"})
+
+@app.route("/tasks")
+def get_tasks():
+    return jsonify(engine.snapshot())
+
+# Event log entries newer than ?since=<id> (all retained entries without it)
+@app.route("/events")
+def get_events():
+    since = request.args.get("since", default=0, type=int)
+    return jsonify({"events": events.since(since), "last": events.last_id()})
+
+# Store a navigation point ("home" or "dump") from the JSON body, or the current GPS fix
+@app.route("/points/<name>", methods=["POST"])
+def set_point(name):
+    if name not in ("home", "dump"):
+        return jsonify({"error": "Invalid point"}), 400
+    body = request.get_json(silent=True) or {}
+    if "lat" not in body or "lon" not in body:
+        try:
+            body = http_client.get(GPS_URL, "status").json()
+        except Exception as e:
+            return jsonify({"error": f"GPS unavailable: {e}"}), 503
+        if not body.get("fix"):
+            return jsonify({"error": "No GPS fix"}), 503
+    waypoint_nav.save_point(name, body["lat"], body["lon"])
+    return jsonify({"message": f"{name} set", "lat": body["lat"], "lon": body["lon"]})
+
+@app.route("/points")
+def get_points():
+    return jsonify(waypoint_nav.load_points())
 
 @app.route("/status")
 def get_status():
-    return jsonify(status)
+    tasks = engine.snapshot()
+    running = tasks["running"]
+    last = running or (tasks["history"][-1] if tasks["history"] else None)
+    return jsonify({
+        "running": running is not None,
+        "last_task": last["task"] if last else None,
+        "queued": len(tasks["queue"]),
+        "log": [e["message"] for e in events.since(0)[-STATUS_LOG_LINES:]],
+    })
 
 if __name__ == "__main__":
     print(f"🧠 Autonomous controller running at http://0.0.0.0:{PORT}")
@@ -0,0 +1,163 @@
+# autopilot.py
+# Closed-loop autopilot: consumes navigation decisions at a fixed control rate and drives the
+# propellers through pondbot_motor_control. Motor commands are only sent when the desired motion
+# changes, and a watchdog calls emergency_stop if decisions go stale.
+
+import threading
+import time
+from collections import deque
+from flask import Flask, jsonify
+import requests
+import http_client
+import pondbot_motor_control as motor
+
+app = Flask(__name__)
+AUTOPILOT_PORT = 8011
+NAVIGATE_URL = "http://localhost:8008/navigate"
+
+CONTROL_RATE_HZ = 10
+DECISION_MAX_AGE = 0.6   # seconds; older decisions trip the watchdog
+LONG_POLL_TIMEOUT = 2.0  # seconds /navigate?after= may wait for the next decision
+STATS_WINDOW = 600       # control ticks / commands kept for jitter and latency stats
+
+COMMANDS = {
+    "FORWARD": motor.boat_forward,
+    "LEFT": motor.boat_left,
+    "RIGHT": motor.boat_right,
+    "BACK": motor.boat_backward,
+    "STOP": motor.boat_stop,
+}
+
+lock = threading.Lock()
+status = {
+    "engaged": False,
+    "watchdog_tripped": False,
+    "command": None,          # last direction sent to the motors
+    "decision_seq": None,     # seq of the decision that produced it
+    "commands_sent": 0,
+    "ticks": 0,
+}
+latest_decision = {"decision": None, "received": None}
+tick_jitter_ms = deque(maxlen=STATS_WINDOW)
+command_latency_ms = deque(maxlen=STATS_WINDOW)
+
+# ---------------------------- Decision Feed ----------------------------
+def decision_feed():
+    """Long-poll /navigate?after=<seq> so each new decision arrives as soon as it is published."""
+    seq = 0
+    while True:
+        try:
+            r = http_client.get(NAVIGATE_URL, "stream",
+                                params={"after": seq, "timeout": LONG_POLL_TIMEOUT},
+                                timeout=(1.0, LONG_POLL_TIMEOUT + 1.0))
+            decision = r.json()
+            if decision.get("seq") is not None:
+                seq = decision["seq"]
+                with lock:
+                    latest_decision.update(decision=decision, received=time.time())
+        except (requests.RequestException, ValueError) as e:
+            print(f"[Autopilot] Navigation feed error: {e}")
+            time.sleep(0.2)
+
+def decision_age(decision, received):
+    if decision is None:
+        return None
+    return time.time() - decision.get("timestamp", received)
+
+# ---------------------------- Control Loop ----------------------------
+def send_command(direction, seq):
+    started = time.perf_counter()
+    COMMANDS[direction]()
+    command_latency_ms.append((time.perf_counter() - started) * 1000)
+    with lock:
+        status.update(command=direction, decision_seq=seq)
+        status["commands_sent"] += 1
+
+def trip_watchdog(reason):
+    print(f"[Autopilot] Watchdog: {reason} → emergency stop")
+    motor.emergency_stop()
+    with lock:
+        status.update(engaged=False, watchdog_tripped=True, command="STOP", watchdog_reason=reason)
+
+def control_tick():
+    with lock:
+        engaged, current = status["engaged"], status["command"]
+        decision, received = latest_decision["decision"], latest_decision["received"]
+    if not engaged:
+        return
+    age = decision_age(decision, received)
+    if age is None or age > DECISION_MAX_AGE:
+        trip_watchdog("no decision" if age is None else f"decision {age:.2f}s old")
+        return
+    direction = decision.get("direction")
+    if direction not in COMMANDS:
+        direction = "STOP"
+    if direction != current:
+        send_command(direction, decision.get("seq"))
+    else:
+        COMMANDS[direction]()  # unchanged: the motor state cache drops it except for keep-alives
+
+def control_loop():
+    period = 1.0 / CONTROL_RATE_HZ
+    next_tick = time.monotonic()
+    while True:
+        tick_jitter_ms.append((time.monotonic() - next_tick) * 1000)
+        try:
+            control_tick()
+        except Exception as e:
+            trip_watchdog(f"control error: {e}")
+        with lock:
+            status["ticks"] += 1
+        next_tick += period
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.monotonic()
+
+def summarize(samples):
+    values = sorted(samples)
+    if not values:
+        return None
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 2)
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(values[-1], 2), "n": len(values)}
+
+# ---------------------------- API ----------------------------
+@app.route("/engage", methods=["POST"])
+def engage():
+    with lock:
+        status.update(engaged=True, watchdog_tripped=False, command=None)
+        status.pop("watchdog_reason", None)
+    return jsonify({"message": "Autopilot engaged"})
+
+@app.route("/disengage", methods=["POST"])
+def disengage():
+    with lock:
+        status["engaged"] = False
+    motor.boat_stop()
+    with lock:
+        status["command"] = "STOP"
+    return jsonify({"message": "Autopilot disengaged, boat stopped"})
+
+@app.route("/status")
+def get_status():
+    with lock:
+        out = dict(status)
+        decision, received = latest_decision["decision"], latest_decision["received"]
+    age = decision_age(decision, received)
+    out["decision_age"] = None if age is None else round(age, 3)
+    out["tick_jitter_ms"] = summarize(tick_jitter_ms)
+    out["command_latency_ms"] = summarize(command_latency_ms)
+    out["link"] = motor.link_status()
+    out["motor_commands"] = motor.command_stats()
+    return jsonify(out)
+
+@app.route("/ping")
+def ping():
+    return "Autopilot online"
+
+if __name__ == "__main__":
+    print(f"🛶 Autopilot running at http://0.0.0.0:{AUTOPILOT_PORT} (POST /engage to start)")
+    threading.Thread(target=decision_feed, daemon=True).start()
+    threading.Thread(target=control_loop, daemon=True).start()
+    app.run(host="0.0.0.0", port=AUTOPILOT_PORT, threaded=True)
@@ -0,0 +1,55 @@
+# bench_coverage_planner.py
+# Times loading a pond boundary and planning its coverage sweep from scratch (no cache).
+# The synthetic pond is a 200 m x 100 m wavy ellipse with two islands.
+# Usage: python benchmarks/bench_coverage_planner.py [repeats]
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geofence import Geofence
+from coverage_planner import plan_coverage
+
+LAT0, LON0 = 12.9715987, 77.5945627
+M_PER_DEG = 111320.0
+
+def to_latlon(x, y):
+    return LAT0 + y / M_PER_DEG, LON0 + x / (M_PER_DEG * math.cos(math.radians(LAT0)))
+
+def ring(fn, n):
+    return [to_latlon(*fn(2 * math.pi * i / n)) for i in range(n)]
+
+def synthetic_pond():
+    def shore(t):
+        r = 1 + 0.08 * math.sin(7 * t)
+        x, y = 100 * r * math.cos(t), 50 * r * math.sin(t)
+        a = math.radians(30)
+        return x * math.cos(a) - y * math.sin(a), x * math.sin(a) + y * math.cos(a)
+    island = lambda cx, cy, r: (lambda t: (cx + r * math.cos(t), cy + r * math.sin(t)))
+    return ring(shore, 300), [ring(island(20, 10, 8), 40), ring(island(-40, -20, 12), 40)]
+
+def main(repeats=5):
+    shore, islands = synthetic_pond()
+    timings = {"load geofence": [], "plan": [], "waypoints": []}
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            t0 = time.perf_counter()
+            fence = Geofence(shore, islands)
+            t1 = time.perf_counter()
+            plan = plan_coverage(fence, cache_dir=cache_dir)
+            t2 = time.perf_counter()
+            route = plan.waypoints()
+            t3 = time.perf_counter()
+        timings["load geofence"].append(t1 - t0)
+        timings["plan"].append(t2 - t1)
+        timings["waypoints"].append(t3 - t2)
+    print(f"{len(plan.runs)} runs, {len(route)} waypoints, {plan.progress()['cells']} cells")
+    for name, values in timings.items():
+        print(f"{name:<14} {min(values) * 1000:8.1f} ms")
+    print(f"{'total':<14} {sum(min(v) for v in timings.values()) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,116 @@
+# bench_motor_scheduler.py
+# Stress test for timed motor commands: a burst of run_device(..., blocking=False) style commands
+# (start now, stop after a random duration) over the six relays, driven two ways:
+#   threads    the old approach, one sleeping daemon thread per command
+#   scheduler  motor_scheduler.MotorScheduler, one thread and a heap, newer commands supersede
+# Reports submit cost, peak thread count, stop-deadline lateness and "stale stops" (a stop that
+# lands after a newer command for the same device and so overrides it).
+# Usage: python benchmarks/bench_motor_scheduler.py [burst_commands] [burst_rate_hz]
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from motor_scheduler import MotorScheduler
+
+DEVICES = ["p_right", "p_left", "bin_hoist", "conv_move", "conv_hoist", "magnet_hoist"]
+DURATION_RANGE = (0.05, 0.5)
+
+class Recorder:
+    """Stands in for the relay link: tracks the latest command per device and stop timing."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = {}
+        self.lateness = []
+        self.stale = 0
+        self.stops = 0
+
+    def start(self, device, seq):
+        with self.lock:
+            self.latest[device] = seq
+
+    def stop(self, device, seq, deadline):
+        late = time.perf_counter() - deadline
+        with self.lock:
+            self.stops += 1
+            self.lateness.append(late)
+            if self.latest.get(device) != seq:
+                self.stale += 1
+
+def workload(n, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice(DEVICES), rng.uniform(*DURATION_RANGE)) for _ in range(n)]
+
+def drive(submit, commands, rate):
+    """Submit commands at `rate` Hz; returns (mean submit µs, peak thread count)."""
+    period = 1.0 / rate
+    submit_time, peak = 0.0, threading.active_count()
+    next_at = time.perf_counter()
+    for seq, (device, duration) in enumerate(commands):
+        t0 = time.perf_counter()
+        submit(seq, device, duration)
+        submit_time += time.perf_counter() - t0
+        peak = max(peak, threading.active_count())
+        next_at += period
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return submit_time / len(commands) * 1e6, peak
+
+def run_threads(commands, rate):
+    rec = Recorder()
+
+    def submit(seq, device, duration):
+        rec.start(device, seq)
+        deadline = time.perf_counter() + duration
+
+        def task():
+            time.sleep(duration)
+            rec.stop(device, seq, deadline)
+        threading.Thread(target=task, daemon=True).start()
+
+    submit_us, peak = drive(submit, commands, rate)
+    time.sleep(DURATION_RANGE[1] + 0.2)
+    return rec, submit_us, peak
+
+def run_scheduler(commands, rate):
+    rec = Recorder()
+    sched = MotorScheduler().start()
+
+    def submit(seq, device, duration):
+        rec.start(device, seq)
+        deadline = time.perf_counter() + duration
+        sched.schedule(device, duration, rec.stop, device, seq, deadline)
+
+    submit_us, peak = drive(submit, commands, rate)
+    time.sleep(DURATION_RANGE[1] + 0.2)
+    return rec, submit_us, peak, sched.stats()
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else float("nan")
+
+def report(name, rec, submit_us, peak, n):
+    print(f"{name:<10} submit {submit_us:7.1f} µs  peak threads {peak:5d}  stops fired {rec.stops:5d}/{n}  "
+          f"stale {rec.stale:5d}  lateness p50 {pct(rec.lateness, 0.5):6.2f} ms  "
+          f"p99 {pct(rec.lateness, 0.99):6.2f} ms")
+
+def scenario(title, n, rate):
+    commands = workload(n)
+    print(f"{title}: {n} timed commands at {rate:.0f} Hz over {len(DEVICES)} devices, "
+          f"durations {DURATION_RANGE[0]}-{DURATION_RANGE[1]} s")
+    rec, submit_us, peak = run_threads(commands, rate)
+    report("threads", rec, submit_us, peak, n)
+    rec, submit_us, peak, stats = run_scheduler(commands, rate)
+    report("scheduler", rec, submit_us, peak, n)
+    print(f"{'':<10} {stats['superseded']} superseded")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 500.0
+    scenario("burst", n, rate)        # mostly superseded: thread count and stale stops
+    scenario("paced", 120, 12.0)      # most stops fire: deadline lateness
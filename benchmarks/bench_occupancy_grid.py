@@ -0,0 +1,43 @@
+# bench_occupancy_grid.py
+# Times occupancy_grid updates against the navigation control tick (1 / DECISION_RATE_HZ).
+# Each step is one pose update (GPS + heading), one ultrasonic sweep ray-cast and one sector query.
+# Usage: python benchmarks/bench_occupancy_grid.py [iterations]
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from occupancy_grid import OccupancyGrid, GRID_CELLS, CELL_SIZE_M
+
+CONTROL_TICK_MS = 100.0  # navigation_core decision loop at 10 Hz
+SWEEP = {"front": 132.4, "left": 88.2, "right": None, "back": 240.0, "dustbin": 12.5}
+
+def bench(fn, n):
+    return min(timeit.repeat(fn, number=n, repeat=3)) / n * 1e6  # µs per call
+
+def main(n=2000):
+    grid = OccupancyGrid()
+    state = {"i": 0}
+
+    def pose():
+        # ~0.5 m/s heading north-east while slowly turning, at the 10 Hz tick
+        i = state["i"] = state["i"] + 1
+        grid.update_pose(12.9715987 + i * 0.035e-5, 77.5945627 + i * 0.035e-5, (i * 3) % 360)
+
+    pose()
+    timings = {
+        "update_pose": bench(pose, n),
+        "integrate": bench(lambda: grid.integrate(SWEEP), n),
+        "sector_clearance": bench(grid.sector_clearance, n),
+    }
+    total = sum(timings.values())
+    print(f"grid {GRID_CELLS}x{GRID_CELLS} @ {CELL_SIZE_M} m, {n} iterations")
+    for name, us in timings.items():
+        print(f"{name:<18} {us:9.1f} µs")
+    print(f"{'per tick':<18} {total:9.1f} µs  ({total / (CONTROL_TICK_MS * 1000) * 100:.2f}% of a "
+          f"{CONTROL_TICK_MS:.0f} ms control tick)")
+    print(f"clearance now: {grid.sector_clearance()}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
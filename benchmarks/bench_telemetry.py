@@ -0,0 +1,45 @@
+# bench_telemetry.py
+# Compares JSON vs binary telemetry (telemetry_codec) serialization and parse cost per record.
+# Usage: python benchmarks/bench_telemetry.py [iterations]
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import telemetry_codec as codec
+
+SAMPLES = {
+    "distance": {"front": 132.41, "left": 88.2, "right": None, "back": 240.0, "dustbin": 12.5},
+    "heading": {"heading": 271.35, "rate_of_turn": -4.2},
+    "location": {"lat": 12.9715987, "lon": 77.5945627, "fix": True},
+    "analyze": {"direction": "LEFT"},
+    "navigate": {
+        "direction": "FORWARD", "mode": "normal", "confidence": 0.95,
+        "reason": "Sensor data valid, waste direction used",
+        "sensor_status": {"ultrasonic": True, "compass": True, "gps": True, "timed_out": [],
+                          "geofence": {"inside": True, "distance_m": 12.4, "bearing": 87.5, "edge": "shore"}},
+        "stale_sources": [], "seq": 1042, "timestamp": 1718000000.123, "compute_ms": 1.84,
+        "inputs": {"direction": 1717999999.98, "ultrasonic": 1718000000.05,
+                   "compass": 1718000000.1, "gps": 1717999999.9},
+    },
+}
+
+def bench(fn, n):
+    return min(timeit.repeat(fn, number=n, repeat=3)) / n * 1e6  # µs per call
+
+def main(n=20000):
+    print(f"{'record':<10} {'json B':>7} {'bin B':>6} {'json enc':>9} {'bin enc':>8} "
+          f"{'json dec':>9} {'bin dec':>8}   (µs/op)")
+    for kind, data in SAMPLES.items():
+        as_json = json.dumps(data).encode()
+        as_bin = codec.encode(kind, data)
+        print(f"{kind:<10} {len(as_json):>7} {len(as_bin):>6} "
+              f"{bench(lambda: json.dumps(data).encode(), n):>9.2f} "
+              f"{bench(lambda: codec.encode(kind, data), n):>8.2f} "
+              f"{bench(lambda: json.loads(as_json), n):>9.2f} "
+              f"{bench(lambda: codec.decode(as_bin), n):>8.2f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -4,14 +4,14 @@
 
 import cv2
 import numpy as np
-import requests
+import http_client
 
 VIDEO_FEED_URL = "http://localhost:8001/video_feed"
 
 # Fetch frame from video host
 def fetch_frame():
     try:
-        stream = requests.get(VIDEO_FEED_URL, stream=True, timeout=3)
+        stream = http_client.get(VIDEO_FEED_URL, "stream", stream=True, timeout=3)
         byte_data = b''
         for chunk in stream.iter_content(chunk_size=1024):
             byte_data += chunk
@@ -21,6 +21,7 @@ def fetch_frame():
                 jpg = byte_data[a:b+2]
                 byte_data = byte_data[b+2:]
                 frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                stream.close()
                 return frame
     except:
         return None
@@ -0,0 +1,80 @@
+# compass_calibration.py
+# Hard/soft-iron calibration and vectorized heading correction for the magnetometer.
+# compass_host records a rotation sweep, fits it here and stores the result in CALIBRATION_FILE.
+
+import json
+import os
+import numpy as np
+
+CALIBRATION_FILE = "compass_calibration.json"
+MIN_CALIBRATION_SAMPLES = 200
+
+def identity_calibration():
+    return {"offset": np.zeros(2), "matrix": np.eye(2)}
+
+def load_calibration(path=CALIBRATION_FILE):
+    if not os.path.exists(path):
+        return identity_calibration()
+    with open(path) as f:
+        data = json.load(f)
+    return {"offset": np.array(data["offset"], dtype=np.float64),
+            "matrix": np.array(data["matrix"], dtype=np.float64)}
+
+def save_calibration(cal, path=CALIBRATION_FILE):
+    data = {"offset": cal["offset"].tolist(), "matrix": cal["matrix"].tolist()}
+    for key in ("residual", "samples"):
+        if key in cal:
+            data[key] = cal[key]
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+def fit_calibration(samples):
+    """Fit hard-iron offset and soft-iron matrix from a full-turn sweep of raw (x, y[, z]) readings.
+
+    The horizontal readings of a level sweep lie on an ellipse A·x² + B·xy + C·y² + D·x + E·y = 1,
+    solved by least squares. The offset is the ellipse centre; the matrix is the symmetric square
+    root of the normalised quadratic form, rescaled to unit determinant so it maps the ellipse
+    onto a circle without changing the average field strength.
+    """
+    xy = np.asarray(samples, dtype=np.float64)[:, :2]
+    if len(xy) < MIN_CALIBRATION_SAMPLES:
+        raise ValueError(f"Need at least {MIN_CALIBRATION_SAMPLES} samples, got {len(xy)}")
+    x, y = xy[:, 0], xy[:, 1]
+    design = np.column_stack((x * x, x * y, y * y, x, y))
+    (a, b, c, d, e), *_ = np.linalg.lstsq(design, np.ones(len(xy)), rcond=None)
+
+    quad = np.array([[a, b / 2], [b / 2, c]])
+    if np.any(np.linalg.eigvalsh(quad) <= 0):
+        raise ValueError("Sweep does not describe an ellipse; rotate the boat through a full turn")
+    offset = np.linalg.solve(2 * quad, -np.array([d, e]))
+    quad /= 1 + offset @ quad @ offset
+
+    vals, vecs = np.linalg.eigh(quad)
+    matrix = vecs @ np.diag(np.sqrt(vals)) @ vecs.T
+    matrix /= np.sqrt(np.linalg.det(matrix))
+
+    radius = np.linalg.norm((xy - offset) @ matrix.T, axis=1)
+    return {"offset": offset, "matrix": matrix,
+            "residual": float(radius.std() / radius.mean()), "samples": int(len(xy))}
+
+def corrected_headings(batch, cal):
+    """Headings in degrees [0, 360) for an (N, 2+) array of raw readings."""
+    xy = (np.asarray(batch, dtype=np.float64)[:, :2] - cal["offset"]) @ cal["matrix"].T
+    return np.degrees(np.arctan2(xy[:, 1], xy[:, 0])) % 360
+
+def circular_low_pass(state, headings_deg, alpha):
+    """Exponential low-pass of a batch of headings on the unit circle.
+
+    `state` is the previous filtered unit vector (or None); each sample gets weight `alpha`.
+    Returns the new (unnormalised) state vector and its heading in degrees.
+    """
+    h = np.radians(headings_deg)
+    vecs = np.column_stack((np.cos(h), np.sin(h)))
+    n = len(vecs)
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1)
+    out = weights @ vecs
+    if state is None:
+        out /= weights.sum()
+    else:
+        out += (1 - alpha) ** n * state
+    return out, float(np.degrees(np.arctan2(out[1], out[0])) % 360)
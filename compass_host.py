@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 import time
 import threading
-from flask import Flask, jsonify
+import numpy as np
+from flask import Flask, jsonify, request
+from sensor_history import SampleHistory
+from sensor_stream import SampleBroadcaster, sse_response
+from telemetry_codec import respond
+import compass_calibration as calib
 
 # Use Adafruit HMC5883L or QMC5883L compatible library
 import board
@@ -12,31 +17,126 @@ app = Flask(__name__)
 heading_data = {"heading": None}
 lock = threading.Lock()
 
+# Sampling: the HMC5883L's fastest continuous rate, read in batches that are corrected together
+SAMPLE_RATE_HZ = 75
+BATCH_SIZE = 5          # one published heading per batch (~15 Hz)
+LPF_ALPHA = 0.3         # per-sample weight of the circular low-pass filter
+ROT_SMOOTHING = 0.5     # weight of the newest rate-of-turn estimate
+MAX_CALIBRATION_SAMPLES = 20000
+
+# Filtered headings and rate of turn, one row per batch
+HISTORY_SIZE = 256
+history = SampleHistory(["heading", "rate_of_turn"], capacity=HISTORY_SIZE)
+broadcaster = SampleBroadcaster()
+
+filter_state = {"vector": None, "heading": None, "rate_of_turn": 0.0, "t": None}
+calibration = calib.load_calibration()
+calibration_samples = None  # list of raw batches while a calibration sweep is being recorded
+
 # Setup I2C compass
 i2c = busio.I2C(board.SCL, board.SDA)
 sensor = adafruit_hmc5883l.HMC5883L(i2c)
+if hasattr(adafruit_hmc5883l, "DATARATE_75_HZ"):
+    sensor.data_rate = adafruit_hmc5883l.DATARATE_75_HZ
+
+def process_batch(batch, t):
+    headings = calib.corrected_headings(batch, calibration)
+    with lock:
+        if calibration_samples is not None and len(calibration_samples) * BATCH_SIZE < MAX_CALIBRATION_SAMPLES:
+            calibration_samples.append(batch.copy())
+        vector, heading = calib.circular_low_pass(filter_state["vector"], headings, LPF_ALPHA)
+        prev_heading, prev_t = filter_state["heading"], filter_state["t"]
+        if prev_heading is not None and t > prev_t:
+            delta = (heading - prev_heading + 180) % 360 - 180
+            filter_state["rate_of_turn"] += ROT_SMOOTHING * (delta / (t - prev_t) - filter_state["rate_of_turn"])
+        filter_state.update(vector=vector, heading=heading, t=t)
+        heading_data["heading"] = round(float(headings[-1]), 2)
+    history.append({"heading": heading, "rate_of_turn": filter_state["rate_of_turn"]})
+    broadcaster.publish(filtered_heading())
 
 def read_heading_loop():
+    period = 1.0 / SAMPLE_RATE_HZ
+    batch = np.empty((BATCH_SIZE, 3))
+    next_read = time.monotonic()
     while True:
         try:
-            mag_x, mag_y, _ = sensor.magnetic
-            heading_rad = math.atan2(mag_y, mag_x)
-            heading_deg = (heading_rad * 180 / math.pi) % 360
-            with lock:
-                heading_data["heading"] = round(heading_deg, 2)
+            for i in range(BATCH_SIZE):
+                batch[i] = sensor.magnetic
+                next_read += period
+                delay = next_read - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_read = time.monotonic()  # fell behind; don't try to catch up
+            process_batch(batch, time.time())
         except Exception as e:
             print("Compass read error:", e)
-        time.sleep(0.5)
+            time.sleep(0.5)
+            next_read = time.monotonic()
 
-@app.route("/")
-def heading_data():
+def filtered_heading():
     with lock:
-        return jsonify(heading_data)
+        heading = filter_state["heading"]
+        return {"heading": None if heading is None else round(heading, 2),
+                "rate_of_turn": round(filter_state["rate_of_turn"], 2)}
+
+@app.route("/")
+def heading_home():
+    return jsonify(filtered_heading())
 
+# GET /heading → calibrated, low-pass filtered heading and rate of turn in °/s
+# (?raw=1 for the latest calibrated but unfiltered reading)
+# Accept: application/x-boat-telemetry → binary record instead of JSON
 @app.route("/heading")
 def heading():
+    if request.args.get("raw"):
+        with lock:
+            return respond("heading", heading_data)
+    return respond("heading", filtered_heading())
+
+# GET /heading/stream → SSE stream pushing each new filtered heading
+@app.route("/heading/stream")
+def heading_stream():
+    return sse_response(broadcaster)
+
+# GET /history?since=<unix time> → all buffered headings newer than `since`
+@app.route("/history")
+def get_history():
+    since = request.args.get("since", default=0.0, type=float)
+    return jsonify(history.history_payload(since))
+
+# ---- Calibration: start, turn the boat through at least one full circle, then stop ----
+@app.route("/calibrate/start", methods=["POST"])
+def calibrate_start():
+    global calibration_samples
+    with lock:
+        calibration_samples = []
+    return jsonify({"message": "Calibration recording started; rotate the boat through a full turn"})
+
+@app.route("/calibrate/stop", methods=["POST"])
+def calibrate_stop():
+    global calibration_samples, calibration
+    with lock:
+        batches, calibration_samples = calibration_samples, None
+    if batches is None:
+        return jsonify({"error": "Calibration not started"}), 409
+    try:
+        cal = calib.fit_calibration(np.concatenate(batches) if batches else np.empty((0, 3)))
+    except (ValueError, np.linalg.LinAlgError) as e:
+        return jsonify({"error": str(e)}), 400
+    calib.save_calibration(cal)
+    with lock:
+        calibration = cal
+        filter_state.update(vector=None, heading=None, rate_of_turn=0.0, t=None)
+    return jsonify({"offset": cal["offset"].tolist(), "matrix": cal["matrix"].tolist(),
+                    "residual": cal["residual"], "samples": cal["samples"]})
+
+@app.route("/calibration")
+def get_calibration():
     with lock:
-        return jsonify(heading_data)
+        return jsonify({"offset": calibration["offset"].tolist(),
+                        "matrix": calibration["matrix"].tolist(),
+                        "recording": calibration_samples is not None})
 
 @app.route("/ping")
 def ping():
@@ -0,0 +1,199 @@
+# coverage_planner.py
+# Boustrophedon (lawnmower) coverage path over the pond polygon from geofence.py.
+# Lanes one boat-width apart run along the pond's long axis; cells inside islands or closer than
+# SHORE_MARGIN_M to any edge are carved out, splitting lanes into runs that are joined in sweep order.
+# Plans are cached on disk keyed by a hash of the polygon, and cells visited according to the GPS
+# track are kept next to the plan so an interrupted mission resumes with only the unswept runs.
+
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+from geofence import load_geofence, GEOFENCE_PATH
+
+BOAT_WIDTH_M = 1.5       # per navigation_server (1.5 m x 2.5 m boat)
+SHORE_MARGIN_M = 1.5     # keep lane centres this far from the shore and islands
+CACHE_DIR = "coverage_cache"
+PLANNER_VERSION = 1      # bump when planning changes so stale cached plans are ignored
+
+class CoveragePlan:
+    """Lane grid (lanes × cells along the lane) in a frame rotated by `theta` to the pond's long axis."""
+
+    def __init__(self, fence, key, theta, origin, lane_width, runs, shape, cache_dir=CACHE_DIR):
+        self.fence = fence
+        self.key = key
+        self.theta = theta
+        self.origin = origin            # (u0, v0): corner of cell (0, 0) in the rotated frame
+        self.lane_width = lane_width
+        self.runs = runs                # [(lane, first cell, last cell)] of contiguous free cells
+        self.shape = shape
+        self.cache_dir = cache_dir
+        self.free = np.zeros(shape, dtype=bool)
+        for lane, i0, i1 in runs:
+            self.free[lane, i0:i1 + 1] = True
+        self.visited = np.zeros(shape, dtype=bool)
+        self.load_progress()
+
+    # ---------------- Frames ----------------
+    def _to_cell(self, x, y):
+        """Local metres → (lane, cell) index arrays in the rotated lane frame."""
+        c, s = math.cos(self.theta), math.sin(self.theta)
+        u, v = x * c + y * s, -x * s + y * c
+        lane = np.floor((v - self.origin[1]) / self.lane_width).astype(int)
+        cell = np.floor((u - self.origin[0]) / self.lane_width).astype(int)
+        return lane, cell
+
+    def _cell_latlon(self, lane, cell):
+        u = self.origin[0] + (cell + 0.5) * self.lane_width
+        v = self.origin[1] + (lane + 0.5) * self.lane_width
+        c, s = math.cos(self.theta), math.sin(self.theta)
+        lat, lon = self.fence.unproject(u * c - v * s, u * s + v * c)
+        return round(float(lat), 7), round(float(lon), 7)
+
+    # ---------------- Progress ----------------
+    def mark_visited(self, lat, lon):
+        """Mark the cells under one or many fixes (scalars or arrays) as swept."""
+        x, y = self.fence.project(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+        lane, cell = self._to_cell(np.atleast_1d(x), np.atleast_1d(y))
+        ok = (lane >= 0) & (lane < self.shape[0]) & (cell >= 0) & (cell < self.shape[1])
+        self.visited[lane[ok], cell[ok]] = True
+
+    def mark_track(self, records):
+        """Mark every fix in a gps_track record array (TrackStore.range / latest)."""
+        records = records[records["fix"] > 0] if len(records) else records
+        if len(records):
+            self.mark_visited(records["lat"], records["lon"])
+
+    def progress(self):
+        total = int(self.free.sum())
+        swept = int((self.visited & self.free).sum())
+        return {"cells": total, "visited": swept, "fraction": round(swept / total, 3) if total else 1.0}
+
+    def _progress_path(self):
+        return os.path.join(self.cache_dir, f"{self.key}.visited.npy")
+
+    def save_progress(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.save(self._progress_path(), self.visited)
+
+    def progress_saved_at(self):
+        """Unix time progress was last saved (None if never), to catch up from the GPS track."""
+        try:
+            return os.path.getmtime(self._progress_path())
+        except OSError:
+            return None
+
+    def load_progress(self):
+        try:
+            visited = np.load(self._progress_path())
+        except (OSError, ValueError):
+            return
+        if visited.shape == self.shape:
+            self.visited = visited
+
+    def reset_progress(self):
+        self.visited[:] = False
+        self.save_progress()
+
+    # ---------------- Waypoints ----------------
+    def waypoints(self, start=None):
+        """(lat, lon) waypoints sweeping every run that still has unvisited cells.
+
+        Runs are joined greedily from `start` (or the first lane) by the nearest run end, which
+        reduces to alternating lane directions on a simple pond.
+        """
+        pending = [run for run in self.runs
+                   if not self.visited[run[0], run[1]:run[2] + 1].all()]
+        if not pending:
+            return []
+        if start is None:
+            pos = (pending[0][0], pending[0][1])
+        else:
+            lane, cell = self._to_cell(*self.fence.project(*start))
+            pos = (int(lane), int(cell))
+        route = []
+        while pending:
+            # Distance in cells from the current position to either end of each pending run
+            best = min(((abs(lane - pos[0]) * 2 + abs(end - pos[1]), k, end == i1)
+                        for k, (lane, i0, i1) in enumerate(pending) for end in (i0, i1)))
+            lane, i0, i1 = pending.pop(best[1])
+            first, last = (i1, i0) if best[2] else (i0, i1)
+            route.append(self._cell_latlon(lane, first))
+            if last != first:
+                route.append(self._cell_latlon(lane, last))
+            pos = (lane, last)
+        return route
+
+# ---------------------------- Planning ----------------------------
+def polygon_key(fence, lane_width, margin):
+    digest = hashlib.sha1()
+    digest.update(np.round(fence.edges, 2).tobytes())
+    digest.update(np.round([fence.lat0, fence.lon0], 7).tobytes())
+    digest.update(f"{lane_width}:{margin}:{PLANNER_VERSION}".encode())
+    return digest.hexdigest()[:16]
+
+def long_axis(fence):
+    """Angle (rad, from east) of the principal axis of the boundary vertices."""
+    points = fence.edges[:, :2]
+    cov = np.cov((points - points.mean(axis=0)).T)
+    values, vectors = np.linalg.eigh(cov)
+    major = vectors[:, np.argmax(values)]
+    return math.atan2(major[1], major[0])
+
+def _plan(fence, key, lane_width, margin, cache_dir):
+    theta = long_axis(fence)
+    c, s = math.cos(theta), math.sin(theta)
+    pts = fence.edges[:, :2]
+    u, v = pts[:, 0] * c + pts[:, 1] * s, -pts[:, 0] * s + pts[:, 1] * c
+    origin = (float(u.min()), float(v.min()))
+    shape = (int(math.ceil((v.max() - v.min()) / lane_width)), int(math.ceil((u.max() - u.min()) / lane_width)))
+
+    lanes, cells = np.meshgrid(np.arange(shape[0]), np.arange(shape[1]), indexing="ij")
+    cu = origin[0] + (cells.ravel() + 0.5) * lane_width
+    cv = origin[1] + (lanes.ravel() + 0.5) * lane_width
+    centres = np.stack([cu * c - cv * s, cu * s + cv * c], axis=1)
+    free = fence.free_mask(centres, margin).reshape(shape)
+
+    # Contiguous free cells along each lane → runs
+    runs = []
+    padded = np.pad(free, ((0, 0), (1, 1))).astype(np.int8)
+    edges = np.diff(padded, axis=1)
+    for lane in range(shape[0]):
+        starts = np.flatnonzero(edges[lane] == 1)
+        ends = np.flatnonzero(edges[lane] == -1) - 1
+        runs.extend((lane, int(i0), int(i1)) for i0, i1 in zip(starts, ends))
+    return CoveragePlan(fence, key, theta, origin, lane_width, runs, shape, cache_dir)
+
+def plan_coverage(fence, lane_width=BOAT_WIDTH_M, margin=SHORE_MARGIN_M, cache_dir=CACHE_DIR):
+    """Coverage plan for `fence`, loaded from the on-disk cache when the polygon is unchanged."""
+    key = polygon_key(fence, lane_width, margin)
+    path = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        return CoveragePlan(fence, key, cached["theta"], tuple(cached["origin"]), cached["lane_width"],
+                            [tuple(run) for run in cached["runs"]], tuple(cached["shape"]), cache_dir)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    plan = _plan(fence, key, lane_width, margin, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"theta": plan.theta, "origin": plan.origin, "lane_width": lane_width,
+                   "shape": plan.shape, "runs": plan.runs, "waypoints": plan.waypoints()}, f)
+    return plan
+
+# ---------------------------- CLI ----------------------------
+if __name__ == "__main__":
+    fence = load_geofence(sys.argv[1] if len(sys.argv) > 1 else GEOFENCE_PATH)
+    if fence is None:
+        sys.exit(1)
+    started = time.perf_counter()
+    plan = plan_coverage(fence)
+    elapsed = time.perf_counter() - started
+    route = plan.waypoints()
+    print(f"🗺️  Plan {plan.key}: {len(plan.runs)} runs, {len(route)} waypoints, "
+          f"{plan.progress()} ({elapsed * 1000:.0f} ms)")
@@ -0,0 +1,62 @@
+# decision_loop.py
+# Fixed-rate background loop that computes navigation decisions and caches the latest one.
+# /navigate serves the cached decision immediately; ?after=<seq> long-polls for the next one.
+
+import threading
+import time
+import mission_log
+from sensor_stream import SampleBroadcaster
+
+DECISION_RATE_HZ = 10
+MAX_LONG_POLL = 5.0  # seconds a /navigate?after= request may wait
+
+class DecisionLoop:
+    """Runs `compute()` every 1/rate_hz seconds and publishes each result with a sequence number.
+
+    `compute` returns (decision dict, {source: unix time the input was sampled}).
+    Published decisions carry `seq`, `timestamp`, `compute_ms` and `inputs`.
+    """
+
+    def __init__(self, compute, rate_hz=DECISION_RATE_HZ):
+        self.compute = compute
+        self.period = 1.0 / rate_hz
+        self.overruns = 0
+        self._broadcaster = SampleBroadcaster()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="decision-loop")
+            self._thread.start()
+        return self
+
+    def latest(self):
+        return self._broadcaster.latest()[1]
+
+    def wait_after(self, seq, timeout=MAX_LONG_POLL):
+        """The first decision with a sequence number above `seq`, or the latest one on timeout."""
+        return self._broadcaster.wait_next(seq, min(timeout, MAX_LONG_POLL))[1]
+
+    def _run(self):
+        seq = 0
+        next_tick = time.monotonic()
+        while True:
+            started = time.perf_counter()
+            try:
+                decision, inputs = self.compute()
+            except Exception as e:
+                decision, inputs = {"direction": "STOP", "mode": "error",
+                                    "reason": f"Decision error: {e}"}, {}
+            seq += 1
+            decision.update(seq=seq, timestamp=time.time(), inputs=inputs,
+                            compute_ms=round((time.perf_counter() - started) * 1000, 2))
+            self._broadcaster.publish(decision)
+            mission_log.record_decision(decision)
+
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.overruns += 1
+                next_tick = time.monotonic()  # skip missed ticks instead of bursting
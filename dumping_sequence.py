@@ -2,59 +2,183 @@
 # Autonomous task handler for navigating to shore and dumping collected waste.
 # This script depends on visual shoreline detection and motor control via pondbot_motor_control.py
 
+import json
+import threading
 import time
-import requests
 import pondbot_motor_control as motor
+import waypoint_nav
+from sensor_stream import SensorMirror
+from task_engine import CancelToken, TaskCancelled
 
 # Configurations
-SHORE_STATUS_URL = "http://localhost:8009/shore_status"
+SHORE_STREAM_URL = "http://localhost:8009/shore_status/stream"
 VIDEO_FEED_URL = "http://localhost:8001/video_feed"
 DETECTION_TIMEOUT = 60  # seconds to search for shore
+SHORE_MAX_AGE = 1.0     # seconds; an older shore signal halts the approach until a fresh one arrives
+FORWARD_REFRESH = 0.5   # seconds between forward re-issues (the motor state cache drops the repeats)
+SETTLE_TIME = 2.0       # seconds after the stop before the resting position is read
+APPROACH_LOG = "shore_approach_log.jsonl"
+
+# Timed motion that a cancel can cut short: the motor scheduler stops the devices after
+# `duration`, and a cancel raises TaskCancelled out of the wait (the task engine stops the motors).
+def timed(step, duration, cancel, *args):
+    step(*args, duration, blocking=False)
+    cancel.sleep(duration)
 
 # Step 1: Navigate to Shore using shoreline detection
 
-def move_towards_shore():
-    print("🔍 Searching for shoreline...")
-    start_time = time.time()
-    while time.time() - start_time < DETECTION_TIMEOUT:
-        try:
-            res = requests.get(SHORE_STATUS_URL, timeout=2)
-            if res.status_code == 200 and res.json().get("danger"):
-                print("✅ Shore detected!")
-                return True
-            motor.boat_forward(1, blocking=True)
-        except Exception as e:
-            print("⚠️ Shore detection failed, retrying...")
-        time.sleep(0.5)
-    print("❌ Shoreline not detected in time.")
-    return False
+class ShoreWatch:
+    """Mirror of shore_boundary's per-frame danger stream.
+
+    While armed, the first `danger` sample stops the propellers straight from the stream thread, so
+    the stop goes out on the frame that saw the shore rather than on the approach loop's next turn.
+    The lock only guards the armed/tripped flags; no motor command is ever sent while holding it.
+    """
+
+    STOP = {"p_left": "stop", "p_right": "stop"}
+
+    def __init__(self):
+        self.danger = threading.Event()
+        self._lock = threading.Lock()
+        self._armed = False
+        self._tripped = False
+        self.detection = None
+        self.shore = SensorMirror(SHORE_STREAM_URL, on_update=self._on_sample).start()
+        self.gps = SensorMirror(waypoint_nav.GPS_STREAM_URL).start()
+
+    def arm(self):
+        with self._lock:
+            self.danger.clear()
+            self.detection = None
+            self._armed, self._tripped = True, False
+
+    def disarm(self):
+        with self._lock:
+            self._armed = False
+
+    def forward(self):
+        with self._lock:
+            if not self._armed:
+                return
+        motor.boat_forward()
+        with self._lock:
+            raced = self._tripped
+        if raced:  # danger tripped while this forward was going out: make sure the stop lands last
+            motor.control_devices(self.STOP, force=True)
+
+    def _on_sample(self, sample):
+        if not sample.get("danger"):
+            return
+        with self._lock:
+            if not self._armed:
+                return
+            self._armed, self._tripped = False, True
+        received = time.time()
+        motor.control_devices(self.STOP, force=True)  # forced: supersedes any forward in flight
+        self.detection = {"frame": sample.get("frame"), "captured": sample.get("timestamp"),
+                          "received": received, "stopped": time.time(),
+                          "position": self.gps.get(waypoint_nav.GPS_MAX_AGE)}
+        self.danger.set()
+
+_watch = None
+
+def shore_watch():
+    global _watch
+    if _watch is None:
+        _watch = ShoreWatch()
+    return _watch
+
+def log_approach(record):
+    print(f"📏 Approach: {record['result']} after {record['approach_s']} s, "
+          f"detect→stop {record.get('detect_to_stop_ms')} ms, "
+          f"stopping distance {record.get('stopping_distance_m')} m")
+    try:
+        with open(APPROACH_LOG, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write {APPROACH_LOG}: {e}")
+
+def approach_record(watch, result, approach_s):
+    record = {"time": time.time(), "result": result, "approach_s": round(approach_s, 2)}
+    detection = watch.detection
+    if detection is None:
+        return record
+    record["frame"] = detection["frame"]
+    record["detect_to_stop_ms"] = round((detection["stopped"] - detection["received"]) * 1000, 1)
+    if detection["captured"] is not None:
+        record["frame_to_stop_ms"] = round((detection["stopped"] - detection["captured"]) * 1000, 1)
+    start, rest = detection["position"], watch.gps.get(waypoint_nav.GPS_MAX_AGE)
+    if start is not None and rest is not None:
+        record["stopping_distance_m"] = round(
+            waypoint_nav.haversine_m(start["lat"], start["lon"], rest["lat"], rest["lon"]), 2)
+    return record
+
+def move_towards_shore(cancel):
+    # Steer to the stored dump point first; the camera approach below confirms the shoreline
+    if "dump" in waypoint_nav.load_points():
+        waypoint_nav.go_to_point("dump", cancel=cancel)
+        cancel.checkpoint()
+    watch = shore_watch()
+    print("🔍 Approaching shoreline...")
+    started = time.monotonic()
+    result, stale = "timeout", False
+    watch.arm()
+    try:
+        while time.monotonic() - started < DETECTION_TIMEOUT:
+            if watch.danger.wait(FORWARD_REFRESH):
+                result = "shore"
+                break
+            cancel.checkpoint()
+            if watch.shore.get(SHORE_MAX_AGE) is None:
+                if not stale:
+                    print("⚠️ Shore signal lost, holding position...")
+                    motor.boat_stop()
+                stale = True
+                continue
+            stale = False
+            watch.forward()
+    except TaskCancelled:
+        log_approach(approach_record(watch, "cancelled", time.monotonic() - started))
+        raise
+    finally:
+        watch.disarm()
+    approach_s = time.monotonic() - started
+    if result == "shore":
+        print("✅ Shore detected!")
+        cancel.sleep(SETTLE_TIME)  # let the boat coast to rest before measuring the stopping distance
+    else:
+        motor.boat_stop()
+        print("❌ Shoreline not detected in time.")
+    log_approach(approach_record(watch, result, approach_s))
+    return result == "shore"
 
 # Step 2: Dumping sequence
 
-def perform_dumping():
+def perform_dumping(cancel):
     print("♻️ Reversing and rotating before dumping...")
-    motor.boat_backward(2, blocking=True)
-    motor.boat_left(2, blocking=True)
+    timed(motor.boat_backward, 2, cancel)
+    timed(motor.boat_left, 2, cancel)
     print("🚮 Executing dump...")
     motor.control_device("conv_move", "fwd")  # run conveyor briefly
-    motor.run_device("bin_hoist", "fwd", 3, blocking=True)  # raise bin
-    motor.run_device("bin_hoist", "rev", 3, blocking=True)  # lower bin
+    timed(motor.run_device, 3, cancel, "bin_hoist", "fwd")  # raise bin
+    timed(motor.run_device, 3, cancel, "bin_hoist", "rev")  # lower bin
     motor.control_device("conv_move", "stop")
 
 # Step 3: Resume normal operation
 
-def resume_patrol():
+def resume_patrol(cancel):
     print("✅ Dump complete. Resuming patrol...")
-    motor.boat_right(2, blocking=True)
-    motor.boat_forward(2, blocking=True)
+    timed(motor.boat_right, 2, cancel)
+    timed(motor.boat_forward, 2, cancel)
 
-# Full routine entry point
+# Full routine entry point; `cancel` (a task_engine.CancelToken) is checked between every step
 
-def run_sequence():
-    success = move_towards_shore()
+def run_sequence(cancel=None):
+    cancel = cancel or CancelToken()
+    success = move_towards_shore(cancel)
     if success:
-        perform_dumping()
-    resume_patrol()
+        perform_dumping(cancel)
+    resume_patrol(cancel)
 
 if __name__ == "__main__":
     run_sequence()
@@ -0,0 +1,240 @@
+# geofence.py
+# Pond geofence: the boundary polygon (with optional keep-out islands) projected to local metres
+# and bucketed into a uniform grid index, so inside/outside and distance/bearing to the nearest
+# edge cost a handful of segment tests per GPS fix instead of a scan over the whole outline.
+#
+# Boundary files:
+#   GeoJSON – Polygon / MultiPolygon geometry (or a FeatureCollection of them). The first ring of
+#             the first polygon is the pond shore; holes, further polygons and features with
+#             "keep_out": true in their properties are islands.
+#   CSV     – rows of `lat,lon` (shore only) or `ring,lat,lon` where ring 0 is the shore and every
+#             other ring id is an island. A header row is optional.
+
+import csv
+import json
+import math
+import os
+import numpy as np
+
+GEOFENCE_PATH = "pond_boundary.geojson"
+INDEX_CELLS = 64           # index cells along the longer side of the boundary box
+EARTH_RADIUS_M = 6371000.0
+CHUNK = 512                # cells per vectorized block while building the index
+
+# ---------------------------- Loading ----------------------------
+def read_geojson(path):
+    """→ (shore ring, [island rings]) as lists of (lat, lon)."""
+    with open(path) as f:
+        doc = json.load(f)
+    features = doc.get("features") if doc.get("type") == "FeatureCollection" else [doc]
+    shore, islands = None, []
+    for feature in features:
+        geometry = feature.get("geometry", feature)
+        keep_out = (feature.get("properties") or {}).get("keep_out", False)
+        polygons = geometry["coordinates"]
+        if geometry["type"] == "Polygon":
+            polygons = [polygons]
+        for polygon in polygons:
+            rings = [[(lat, lon) for lon, lat, *_ in ring] for ring in polygon]
+            if shore is None and not keep_out:
+                shore = rings[0]
+                islands.extend(rings[1:])
+            else:
+                islands.extend(rings[:1] if keep_out else rings)
+    return shore, islands
+
+def read_csv(path):
+    rings = {}
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                values = [float(v) for v in row]
+            except ValueError:
+                continue  # header or comment line
+            ring, lat, lon = values if len(values) == 3 else (0, *values)
+            rings.setdefault(int(ring), []).append((lat, lon))
+    return rings.pop(0, None), list(rings.values())
+
+def load_geofence(path=GEOFENCE_PATH):
+    """Geofence from a .geojson/.json or .csv boundary file, or None if there is none."""
+    if not os.path.exists(path):
+        print(f"[Geofence] No boundary file at {path}, geofence disabled")
+        return None
+    reader = read_csv if path.lower().endswith(".csv") else read_geojson
+    try:
+        shore, islands = reader(path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"[Geofence] Could not load {path}: {e}")
+        return None
+    if not shore or len(shore) < 3:
+        print(f"[Geofence] {path} has no shore polygon, geofence disabled")
+        return None
+    return Geofence(shore, islands)
+
+# ---------------------------- Geometry ----------------------------
+def _segment_distance(px, py, ax, ay, bx, by):
+    """Distance from p to segment ab and the nearest point on it."""
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+    qx, qy = ax + t * dx, ay + t * dy
+    return math.hypot(px - qx, py - qy), qx, qy
+
+def _crosses(cx, cy, px, py, ax, ay, bx, by):
+    """Does segment c→p cross edge ab? Vertices count on one side only, so parity stays exact."""
+    o1 = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) > 0
+    o2 = (bx - ax) * (py - ay) - (by - ay) * (px - ax) > 0
+    o3 = (px - cx) * (ay - cy) - (py - cy) * (ax - cx) > 0
+    o4 = (px - cx) * (by - cy) - (py - cy) * (bx - cx) > 0
+    return o1 != o2 and o3 != o4
+
+def _distances(points, a, b):
+    """(points × edges) distances from points to segments a→b (numpy)."""
+    d = b - a
+    length2 = np.maximum((d ** 2).sum(axis=1), 1e-12)
+    rel = points[:, None, :] - a[None, :, :]
+    t = np.clip((rel * d[None]).sum(axis=2) / length2, 0.0, 1.0)
+    return np.hypot(rel[..., 0] - t * d[:, 0], rel[..., 1] - t * d[:, 1])
+
+def _inside(points, a, b):
+    """Even-odd point-in-polygon for many points against all edges at once (numpy)."""
+    px, py = points[:, 0:1], points[:, 1:2]
+    ay, by = a[None, :, 1], b[None, :, 1]
+    straddles = (ay > py) != (by > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = a[None, :, 0] + (py - ay) * (b[None, :, 0] - a[None, :, 0]) / (by - ay)
+    return ((straddles & (px < x_cross)).sum(axis=1) % 2) == 1
+
+# ---------------------------- Geofence ----------------------------
+class Geofence:
+    def __init__(self, shore, islands=(), index_cells=INDEX_CELLS):
+        rings = [shore] + [ring for ring in islands if len(ring) >= 3]
+        all_points = np.array([p for ring in rings for p in ring], dtype=float)
+        self.lat0, self.lon0 = all_points.mean(axis=0)
+        self._kx = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(self.lat0))
+        self._ky = math.radians(1) * EARTH_RADIUS_M
+
+        # Edges in local metres, tagged with the ring they belong to (0 = shore)
+        a, b, ring_ids = [], [], []
+        for ring_id, ring in enumerate(rings):
+            xy = [self.project(lat, lon) for lat, lon in ring]
+            if xy[0] == xy[-1]:
+                xy = xy[:-1]
+            for i in range(len(xy)):
+                a.append(xy[i])
+                b.append(xy[(i + 1) % len(xy)])
+                ring_ids.append(ring_id)
+        a, b = np.array(a), np.array(b)
+        self.edges = np.hstack([a, b])  # (edges × 4) ax, ay, bx, by in local metres
+        self._edges = [(ax, ay, bx, by) for (ax, ay), (bx, by) in zip(a.tolist(), b.tolist())]
+        self._ring_ids = ring_ids
+        self._build_index(a, b, index_cells)
+
+    def project(self, lat, lon):
+        """(lat, lon) → local (east, north) metres around the boundary centre."""
+        return (lon - self.lon0) * self._kx, (lat - self.lat0) * self._ky
+
+    def unproject(self, x, y):
+        """Local (east, north) metres → (lat, lon)."""
+        return self.lat0 + y / self._ky, self.lon0 + x / self._kx
+
+    def free_mask(self, points, margin=0.0):
+        """Vectorized over (n × 2) local points: inside the pond and at least `margin` m from every edge.
+
+        Index cells settle most points from their centre: no edge inside the cell means the centre's
+        inside state holds, and centre clearance minus the half-diagonal bounds the point's clearance.
+        Only points in cells near an edge are tested against the outline.
+        """
+        a, b = self.edges[:, :2], self.edges[:, 2:]
+        ix = np.floor((points[:, 0] - self.origin[0]) / self.cell_size).astype(int)
+        iy = np.floor((points[:, 1] - self.origin[1]) / self.cell_size).astype(int)
+        known = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        cell = np.where(known, iy * self.nx + ix, 0)
+
+        inside = known & self._inside_cells[cell]
+        exact = np.flatnonzero(known & self._edge_cells[cell])
+        for start in range(0, len(exact), CHUNK):
+            idx = exact[start:start + CHUNK]
+            inside[idx] = _inside(points[idx], a, b)
+
+        mask = inside.copy()
+        check = np.flatnonzero(inside & (self._clearance[cell] - self._half_diag < margin))
+        for start in range(0, len(check), CHUNK):
+            idx = check[start:start + CHUNK]
+            mask[idx] = _distances(points[idx], a, b).min(axis=1) >= margin
+        return mask
+
+    def _build_index(self, a, b, index_cells):
+        lo = np.minimum(a, b).min(axis=0)
+        hi = np.maximum(a, b).max(axis=0)
+        self.cell_size = float(max(hi - lo)) / index_cells or 1.0
+        self.origin = lo - self.cell_size  # one empty cell of margin around the outline
+        self.nx, self.ny = (np.ceil((hi - self.origin) / self.cell_size).astype(int) + 1).tolist()
+        half_diag = self._half_diag = self.cell_size * math.sqrt(2) / 2
+
+        ix, iy = np.meshgrid(np.arange(self.nx), np.arange(self.ny))
+        centres = self.origin + (np.stack([ix.ravel(), iy.ravel()], axis=1) + 0.5) * self.cell_size
+        self._centres = centres.tolist()
+        self._centre_inside = []
+        self._nearest = []   # per cell: edges that can be nearest to some point in the cell
+        self._crossing = []  # per cell: edges whose bounding box overlaps the cell
+        clearance = []
+        edge_lo, edge_hi = np.minimum(a, b), np.maximum(a, b)
+        for start in range(0, len(centres), CHUNK):
+            block = centres[start:start + CHUNK]
+            inside = _inside(block, a, b)
+            dist = _distances(block, a, b)
+            # Any edge further from the centre than (nearest + 2 half-diagonals) can never win
+            nearest = dist.min(axis=1)
+            clearance.extend(nearest.tolist())
+            near = dist <= nearest[:, None] + 2 * half_diag
+            overlap = ((edge_lo[None] <= (block + self.cell_size / 2)[:, None]) &
+                       (edge_hi[None] >= (block - self.cell_size / 2)[:, None])).all(axis=2)
+            for i in range(len(block)):
+                self._centre_inside.append(bool(inside[i]))
+                self._nearest.append(np.flatnonzero(near[i]).tolist())
+                self._crossing.append(np.flatnonzero(overlap[i]).tolist())
+        # Array views of the index for vectorized queries (free_mask)
+        self._clearance = np.array(clearance)
+        self._inside_cells = np.array(self._centre_inside, dtype=bool)
+        self._edge_cells = np.array([len(c) > 0 for c in self._crossing], dtype=bool)
+
+    def _cell(self, x, y):
+        cx = int((x - self.origin[0]) // self.cell_size)
+        cy = int((y - self.origin[1]) // self.cell_size)
+        if 0 <= cx < self.nx and 0 <= cy < self.ny:
+            return cy * self.nx + cx
+        return None
+
+    def contains(self, lat, lon):
+        """True inside the shore polygon and outside every island."""
+        x, y = self.project(lat, lon)
+        cell = self._cell(x, y)
+        if cell is None:
+            return False
+        # Parity from the precomputed cell centre, flipped by every edge crossed on the way to p
+        cx, cy = self._centres[cell]
+        inside = self._centre_inside[cell]
+        for i in self._crossing[cell]:
+            if _crosses(cx, cy, x, y, *self._edges[i]):
+                inside = not inside
+        return inside
+
+    def status(self, lat, lon):
+        """Geofence sensor status for one fix: inside flag, distance (m) and true bearing to the
+        nearest boundary point, and whether that edge is the shore or an island."""
+        x, y = self.project(lat, lon)
+        cell = self._cell(x, y)
+        candidates = range(len(self._edges)) if cell is None else self._nearest[cell]
+        best = (math.inf, x, y, 0)
+        for i in candidates:
+            d, qx, qy = _segment_distance(x, y, *self._edges[i])
+            if d < best[0]:
+                best = (d, qx, qy, i)
+        d, qx, qy, i = best
+        return {
+            "inside": self.contains(lat, lon),
+            "distance_m": round(d, 2),
+            "bearing": round(math.degrees(math.atan2(qx - x, qy - y)) % 360, 1),
+            "edge": "shore" if self._ring_ids[i] == 0 else "island",
+        }
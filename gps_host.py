@@ -1,51 +1,269 @@
 #!/usr/bin/env python3
+import math
 import serial
 import time
 import threading
-from flask import Flask, jsonify
+from datetime import timezone
+from flask import Flask, jsonify, request
 import pynmea2
+from sensor_history import SampleHistory, position_filter
+from sensor_stream import SampleBroadcaster, sse_response
+from telemetry_codec import respond
+from gps_track import TrackStore, records_payload
+from geofence import load_geofence
+from coverage_planner import plan_coverage
 
 app = Flask(__name__)
-gps_data = {"lat": None, "lon": None, "fix": False}
+gps_data = {
+    "lat": None, "lon": None, "fix": False, "quality": 0,
+    "alt": None, "sats": 0, "hdop": None, "pdop": None, "vdop": None, "fix_type": None,
+    "speed": None, "course": None,  # m/s and degrees true, from RMC/VTG
+    "gps_time": None,               # UTC unix time reported by the receiver (RMC)
+    "updated": None,                # host unix time of the last GGA fix
+}
+velocity_updated = None  # host time of the last RMC/VTG speed/course
 lock = threading.Lock()
 
+# Recent fixes for filtering; /location serves an outlier-rejected mean of the last few
+HISTORY_SIZE = 256
+POSITION_WINDOW = 10
+history = SampleHistory(["lat", "lon"], capacity=HISTORY_SIZE)
+broadcaster = SampleBroadcaster()
+
+# Every fix is appended to the memory-mapped track file
+track = TrackStore()
+TRACK_FLUSH_INTERVAL = 5.0   # seconds between msync of the track file
+TRACK_MAX_ROWS = 5000        # /track decimates longer slices to this many rows
+
+# Coverage sweep progress: every fix marks the cells under it and progress is saved with the
+# track, so an interrupted sweep resumes with only the unvisited runs (None without a boundary file)
+coverage = None
+coverage_lock = threading.Lock()
+
+def load_coverage():
+    """Plan coverage over the pond boundary and catch up on fixes recorded since the last save."""
+    global coverage
+    fence = load_geofence()
+    if fence is None:
+        return None
+    plan = plan_coverage(fence)
+    plan.mark_track(track.range(plan.progress_saved_at()))
+    plan.save_progress()
+    with coverage_lock:
+        coverage = plan
+    return plan
+
 # Update with actual serial port if needed
 GPS_PORT = "/dev/serial0"
-BAUD_RATE = 9600
+BAUD_RATE = 9600             # receiver default after power-up
+FAST_BAUD_RATE = 57600       # requested from MTK-based receivers at startup (None to disable)
+UPDATE_RATE_HZ = 5
+KNOTS_TO_MS = 0.514444
+KMH_TO_MS = 1 / 3.6
+VELOCITY_MAX_AGE = 2.0       # older RMC/VTG velocity falls back to one derived from the track
+VELOCITY_WINDOW = 2.0        # seconds of track used for the derived velocity
+EARTH_RADIUS_M = 6371000.0
 
-def gps_loop():
-    global gps_data
+# ---- Receiver configuration (MTK PMTK commands; ignored by other chipsets) ----
+def nmea_command(body):
+    checksum = 0
+    for ch in body.encode("ascii"):
+        checksum ^= ch
+    return f"${body}*{checksum:02X}\r\n".encode("ascii")
+
+def configure_receiver():
+    """Switch the receiver to FAST_BAUD_RATE at UPDATE_RATE_HZ with GGA/RMC/VTG/GSA output.
+
+    Returns the baud rate to read at; stays at BAUD_RATE if the receiver does not follow.
+    """
+    if not FAST_BAUD_RATE or FAST_BAUD_RATE == BAUD_RATE:
+        return BAUD_RATE
     try:
         with serial.Serial(GPS_PORT, BAUD_RATE, timeout=1) as ser:
+            ser.write(nmea_command(f"PMTK251,{FAST_BAUD_RATE}"))
+            ser.flush()
+        time.sleep(0.2)
+        with serial.Serial(GPS_PORT, FAST_BAUD_RATE, timeout=1) as ser:
+            deadline = time.time() + 3
+            while time.time() < deadline:
+                if ser.readline().startswith(b"$"):
+                    ser.write(nmea_command("PMTK314,0,1,1,1,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0"))
+                    ser.write(nmea_command(f"PMTK220,{int(1000 / UPDATE_RATE_HZ)}"))
+                    print(f"GPS: {FAST_BAUD_RATE} baud, {UPDATE_RATE_HZ} Hz updates")
+                    return FAST_BAUD_RATE
+    except serial.SerialException as e:
+        print("GPS configuration error:", e)
+    print(f"GPS: receiver did not switch baud rate, staying at {BAUD_RATE}")
+    return BAUD_RATE
+
+# ---- Sentence handling ----
+def _float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+def handle_sentence(msg):
+    """Update gps_data from one parsed sentence; returns True for a GGA (one per fix epoch)."""
+    global velocity_updated
+    kind = msg.sentence_type
+    now = time.time()
+    with lock:
+        if kind == "GGA":
+            fix = bool(msg.lat and msg.lon and int(msg.gps_qual or 0) > 0)
+            gps_data["fix"] = fix
+            gps_data["quality"] = int(msg.gps_qual or 0)
+            gps_data["sats"] = int(msg.num_sats or 0)
+            gps_data["hdop"] = _float(msg.horizontal_dil)
+            if fix:
+                gps_data["lat"] = msg.latitude
+                gps_data["lon"] = msg.longitude
+                gps_data["alt"] = _float(msg.altitude)
+                gps_data["updated"] = now
+            return True
+        if kind == "RMC" and msg.status == "A":
+            speed = _float(msg.spd_over_grnd)
+            gps_data["speed"] = None if speed is None else speed * KNOTS_TO_MS
+            gps_data["course"] = _float(msg.true_course)
+            if msg.datestamp and msg.timestamp:
+                gps_data["gps_time"] = msg.datetime.replace(tzinfo=timezone.utc).timestamp()
+            velocity_updated = now
+        elif kind == "VTG":
+            speed = _float(msg.spd_over_grnd_kmph)
+            if speed is not None:
+                gps_data["speed"] = speed * KMH_TO_MS
+                gps_data["course"] = _float(msg.true_track)
+                velocity_updated = now
+        elif kind == "GSA":
+            gps_data["fix_type"] = int(msg.mode_fix_type or 1)  # 1 none, 2 = 2D, 3 = 3D
+            gps_data["pdop"] = _float(msg.pdop)
+            gps_data["hdop"] = _float(msg.hdop)
+            gps_data["vdop"] = _float(msg.vdop)
+    return False
+
+def record_fix():
+    with lock:
+        if not gps_data["fix"]:
+            return
+        fix = dict(gps_data, t=gps_data["updated"], fix=gps_data["quality"])
+    history.append(fix)
+    track.append(fix)
+    with coverage_lock:
+        if coverage is not None:
+            coverage.mark_visited(fix["lat"], fix["lon"])
+
+def gps_loop():
+    baud = configure_receiver()
+    last_flush = time.time()
+    try:
+        with serial.Serial(GPS_PORT, baud, timeout=1) as ser:
             while True:
                 try:
                     line = ser.readline().decode("ascii", errors="ignore").strip()
-                    if line.startswith("$GPGGA") or line.startswith("$GNGGA"):
-                        msg = pynmea2.parse(line)
-                        if msg.lat and msg.lon and int(msg.gps_qual) > 0:
-                            lat = msg.latitude
-                            lon = msg.longitude
-                            with lock:
-                                gps_data["lat"] = round(lat, 6)
-                                gps_data["lon"] = round(lon, 6)
-                                gps_data["fix"] = True
-                        else:
-                            with lock:
-                                gps_data["fix"] = False
+                    if not line.startswith("$"):
+                        continue
+                    msg = pynmea2.parse(line)
+                    if handle_sentence(msg):
+                        record_fix()
+                        broadcaster.publish(filtered_location())
+                    if time.time() - last_flush > TRACK_FLUSH_INTERVAL:
+                        track.flush()
+                        with coverage_lock:
+                            if coverage is not None:
+                                coverage.save_progress()
+                        last_flush = time.time()
+                except pynmea2.ParseError:
+                    continue  # partial line, e.g. right after a baud change
                 except Exception as e:
                     print("GPS parse error:", e)
     except serial.SerialException as e:
         print("GPS serial error:", e)
 
+def track_velocity():
+    """Speed/course over the last VELOCITY_WINDOW seconds of the track, found by binary search."""
+    last = track.latest(1)
+    if not len(last):
+        return None, None
+    last = last[0]
+    prev = track.at(last["t"] - VELOCITY_WINDOW)
+    if prev is None or last["t"] <= prev["t"]:
+        return None, None
+    dy = math.radians(last["lat"] - prev["lat"]) * EARTH_RADIUS_M
+    dx = math.radians(last["lon"] - prev["lon"]) * EARTH_RADIUS_M * math.cos(math.radians(last["lat"]))
+    dt = float(last["t"] - prev["t"])
+    return math.hypot(dx, dy) / dt, math.degrees(math.atan2(dx, dy)) % 360
+
+def filtered_location():
+    lat, lon = position_filter(history, POSITION_WINDOW)
+    with lock:
+        return {"lat": lat, "lon": lon, "fix": gps_data["fix"]}
+
 @app.route("/")
 def location_home():
-    with lock:
-        return jsonify(gps_data)
+    return jsonify(filtered_location())
 
+# GET /location → outlier-rejected mean of recent fixes (?raw=1 for the latest raw fix)
+# Accept: application/x-boat-telemetry → binary record instead of JSON
 @app.route("/location")
 def location():
+    if request.args.get("raw"):
+        with lock:
+            return respond("location", gps_data)
+    return respond("location", filtered_location())
+
+# GET /location/stream → SSE stream pushing each new filtered fix
+@app.route("/location/stream")
+def location_stream():
+    return sse_response(broadcaster)
+
+# GET /history?since=<unix time> → all buffered fixes newer than `since`
+@app.route("/history")
+def get_history():
+    since = request.args.get("since", default=0.0, type=float)
+    return jsonify(history.history_payload(since))
+
+# GET /track?from=<unix time>&to=<unix time> → recorded fixes in the range (binary search on time)
+@app.route("/track")
+def get_track():
+    t_from = request.args.get("from", type=float)
+    t_to = request.args.get("to", type=float)
+    max_rows = request.args.get("max_rows", default=TRACK_MAX_ROWS, type=int)
+    return jsonify(records_payload(track.range(t_from, t_to), max_rows))
+
+# GET /velocity → speed (m/s) and course (° true) from RMC/VTG, else derived from the track
+@app.route("/velocity")
+def velocity():
     with lock:
-        return jsonify(gps_data)
+        speed, course = gps_data["speed"], gps_data["course"]
+        fresh = velocity_updated is not None and time.time() - velocity_updated < VELOCITY_MAX_AGE
+    source = "nmea"
+    if not fresh:
+        speed, course = track_velocity()
+        source = "track" if speed is not None else None
+    return jsonify({"speed": None if speed is None else round(speed, 3),
+                    "course": None if course is None else round(course, 1),
+                    "source": source})
+
+# GET /coverage?lat=&lon= → sweep progress and the waypoints still to cover, starting nearest
+# (lat, lon) or the current fix; POST /coverage/reset → start the sweep over
+@app.route("/coverage")
+def get_coverage():
+    with coverage_lock:
+        if coverage is None:
+            return jsonify({"error": "No pond boundary, coverage disabled"}), 404
+        start = (request.args.get("lat", type=float), request.args.get("lon", type=float))
+        if None in start:
+            here = filtered_location()
+            start = (here["lat"], here["lon"]) if here["lat"] is not None else None
+        return jsonify({"progress": coverage.progress(), "waypoints": coverage.waypoints(start)})
+
+@app.route("/coverage/reset", methods=["POST"])
+def reset_coverage():
+    with coverage_lock:
+        if coverage is None:
+            return jsonify({"error": "No pond boundary, coverage disabled"}), 404
+        coverage.reset_progress()
+        return jsonify({"progress": coverage.progress()})
 
 @app.route("/ping")
 def ping():
@@ -53,5 +271,6 @@ def ping():
 
 if __name__ == "__main__":
     print("📡 GPS data host running on http://<pi-ip>:8006/location")
+    load_coverage()
     threading.Thread(target=gps_loop, daemon=True).start()
     app.run(host="0.0.0.0", port=8006, threaded=True)
@@ -0,0 +1,128 @@
+# gps_track.py
+# Append-only, memory-mapped GPS track file with fixed-size records in time order.
+# Time-range and nearest-fix queries use binary search on the record timestamps,
+# so they cost O(log n) page reads regardless of how long the track gets.
+
+import bisect
+import os
+import threading
+import numpy as np
+
+TRACK_FILE = "gps_track.bin"
+TRACK_MAGIC = b"BOATTRK1"
+INITIAL_CAPACITY = 65536  # records; the file doubles when full
+
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),        # host unix time of the fix
+    ("lat", "<f8"),
+    ("lon", "<f8"),
+    ("speed", "<f4"),    # m/s over ground
+    ("course", "<f4"),   # degrees true
+    ("hdop", "<f4"),
+    ("alt", "<f4"),      # metres above mean sea level
+    ("sats", "u1"),
+    ("fix", "u1"),       # GGA fix quality (0 = no fix)
+    ("_pad", "V6"),      # 48-byte records keep every `t` 8-byte aligned
+])
+# The header occupies one record-sized slot at the start of the file
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("count", "<u8"), ("_pad", f"V{RECORD_DTYPE.itemsize - 16}")])
+FIELDS = [name for name in RECORD_DTYPE.names if not name.startswith("_")]
+
+class _TimeColumn:
+    """Sequence view of the timestamps, so bisect reads only the records it probes."""
+
+    def __init__(self, records, count):
+        self.records, self.count = records, count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return self.records[i]["t"]
+
+class TrackStore:
+    def __init__(self, path=TRACK_FILE, capacity=INITIAL_CAPACITY):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_DTYPE.itemsize:
+            with open(path, "wb") as f:
+                header = np.zeros(1, dtype=HEADER_DTYPE)
+                header["magic"] = TRACK_MAGIC
+                f.write(header.tobytes())
+                f.truncate(HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize)
+        self._map()
+        if self._header["magic"][0] != TRACK_MAGIC:
+            raise ValueError(f"{path} is not a GPS track file")
+
+    def _map(self):
+        size = os.path.getsize(self.path)
+        self._header = np.memmap(self.path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        self.capacity = (size - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+        self._records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r+",
+                                  offset=HEADER_DTYPE.itemsize, shape=(self.capacity,))
+
+    def _grow(self):
+        self._records.flush()
+        self._header.flush()
+        del self._records, self._header
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_DTYPE.itemsize + 2 * self.capacity * RECORD_DTYPE.itemsize)
+        self._map()
+
+    def __len__(self):
+        return int(self._header["count"][0])
+
+    def append(self, fix):
+        """Append a fix dict (keys from FIELDS; missing values become NaN/0). Out-of-order fixes are dropped."""
+        with self._lock:
+            count = len(self)
+            if count and fix["t"] <= self._records[count - 1]["t"]:
+                return False
+            if count == self.capacity:
+                self._grow()
+            rec = self._records[count]
+            for name in FIELDS:
+                value = fix.get(name)
+                if name in ("sats", "fix"):
+                    rec[name] = value or 0
+                else:
+                    rec[name] = np.nan if value is None else value
+            self._header["count"] = count + 1
+            return True
+
+    def flush(self):
+        with self._lock:
+            self._records.flush()
+            self._header.flush()
+
+    def _index(self, t, side="left"):
+        col = _TimeColumn(self._records, len(self))
+        if side == "left":
+            return bisect.bisect_left(col, t)
+        return bisect.bisect_right(col, t)
+
+    def range(self, t_from=None, t_to=None):
+        """Copy of all records with t_from <= t <= t_to."""
+        with self._lock:
+            start = 0 if t_from is None else self._index(t_from, "left")
+            end = len(self) if t_to is None else self._index(t_to, "right")
+            return np.array(self._records[start:end])
+
+    def latest(self, n=1):
+        with self._lock:
+            count = len(self)
+            return np.array(self._records[max(0, count - n):count])
+
+    def at(self, t):
+        """The last record at or before time `t`, or None."""
+        with self._lock:
+            i = self._index(t, "right") - 1
+            return None if i < 0 else np.array(self._records[i])
+
+def records_payload(records, max_rows=None):
+    """JSON-ready track slice, decimated evenly to at most `max_rows` rows."""
+    if max_rows and len(records) > max_rows:
+        records = records[np.linspace(0, len(records) - 1, max_rows).astype(int)]
+    rows = [[None if isinstance(v, float) and v != v else v for v in row]
+            for row in records[FIELDS].tolist()]
+    return {"fields": FIELDS, "records": rows}
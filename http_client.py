@@ -0,0 +1,68 @@
+# http_client.py
+# Shared keep-alive HTTP client for all inter-service calls.
+# One requests.Session per policy keeps a connection pool per host, so repeated calls to the
+# same service reuse an open TCP connection instead of paying connection setup every time.
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_CONNECTIONS = 16  # hosts kept per policy
+POOL_MAXSIZE = 8       # idle keep-alive connections kept per host
+
+# Per-endpoint policies: default (connect, read) timeout and retry budget
+POLICIES = {
+    "sensor":  {"timeout": (0.1, 0.15), "retries": 0},  # decision-path reads; the deadline wins
+    "status":  {"timeout": (0.5, 2.0), "retries": 1},   # shore status, hub state, health checks
+    "control": {"timeout": (0.5, 2.0), "retries": 0},   # ESP32 relay commands (motor_protocol retries them)
+    "probe":   {"timeout": (0.5, 2.0), "retries": 0},   # connectivity checks
+    "stream":  {"timeout": (3.0, 20.0), "retries": 0},  # SSE and MJPEG streams
+}
+
+_sessions = {}
+_lock = threading.Lock()
+
+def session(policy="status"):
+    with _lock:
+        if policy not in _sessions:
+            retries = POLICIES[policy]["retries"]
+            retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                          backoff_factor=0.05, status_forcelist=(502, 503, 504),
+                          allowed_methods=frozenset({"GET"}), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                  max_retries=retry)
+            s = requests.Session()
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _sessions[policy] = s
+        return _sessions[policy]
+
+def get(url, policy="status", **kwargs):
+    """requests.get through the pooled session for `policy`, with that policy's default timeout."""
+    kwargs.setdefault("timeout", POLICIES[policy]["timeout"])
+    return session(policy).get(url, **kwargs)
+
+def stats():
+    """Requests made vs TCP connections opened, per policy and host (reused = requests - new)."""
+    out = {}
+    with _lock:
+        sessions = dict(_sessions)
+    for policy, s in sessions.items():
+        pools = s.get_adapter("http://").poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.host}:{pool.port}"
+            entry = out.setdefault(policy, {}).setdefault(host, {"requests": 0, "new_connections": 0})
+            entry["requests"] += pool.num_requests
+            entry["new_connections"] += pool.num_connections
+    totals = {"requests": 0, "new_connections": 0}
+    for hosts in out.values():
+        for entry in hosts.values():
+            entry["reused"] = entry["requests"] - entry["new_connections"]
+            totals["requests"] += entry["requests"]
+            totals["new_connections"] += entry["new_connections"]
+    totals["reused"] = totals["requests"] - totals["new_connections"]
+    return {"policies": out, "total": totals}
@@ -0,0 +1,108 @@
+# link_monitor.py
+# Background health tracking for the two ESP32 transports (the serial link and the HTTP relay
+# endpoint). Motor commands read the cached transport instead of probing connectivity before every
+# send; send failures are reported back here and switch transports at once.
+
+import threading
+import time
+from collections import deque
+
+CHECK_INTERVAL = 1.0        # seconds between health checks
+HTTP_PROBE_INTERVAL = 10.0  # seconds between HTTP probes while serial is healthy
+LATENCY_WINDOW = 32         # recent latencies kept per transport
+
+class LinkMonitor:
+    """Picks 'serial', 'http' or 'none' from `serial_check()` / `http_check()` and send reports."""
+
+    def __init__(self, serial_check, http_check, interval=CHECK_INTERVAL, http_interval=HTTP_PROBE_INTERVAL):
+        self.serial_check = serial_check
+        self.http_check = http_check
+        self.interval = interval
+        self.http_interval = http_interval
+        self.health = {"serial": None, "http": None}  # None: not checked yet
+        self.latency = {"serial": deque(maxlen=LATENCY_WINDOW), "http": deque(maxlen=LATENCY_WINDOW)}
+        self.transport = "none"
+        self.switches = 0
+        self.changed_at = None
+        self._next_http = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self._run, daemon=True, name="link-monitor")
+        self._check_serial()  # cheap, so the first command already has a sensible choice
+        self._choose()
+        self._thread.start()
+        return self
+
+    def current(self):
+        """Cached transport for the next command."""
+        self.start()
+        return self.transport
+
+    def report(self, transport, ok, latency=None):
+        """Outcome of a real send; a failure marks the transport down and re-picks immediately."""
+        with self._lock:
+            self.health[transport] = ok
+            if ok and latency is not None:
+                self.latency[transport].append(latency)
+        self._choose()
+        if not ok:
+            self._wake.set()  # re-check both transports now rather than at the next interval
+
+    def status(self):
+        with self._lock:
+            out = {"transport": self.transport, "switches": self.switches, "changed_at": self.changed_at}
+            for name in ("serial", "http"):
+                recent = list(self.latency[name])
+                out[name] = {
+                    "healthy": self.health[name],
+                    "latency_ms": round(recent[-1] * 1000, 2) if recent else None,
+                    "avg_latency_ms": round(sum(recent) / len(recent) * 1000, 2) if recent else None,
+                }
+        return out
+
+    # ---------------- Internals ----------------
+    def _check_serial(self):
+        ok = bool(self.serial_check())
+        with self._lock:
+            self.health["serial"] = ok
+
+    def _probe_http(self):
+        started = time.perf_counter()
+        ok = bool(self.http_check())
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.health["http"] = ok
+            if ok:
+                self.latency["http"].append(elapsed)
+        self._next_http = time.perf_counter() + self.http_interval
+
+    def _choose(self):
+        with self._lock:
+            if self.health["serial"]:
+                choice = "serial"
+            elif self.health["http"] is not False:  # unknown counts: a failed send will report back
+                choice = "http"
+            else:
+                choice = "none"
+            previous, self.transport = self.transport, choice
+            if choice != previous:
+                self.switches += 1
+                self.changed_at = time.time()
+        if choice != previous:
+            print(f"[LinkMonitor] Transport {previous} → {choice}")
+
+    def _run(self):
+        # Paced with Event.wait (real time), so a patched time.sleep never drives this thread.
+        while True:
+            self._check_serial()
+            if not self.health["serial"] or time.perf_counter() >= self._next_http:
+                self._probe_http()
+            self._choose()
+            self._wake.wait(self.interval)
+            self._wake.clear()
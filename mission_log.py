@@ -0,0 +1,171 @@
+# mission_log.py
+# Append-only, memory-mapped mission log: every sensor sample, navigation decision, motor command
+# and task event, stamped with time.monotonic(). Samples and decisions are stored as their
+# telemetry_codec binary records; motor commands and task events as compact JSON.
+# Each process writes its own file in MISSION_DIR. Monotonic time is shared by every process on one
+# boot, so a mission's files merge by timestamp (read_logs); mission_replay.py feeds them back
+# through the navigation decision logic.
+
+import glob
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import telemetry_codec
+
+MISSION_DIR = "mission_logs"
+MISSION_MAGIC = b"BOATMSN1"
+INITIAL_CAPACITY = 1 << 20  # bytes of records; the file doubles when full
+RECORDING = True            # False: record() is a no-op
+
+# Header: magic, bytes of records written, wall and monotonic time when the file was opened, role.
+# `end` is only advanced after a record is complete, so a crash never leaves a torn record behind.
+_HEADER = struct.Struct("<8sQdd32s")
+# Record: monotonic time, kind, payload length, then the payload
+_RECORD = struct.Struct("<dBH")
+KINDS = (None, "sample", "decision", "motor", "task")
+
+# sensor_hub source name → telemetry_codec record kind
+SOURCE_KINDS = {"direction": "analyze", "ultrasonic": "distance", "compass": "heading", "gps": "location"}
+KIND_SOURCES = {kind: source for source, kind in SOURCE_KINDS.items()}
+
+class MissionLog:
+    def __init__(self, path, capacity=INITIAL_CAPACITY, role=""):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(MISSION_MAGIC, 0, time.time(), time.monotonic(), role.encode()[:32]))
+                f.truncate(_HEADER.size + capacity)
+        self._file = open(path, "r+b")
+        self._map()
+        magic, self.end, self.opened_wall, self.opened_monotonic, role = _HEADER.unpack_from(self._mm, 0)
+        if magic != MISSION_MAGIC:
+            raise ValueError(f"{path} is not a mission log")
+        self.role = role.rstrip(b"\0").decode()
+
+    def _map(self):
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = len(self._mm) - _HEADER.size
+
+    def _grow(self, needed):
+        size = self.capacity
+        while size - self.end < needed:
+            size *= 2
+        self._mm.flush()
+        self._mm.close()
+        self._file.truncate(_HEADER.size + size)
+        self._map()
+
+    def append(self, kind, payload, t=None):
+        """Append one record (`kind` from KINDS, `payload` bytes); `t` defaults to time.monotonic()."""
+        record = _RECORD.pack(time.monotonic() if t is None else t, KINDS.index(kind), len(payload)) + payload
+        with self._lock:
+            if self.capacity - self.end < len(record):
+                self._grow(len(record))
+            start = _HEADER.size + self.end
+            self._mm[start:start + len(record)] = record
+            self.end += len(record)
+            struct.pack_into("<Q", self._mm, 8, self.end)
+
+    def flush(self):
+        with self._lock:
+            self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+
+    def __iter__(self):
+        """(t, kind, raw payload) for every complete record, in append order."""
+        offset = _HEADER.size
+        stop = _HEADER.size + self.end
+        while offset < stop:
+            t, kind, length = _RECORD.unpack_from(self._mm, offset)
+            offset += _RECORD.size
+            yield t, KINDS[kind], bytes(self._mm[offset:offset + length])
+            offset += length
+
+# ---------------------------- Payloads ----------------------------
+def encode_event(kind, data):
+    if kind in ("sample", "decision"):
+        return telemetry_codec.encode(data[0], data[1])
+    return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+def decode_event(kind, payload):
+    """sample → (source, namedtuple), decision → Navigate namedtuple, motor/task → dict."""
+    if kind == "sample":
+        record = telemetry_codec.decode(payload)
+        return KIND_SOURCES[type(record).__name__.lower()], record
+    if kind == "decision":
+        return telemetry_codec.decode(payload)
+    return json.loads(payload)
+
+# ---------------------------- Process-Wide Recorder ----------------------------
+_log = None
+_log_lock = threading.Lock()
+
+def default_role():
+    name = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0]
+    return name if name and name != "-c" else "python"
+
+def start(directory=MISSION_DIR, role=None):
+    """Open a fresh log file for this process (closing the current one) and return it."""
+    global _log
+    role = role or default_role()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}_{role}_{os.getpid()}.bin")
+    with _log_lock:
+        if _log is not None:
+            _log.close()
+        _log = MissionLog(path, role=role)
+        return _log
+
+def current():
+    with _log_lock:
+        log = _log
+    return log if log is not None else start()
+
+def record(kind, data, t=None):
+    """Log one event. sample: (source, dict), decision: /navigate dict, motor/task: JSON-able dict.
+
+    Never raises: the mission log must not take a control loop down with it.
+    """
+    if not RECORDING:
+        return
+    try:
+        if kind == "sample":
+            data = (SOURCE_KINDS[data[0]], data[1] or {})
+        elif kind == "decision":
+            data = ("navigate", data)
+        current().append(kind, encode_event(kind, data), t)
+    except Exception as e:
+        print(f"[MissionLog] Could not record {kind}: {e}")
+
+def record_sample(source, value, t=None):
+    record("sample", (source, value), t)
+
+def record_decision(decision, t=None):
+    record("decision", decision, t)
+
+# ---------------------------- Reading ----------------------------
+def mission_files(directory=MISSION_DIR):
+    return sorted(glob.glob(os.path.join(directory, "*.bin")))
+
+def read_log(path):
+    """[(t, kind, decoded event)] of one file, in append order."""
+    log = MissionLog(path)
+    try:
+        return [(t, kind, decode_event(kind, payload)) for t, kind, payload in log]
+    finally:
+        log.close()
+
+def read_logs(paths):
+    """Records of several files (one per process of the same mission) merged by timestamp."""
+    return list(heapq.merge(*(read_log(path) for path in paths), key=lambda r: r[0]))
@@ -0,0 +1,104 @@
+# mission_replay.py
+# Replays a mission log (mission_log.py) through the navigation decision logic as fast as the CPU
+# allows. Before each recorded decision the sensor state is rebuilt from the logged samples, the
+# way sensor_hub would have served it then (latest sample per source, stale past its MAX_AGE), and
+# handed to navigation_core's (or navigation_server's) decision code in place of gather_sensors().
+# Replayed decisions that differ from the recorded ones are reported, so a logic change can be
+# diffed against a past mission.
+# Usage: python mission_replay.py [--target core|server] [--show N] [log.bin ...]
+#        (default: every file in mission_logs/)
+
+import argparse
+import importlib
+import time
+import mission_log
+import sensor_hub
+from occupancy_grid import OccupancyGrid
+
+class ReplayFeed:
+    """Sensor state at a point in the log, in the (sensors, status) shape of gather_sensors()."""
+
+    def __init__(self):
+        self.samples = {name: None for name in sensor_hub.SOURCES}  # name → (t, value)
+        self.now = 0.0
+
+    def add(self, t, source, record):
+        self.samples[source] = (t, record._asdict())
+
+    def read(self):
+        sensors, stale, input_times = {}, [], {}
+        for name, sample in self.samples.items():
+            if sample is None or self.now - sample[0] > sensor_hub.MAX_AGE[name]:
+                stale.append(name)
+            sensors[name] = None if name in stale else dict(sample[1])
+            input_times[name] = None if sample is None else sample[0]
+        return sensors, {"stale": stale, "timed_out": [], "input_times": input_times}
+
+def _load_target(target, feed):
+    """Point the decision module at `feed`; returns (compute_decision, restore)."""
+    if target == "core":
+        module = importlib.import_module("navigation_core")
+        patches = {"gather_sensors": feed.read, "grid": OccupancyGrid()}
+        module.grid_input["ultrasonic"] = None
+    else:
+        module = importlib.import_module("navigation_server")
+        # Camera frames are not logged: the vision fallback sees no frame, as on a dead feed
+        patches = {"gather_sensors": feed.read, "fetch_video_frame_within": lambda *args: None}
+    saved = {name: getattr(module, name) for name in patches}
+    for name, value in patches.items():
+        setattr(module, name, value)
+
+    def restore():
+        for name, value in saved.items():
+            setattr(module, name, value)
+    return module.compute_decision, restore
+
+def replay(records, target="core"):
+    """Re-run every logged decision; returns a summary with the decisions that changed."""
+    feed = ReplayFeed()
+    compute, restore = _load_target(target, feed)
+    fields = ("direction", "mode") if target == "core" else ("direction", "mode", "reason")
+    counts = {"sample": 0, "decision": 0, "motor": 0, "task": 0}
+    changed = []
+    started = time.perf_counter()
+    try:
+        for t, kind, event in records:
+            counts[kind] += 1
+            if kind == "sample":
+                feed.add(t, *event)
+            elif kind == "decision":
+                feed.now = t
+                decision, _ = compute()
+                recorded = {name: getattr(event, name) for name in fields}
+                replayed = {name: decision.get(name) for name in fields}
+                if target == "core" and recorded["mode"] is None:
+                    replayed["mode"] = None  # modes outside telemetry_codec.MODES are not logged
+                if recorded != replayed:
+                    changed.append({"t": round(t, 3), "recorded": recorded, "replayed": replayed})
+    finally:
+        restore()
+    wall = time.perf_counter() - started
+    return {"records": counts, "decisions": counts["decision"], "changed": changed,
+            "matched": counts["decision"] - len(changed), "wall_time_s": round(wall, 3)}
+
+def print_report(summary, show=20):
+    counts = summary["records"]
+    print(f"{counts['sample']} samples, {counts['decision']} decisions, {counts['motor']} motor commands, "
+          f"{counts['task']} task events replayed in {summary['wall_time_s']} s")
+    print(f"{summary['matched']}/{summary['decisions']} decisions unchanged, {len(summary['changed'])} changed")
+    for diff in summary["changed"][:show]:
+        print(f"  t={diff['t']:10.3f}  recorded {diff['recorded']}  →  replayed {diff['replayed']}")
+    if len(summary["changed"]) > show:
+        print(f"  ... {len(summary['changed']) - show} more")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a mission log through the navigation logic")
+    parser.add_argument("logs", nargs="*", help="mission log files (default: all in mission_logs/)")
+    parser.add_argument("--target", choices=("core", "server"), default="core",
+                        help="navigation_core (default) or navigation_server decision logic")
+    parser.add_argument("--show", type=int, default=20, help="changed decisions to list")
+    args = parser.parse_args()
+    paths = args.logs or mission_log.mission_files()
+    if not paths:
+        parser.error(f"no mission logs given and none in {mission_log.MISSION_DIR}/")
+    print_report(replay(mission_log.read_logs(paths), args.target), args.show)
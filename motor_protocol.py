@@ -0,0 +1,100 @@
+# motor_protocol.py
+# Sequence-numbered framing for ESP32 relay commands, shared by pondbot_motor_control and
+# pondbot_motor_async.
+#
+#   serial   "#<seq> <device> <action>[; ...]"      →  "#<seq> ACK <detail>" | "#<seq> NAK <reason>"
+#   HTTP     /relay?...&seq=<seq>, /relays?...&seq=<seq>  →  same reply text as the body
+#
+# A reply without a "#<seq>" tag comes from firmware that predates framing; it only counts as an
+# ack when it is that firmware's success text ("OK <device> <action>" per relay), as a rejection
+# when it starts with "ERR", and anything else (a web server 404 page, ...) is unacked.
+# Unacked commands (timeout or transport error) are retried a few times, but retries draw on a
+# shared budget that only successful acks refill, so a dead link cannot turn into a retry storm.
+
+import itertools
+import threading
+from collections import deque
+
+MAX_ATTEMPTS = 3            # per command, including the first send
+RETRY_BUDGET = 10.0         # retry tokens when full
+RETRY_REFILL = 0.1          # tokens returned per acked command
+HISTOGRAM_WINDOW = 1000     # latest round trips kept per transport
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+
+_seq = itertools.count(1)
+_seq_lock = threading.Lock()
+
+def next_seq():
+    with _seq_lock:
+        return (next(_seq) - 1) % 999_999 + 1  # 1..999999, wrapping
+
+def frame(seq, payload):
+    return f"#{seq} {payload}"
+
+def parse_reply(text, seq=None):
+    """(seq, acked, detail) for a framed reply (None if it is not one, or answers another seq)."""
+    parts = text.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("#") or not parts[0][1:].isdigit():
+        return None
+    reply_seq = int(parts[0][1:])
+    if seq is not None and reply_seq != seq or parts[1] not in ("ACK", "NAK"):
+        return None
+    return reply_seq, parts[1] == "ACK", parts[2] if len(parts) > 2 else ""
+
+def legacy_reply(text):
+    """True (ack) / False (rejected) for an untagged reply from pre-framing firmware, else None."""
+    parts = [part.strip() for part in text.split(";")]
+    if parts and all(part.startswith("OK ") for part in parts):
+        return True
+    if text.startswith("ERR"):
+        return False
+    return None
+
+class RetryBudget:
+    def __init__(self, tokens=RETRY_BUDGET, refill=RETRY_REFILL):
+        self.capacity = self.tokens = tokens
+        self.refill = refill
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def success(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.refill)
+
+class LatencyHistogram:
+    """Rolling round-trip latencies per transport, split out for STOP commands."""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.window = window
+        self._samples = {}  # transport → deque of (ms, is_stop)
+        self._lock = threading.Lock()
+
+    def add(self, transport, seconds, is_stop=False):
+        with self._lock:
+            self._samples.setdefault(transport, deque(maxlen=self.window)).append((seconds * 1000, is_stop))
+
+    @staticmethod
+    def _summary(values):
+        if not values:
+            return None
+        values = sorted(values)
+        counts = [0] * (len(BUCKETS_MS) + 1)
+        for v in values:
+            counts[next((i for i, edge in enumerate(BUCKETS_MS) if v <= edge), len(BUCKETS_MS))] += 1
+        labels = [f"<={edge}" for edge in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+        pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 2)
+        return {"n": len(values), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99),
+                "max": round(values[-1], 2), "buckets_ms": dict(zip(labels, counts))}
+
+    def snapshot(self):
+        with self._lock:
+            samples = {t: list(d) for t, d in self._samples.items()}
+        return {t: {"all": self._summary([ms for ms, _ in s]),
+                    "stop": self._summary([ms for ms, stop in s if stop])}
+                for t, s in samples.items()}
@@ -0,0 +1,141 @@
+# motor_scheduler.py
+# One thread and one heap for every timed motor action (the "stop" at the end of a non-blocking
+# run_device, ...). Actions are keyed by device: scheduling for a device, or sending it a direct
+# command, supersedes whatever was still pending for it, so an old stop can never override a newer
+# command. Deadlines are on time.monotonic(), so they follow a simulated clock when one is installed.
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+MAX_WAIT = 0.05      # re-read the clock at least this often (a simulated clock may run faster than wall time)
+LATENESS_WINDOW = 512
+
+class _Job:
+    __slots__ = ("id", "devices", "deadline", "fn", "args", "label", "cancelled")
+
+    def __init__(self, job_id, devices, deadline, fn, args, label):
+        self.id, self.devices, self.deadline = job_id, devices, deadline
+        self.fn, self.args, self.label = fn, args, label
+        self.cancelled = False
+
+class MotorScheduler:
+    def __init__(self):
+        self._heap = []                # (deadline, id, job); cancelled jobs are dropped when popped
+        self._jobs = {}                # id → pending job
+        self._by_device = {}           # device → {ids}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread = None
+        self.counters = {"scheduled": 0, "fired": 0, "cancelled": 0, "superseded": 0, "errors": 0}
+        self._lateness = deque(maxlen=LATENESS_WINDOW)
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="motor-scheduler")
+                self._thread.start()
+        return self
+
+    # ---------------- API ----------------
+    def schedule(self, devices, delay, fn, *args, label=None, supersede=True):
+        """Call fn(*args) `delay` seconds from now; returns the job id.
+
+        `devices` is a device name or a tuple of them. With `supersede`, pending jobs for any of
+        those devices are cancelled first.
+        """
+        self.start()
+        devices = (devices,) if isinstance(devices, str) else tuple(devices)
+        with self._cond:
+            if supersede:
+                self._cancel_devices(devices, "superseded")
+            job = _Job(next(self._ids), devices, time.monotonic() + max(0.0, delay), fn, args, label)
+            self._jobs[job.id] = job
+            for device in devices:
+                self._by_device.setdefault(device, set()).add(job.id)
+            heapq.heappush(self._heap, (job.deadline, job.id, job))
+            self.counters["scheduled"] += 1
+            self._cond.notify()
+        return job.id
+
+    def cancel(self, job_id):
+        """Cancel one pending job; False if it already ran or never existed."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            self._forget(job, "cancelled")
+            return True
+
+    def cancel_device(self, device, reason="cancelled"):
+        """Cancel everything pending for `device`; returns how many jobs were dropped."""
+        with self._cond:
+            if device not in self._by_device:  # fast path: every direct motor command comes through here
+                return 0
+            return self._cancel_devices((device,), reason)
+
+    def pending(self, device=None):
+        """Pending jobs (soonest first), optionally only those touching `device`."""
+        now = time.monotonic()
+        with self._cond:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.deadline)
+        return [{"id": j.id, "devices": list(j.devices), "label": j.label, "due_in": round(j.deadline - now, 3)}
+                for j in jobs if device is None or device in j.devices]
+
+    def stats(self):
+        with self._cond:
+            late = sorted(self._lateness)
+            out = dict(self.counters, pending=len(self._jobs))
+        if late:
+            pick = lambda q: round(late[min(len(late) - 1, int(q * len(late)))] * 1000, 3)
+            out["lateness_ms"] = {"p50": pick(0.5), "p99": pick(0.99), "max": round(late[-1] * 1000, 3)}
+        else:
+            out["lateness_ms"] = None
+        return out
+
+    # ---------------- Internals (caller holds the lock) ----------------
+    def _forget(self, job, reason):
+        job.cancelled = True
+        del self._jobs[job.id]
+        for device in job.devices:
+            ids = self._by_device.get(device)
+            if ids is not None:
+                ids.discard(job.id)
+                if not ids:
+                    del self._by_device[device]
+        self.counters[reason] += 1
+
+    def _cancel_devices(self, devices, reason):
+        ids = set()
+        for device in devices:
+            ids |= self._by_device.get(device, set())
+        for job_id in ids:
+            self._forget(self._jobs[job_id], reason)
+        if len(self._heap) > 64 and len(self._heap) > 4 * len(self._jobs):
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+        return len(ids)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                remaining = self._heap[0][0] - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(min(remaining, MAX_WAIT))
+                    continue
+                _, _, job = heapq.heappop(self._heap)
+                self._forget(job, "fired")
+                self._lateness.append(-remaining)
+            try:
+                job.fn(*job.args)  # outside the lock: it may schedule or cancel in turn
+            except Exception as e:
+                with self._cond:
+                    self.counters["errors"] += 1
+                print(f"[MotorScheduler] Job {job.id} ({job.label}) failed: {e}")
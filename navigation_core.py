@@ -1,10 +1,16 @@
 # navigation_core.py
 # RESTful navigation decision module
 
-import requests
 import time
 import threading
-from flask import Flask, jsonify
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import Flask, jsonify, request
+import http_client
+import sensor_hub
+from occupancy_grid import OccupancyGrid
+from geofence import load_geofence
+from decision_loop import DecisionLoop, DECISION_RATE_HZ
+from telemetry_codec import respond, ULTRASONIC_KEYS
 
 app = Flask(__name__)
 PORT = 8008
@@ -15,6 +21,10 @@ SAFE_SIDE = 80
 SAFE_BACK = 100
 SAFE_BIN = 20
 
+# Sensor queries run concurrently; anything slower than this (s) is treated as missing
+SENSOR_DEADLINE = 0.15
+executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="nav-fetch")
+
 # REST endpoints
 ENDPOINTS = {
     "direction": "http://localhost:8002/analyze",
@@ -23,6 +33,13 @@ ENDPOINTS = {
     "gps": "http://localhost:8006/location"
 }
 
+# Local obstacle memory; only fed a sweep whose sample time changed since the last update
+grid = OccupancyGrid()
+grid_input = {"ultrasonic": None}
+
+# Pond boundary (None when no boundary file is configured)
+pond_fence = load_geofence()
+
 navigation_state = {
     "direction": "FORWARD",
     "mode": "sensor",  # 'sensor' or 'vision_only'
@@ -31,25 +48,67 @@ navigation_state = {
 }
 
 # ----------------- Sensor Fetch -----------------
-def fetch_json(url):
+def fetch_json(url, timeout=1.5):
     try:
-        r = requests.get(url, timeout=1.5)
+        r = http_client.get(url, "sensor", timeout=timeout)
         if r.status_code == 200:
             return r.json()
     except:
         return None
 
+# Query every endpoint concurrently under one deadline → ({name: data}, [timed-out names])
+def fetch_all(deadline=SENSOR_DEADLINE):
+    if deadline <= 0:
+        return {name: None for name in ENDPOINTS}, list(ENDPOINTS)
+    futures = {executor.submit(fetch_json, url, deadline): name for name, url in ENDPOINTS.items()}
+    done, pending = wait(futures, timeout=deadline)
+    results = {name: None for name in ENDPOINTS}
+    for future in done:
+        results[futures[future]] = future.result()
+    return results, [futures[future] for future in pending]
+
+# One snapshot from the sensor hub (stale sources count as missing);
+# REST endpoints are polled directly only if the hub is not running; both share one SENSOR_DEADLINE.
+# Returns ({name: data}, {"stale", "timed_out", "input_times"})
+def gather_sensors():
+    deadline = time.monotonic() + SENSOR_DEADLINE
+    state = sensor_hub.read_state(timeout=SENSOR_DEADLINE)
+    if state is None:
+        sensors, timed_out = fetch_all(deadline - time.monotonic())
+        now = round(time.time(), 3)
+        input_times = {name: None if sensors[name] is None else now for name in ENDPOINTS}
+        return sensors, {"stale": [], "timed_out": timed_out, "input_times": input_times}
+    stale = [name for name in ENDPOINTS if state["stale"][name]]
+    input_times = {name: None if state["age"][name] is None
+                   else round(state["timestamp"] - state["age"][name], 3) for name in ENDPOINTS}
+    sensors = {name: None if name in stale else state[name] for name in ENDPOINTS}
+    return sensors, {"stale": stale, "timed_out": [], "input_times": input_times}
+
+# ----------------- Obstacle Memory -----------------
+# Feed the grid from this tick's readings (no-echo readings are free out to the sensor range,
+# failed ones are skipped) → {sector bearing relative to bow: clearance cm}
+def update_grid(us, compass, gps, input_time):
+    if compass is None or compass.get("heading") is None:
+        return None
+    lat, lon = (gps.get("lat"), gps.get("lon")) if gps else (None, None)
+    grid.update_pose(lat, lon, compass["heading"])
+    if us is not None and input_time != grid_input["ultrasonic"]:
+        grid.integrate(us)
+        grid_input["ultrasonic"] = input_time
+    return {sector: round(m * 100) for sector, m in grid.sector_clearance().items()}
+
 # ----------------- Navigation Logic -----------------
 def decide_direction():
     global navigation_state
     
-    us = fetch_json(ENDPOINTS["ultrasonic"])
-    direction_data = fetch_json(ENDPOINTS["direction"])
-    compass = fetch_json(ENDPOINTS["compass"])
-    gps = fetch_json(ENDPOINTS["gps"])
-
-    # Fail flags
-    sensor_fail = us is None or any(us[k] is None for k in us)
+    sensors, status = gather_sensors()
+    us = sensors["ultrasonic"]
+    direction_data = sensors["direction"]
+    compass = sensors["compass"]
+    gps = sensors["gps"]
+
+    # Fail flags; "no echo" arrives as telemetry_codec.NO_ECHO_CM, so a None distance is a failed sensor
+    sensor_fail = us is None or any(us.get(key) is None for key in ULTRASONIC_KEYS)
     compass_fail = compass is None or compass.get("heading") is None
     gps_fail = gps is None or gps.get("lat") is None
 
@@ -57,13 +116,24 @@ def decide_direction():
     navigation_state["sensors"] = {
         "ultrasonic": us,
         "compass": compass,
-        "gps": gps
+        "gps": gps,
+        "geofence": None if pond_fence is None or gps_fail else pond_fence.status(gps["lat"], gps["lon"])
     }
+    navigation_state["stale"] = status["stale"]
+    navigation_state["timed_out"] = status["timed_out"]
+    navigation_state["input_times"] = status["input_times"]
+    clearance = update_grid(us, compass, gps, status["input_times"]["ultrasonic"])
+    navigation_state["clearance"] = clearance
 
-    # If sensor failure → fallback to vision-only
+    # Default to waste-based direction
+    dir_from_cam = direction_data.get("direction", "FORWARD") if direction_data else "FORWARD"
+
+    # If the ultrasonic ring is missing or broken → vision-only, still steering off obstacles the grid remembers
     if sensor_fail:
         navigation_state["mode"] = "vision_only"
-        direction = direction_data.get("direction", "FORWARD") if direction_data else "FORWARD"
+        direction = dir_from_cam
+        if direction == "FORWARD" and clearance is not None and clearance[0] < SAFE_FRONT:
+            direction = sector_direction(grid.clearest_sector())
         navigation_state["direction"] = direction
         return direction
 
@@ -71,22 +141,24 @@ def decide_direction():
     navigation_state["mode"] = "sensor"
 
     # Obstacle logic
-    front = us.get("front", 0)
-    left = us.get("left", 0)
-    right = us.get("right", 0)
-    back = us.get("back", 0)
+    front = us["front"]
+    left = us["left"]
+    right = us["right"]
+    back = us["back"]
 
-    # Default to waste-based direction
-    dir_from_cam = direction_data.get("direction", "FORWARD") if direction_data else "FORWARD"
+    # Obstacles remembered by the grid block the bow and pick the turn side
+    front_clear = front >= SAFE_FRONT and (clearance is None or clearance[0] >= SAFE_FRONT)
 
-    if front >= SAFE_FRONT:
+    if front_clear:
         direction = dir_from_cam
     elif left >= SAFE_SIDE and right < SAFE_SIDE:
         direction = "LEFT"
     elif right >= SAFE_SIDE and left < SAFE_SIDE:
         direction = "RIGHT"
     elif left >= SAFE_SIDE and right >= SAFE_SIDE:
-        direction = "LEFT"  # Prefer left on tie
+        # Turn towards the side with the most remembered room (left on a tie)
+        best = 0 if clearance is None else grid.clearest_sector(preferred=-90)
+        direction = "RIGHT" if 0 < best < 180 else "LEFT"
     elif back >= SAFE_BACK:
         direction = "BACK"
     else:
@@ -95,22 +167,50 @@ def decide_direction():
     navigation_state["direction"] = direction
     return direction
 
-# ----------------- API -----------------
-@app.route("/navigate")
-def navigate():
+def sector_direction(sector):
+    """Motion towards a grid sector (bearing relative to the bow)."""
+    if sector == 0:
+        return "FORWARD"
+    if sector == 180:
+        return "BACK"
+    return "RIGHT" if sector > 0 else "LEFT"
+
+# ----------------- Decision Loop -----------------
+def compute_decision():
     direction = decide_direction()
     navigation_state["timestamp"] = time.time()
-    return jsonify({
+    return {
         "direction": direction,
         "mode": navigation_state["mode"],
-        "safe": direction != "STOP"
-    })
+        "safe": direction != "STOP",
+        "geofence": navigation_state["sensors"]["geofence"]
+    }, navigation_state["input_times"]
+
+decision_loop = DecisionLoop(compute_decision, DECISION_RATE_HZ)
+
+# ----------------- API -----------------
+# /navigate → cached decision; /navigate?after=<seq> → long-poll for the next one
+@app.route("/navigate")
+def navigate():
+    after = request.args.get("after", type=int)
+    if after is not None:
+        decision = decision_loop.wait_after(after, request.args.get("timeout", default=5.0, type=float))
+    else:
+        decision = decision_loop.latest() or decision_loop.wait_after(0, 1.0)
+    if decision is None:
+        return jsonify({"error": "No decision computed yet"}), 503
+    return respond("navigate", decision)
 
 @app.route("/ping")
 def ping():
     return "Navigation core online"
 
+@app.route("/http_stats")
+def get_http_stats():
+    return jsonify(http_client.stats())
+
 # ----------------- Main -----------------
 if __name__ == "__main__":
     print(f"🚀 Navigation Core running on http://<ip>:8008/navigate")
+    decision_loop.start()
     app.run(host="0.0.0.0", port=PORT, threaded=True)
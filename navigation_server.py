@@ -2,11 +2,18 @@
 # RESTful navigation decision system for autonomous pond boat
 # Gathers sensor and vision data, computes optimal movement direction
 
-import requests
 import cv2
 import numpy as np
-from flask import Flask, jsonify, Response
+from flask import Flask, jsonify, Response, request
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+import http_client
+import sensor_hub
+from geofence import load_geofence
+from decision_loop import DecisionLoop, DECISION_RATE_HZ
+from telemetry_codec import respond
 
 app = Flask(__name__)
 
@@ -17,17 +24,68 @@ ULTRASONIC_URL = "http://localhost:8004/distance"
 COMPASS_URL = "http://localhost:8005/heading"
 GPS_URL = "http://localhost:8006/location"
 
+# Direct endpoints, used only when the sensor hub is not running
+SENSOR_URLS = {
+    "direction": WASTE_DIRECTION_URL,
+    "ultrasonic": ULTRASONIC_URL,
+    "compass": COMPASS_URL,
+    "gps": GPS_URL,
+}
+
 SAFE_DISTANCE_CM = 100   # Boat is 1.5m wide, 2.5m long
 BOAT_PORT = 8008
 
+# Decision deadlines (s): the hub read plus, if the hub is down, the concurrent sensor queries share
+# SENSOR_DEADLINE, and whatever has not answered by then is treated as missing; the vision
+# fallback frame gets FRAME_DEADLINE
+SENSOR_DEADLINE = 0.15
+FRAME_DEADLINE = 0.5
+FRAME_MAX_AGE = 0.5      # seconds; an older buffered frame is not used for the fallback
+RECONNECT_DELAY = 1.0
+executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="nav-fetch")
+
+# Pond boundary (None when no boundary file is configured)
+pond_fence = load_geofence()
+
 # ---------------------------- Helper Functions ----------------------------
 def fetch_json(url, timeout=1.5):
     try:
-        res = requests.get(url, timeout=timeout)
+        res = http_client.get(url, "sensor", timeout=timeout)
         return res.json()
     except:
         return None
 
+def fetch_all(urls, deadline=SENSOR_DEADLINE):
+    """Query every url concurrently; returns ({name: data}, [names that missed the deadline])."""
+    if deadline <= 0:
+        return {name: None for name in urls}, list(urls)
+    futures = {executor.submit(fetch_json, url, deadline): name for name, url in urls.items()}
+    done, pending = wait(futures, timeout=deadline)
+    results = {name: None for name in urls}
+    for future in done:
+        results[futures[future]] = future.result()
+    return results, [futures[future] for future in pending]
+
+def gather_sensors():
+    """Return ({source: data}, status) for one decision.
+
+    Reads one snapshot from the sensor hub, where a stale source counts as missing;
+    falls back to polling each host concurrently if the hub is not running. Both share one
+    SENSOR_DEADLINE. `status` lists stale and timed-out sources and the time each input was sampled.
+    """
+    deadline = time.monotonic() + SENSOR_DEADLINE
+    state = sensor_hub.read_state(timeout=SENSOR_DEADLINE)
+    if state is None:
+        sensors, timed_out = fetch_all(SENSOR_URLS, deadline - time.monotonic())
+        now = round(time.time(), 3)
+        input_times = {name: None if sensors[name] is None else now for name in SENSOR_URLS}
+        return sensors, {"stale": [], "timed_out": timed_out, "input_times": input_times}
+    stale = [name for name in SENSOR_URLS if state["stale"][name]]
+    input_times = {name: None if state["age"][name] is None
+                   else round(state["timestamp"] - state["age"][name], 3) for name in SENSOR_URLS}
+    sensors = {name: None if name in stale else state[name] for name in SENSOR_URLS}
+    return sensors, {"stale": stale, "timed_out": [], "input_times": input_times}
+
 def is_ultrasonic_safe(distances):
     if not distances:
         return False
@@ -36,21 +94,57 @@ def is_ultrasonic_safe(distances):
             return False
     return True
 
-def fetch_video_frame():
-    try:
-        stream = requests.get(VIDEO_FEED_URL, stream=True, timeout=3)
-        byte_data = bytes()
-        for chunk in stream.iter_content(chunk_size=1024):
-            byte_data += chunk
-            a = byte_data.find(b'\xff\xd8')
-            b = byte_data.find(b'\xff\xd9')
-            if a != -1 and b != -1:
-                jpg = byte_data[a:b+2]
-                byte_data = byte_data[b+2:]
-                frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
-                return frame
-    except:
-        return None
+class FrameReader:
+    """One long-lived /video_feed connection holding the latest JPEG.
+
+    The vision fallback decodes the buffered frame instead of opening a new stream per decision,
+    so a stalled camera costs one waiting reader thread, not a pile of fetches in the executor.
+    Started on first use.
+    """
+
+    def __init__(self, url=VIDEO_FEED_URL):
+        self.url = url
+        self._cond = threading.Condition()
+        self._jpg = None
+        self._received = None  # time.monotonic() of the buffered frame
+        self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                with http_client.get(self.url, "stream", stream=True, timeout=3) as stream:
+                    byte_data = bytes()
+                    for chunk in stream.iter_content(chunk_size=4096):
+                        byte_data += chunk
+                        a = byte_data.find(b'\xff\xd8')
+                        b = byte_data.find(b'\xff\xd9', a + 2) if a != -1 else -1
+                        if a != -1 and b != -1:
+                            with self._cond:
+                                self._jpg, self._received = byte_data[a:b+2], time.monotonic()
+                                self._cond.notify_all()
+                            byte_data = byte_data[b+2:]
+            except requests.RequestException as e:
+                print(f"[Navigation] Video feed error: {e}")
+            time.sleep(RECONNECT_DELAY)
+
+    def _fresh(self):
+        return self._jpg is not None and time.monotonic() - self._received <= FRAME_MAX_AGE
+
+    def frame(self, deadline=FRAME_DEADLINE):
+        """Latest decoded frame, waiting up to `deadline` s for a fresh one; None if there is none."""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="nav-frames")
+                self._thread.start()
+            if not self._cond.wait_for(self._fresh, deadline):
+                return None
+            jpg = self._jpg
+        return cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+frame_reader = FrameReader()
+
+def fetch_video_frame_within(deadline=FRAME_DEADLINE):
+    return frame_reader.frame(deadline)
 
 # ---------------------------- Vision Fallback ----------------------------
 def fallback_camera_direction(frame):
@@ -81,9 +175,9 @@ def fallback_camera_direction(frame):
     reason = "Visual fallback used to navigate around obstacles"
     return direction, confidence, reason
 
-# ---------------------------- Main Navigation Endpoint ----------------------------
-@app.route("/navigate", methods=["GET"])
-def navigate():
+# ---------------------------- Decision Logic ----------------------------
+def compute_decision():
+    """One navigation decision from fresh sensor data → (result, input sample times)."""
     result = {
         "direction": "STOP",
         "mode": "normal",
@@ -96,28 +190,38 @@ def navigate():
         }
     }
 
-    # Fetch direction from waste detector
-    waste_data = fetch_json(WASTE_DIRECTION_URL)
+    sensors, status = gather_sensors()
+    result["stale_sources"] = status["stale"]
+    result["sensor_status"]["timed_out"] = status["timed_out"]
+
+    # Direction from waste detector
+    waste_data = sensors["direction"]
     direction = waste_data.get("direction") if waste_data else None
 
-    # Fetch ultrasonic data
-    distances = fetch_json(ULTRASONIC_URL)
+    # Ultrasonic data
+    distances = sensors["ultrasonic"]
     ultrasonic_ok = is_ultrasonic_safe(distances)
     result["sensor_status"]["ultrasonic"] = ultrasonic_ok
 
-    # Fetch compass heading
-    compass = fetch_json(COMPASS_URL)
+    # Compass heading
+    compass = sensors["compass"]
     compass_ok = compass is not None and compass.get("heading") is not None
     result["sensor_status"]["compass"] = compass_ok
 
-    # Fetch GPS location
-    gps = fetch_json(GPS_URL)
+    # GPS location
+    gps = sensors["gps"]
     gps_ok = gps is not None and gps.get("lat") and gps.get("lon")
     result["sensor_status"]["gps"] = gps_ok
 
+    # Geofence: inside flag, distance and bearing to the nearest pond edge
+    if pond_fence is not None and gps_ok:
+        result["sensor_status"]["geofence"] = pond_fence.status(gps["lat"], gps["lon"])
+    else:
+        result["sensor_status"]["geofence"] = None
+
     # Fail-safe logic
     if not ultrasonic_ok or not compass_ok or not gps_ok:
-        frame = fetch_video_frame()
+        frame = fetch_video_frame_within()
         fallback_dir, conf, reason = fallback_camera_direction(frame)
         result.update({
             "direction": fallback_dir,
@@ -125,7 +229,7 @@ def navigate():
             "confidence": conf,
             "reason": reason
         })
-        return jsonify(result)
+        return result, status["input_times"]
 
     # All sensors OK → Use waste direction
     if direction:
@@ -141,14 +245,36 @@ def navigate():
             "reason": "Waste detection unavailable, assuming FORWARD"
         })
 
-    return jsonify(result)
+    return result, status["input_times"]
+
+decision_loop = DecisionLoop(compute_decision, DECISION_RATE_HZ)
+
+# ---------------------------- Main Navigation Endpoint ----------------------------
+# GET /navigate → latest decision from the background loop, returned immediately
+# GET /navigate?after=<seq> → waits (up to a few seconds) for the first decision newer than <seq>
+@app.route("/navigate", methods=["GET"])
+def navigate():
+    after = request.args.get("after", type=int)
+    if after is not None:
+        decision = decision_loop.wait_after(after, request.args.get("timeout", default=5.0, type=float))
+    else:
+        decision = decision_loop.latest() or decision_loop.wait_after(0, 1.0)
+    if decision is None:
+        return jsonify({"error": "No decision computed yet"}), 503
+    return respond("navigate", decision)
 
 # ---------------------------- Health Check ----------------------------
 @app.route("/ping")
 def ping():
     return "Navigation system online"
 
+# GET /http_stats → pooled HTTP requests vs new TCP connections per service
+@app.route("/http_stats")
+def get_http_stats():
+    return jsonify(http_client.stats())
+
 # ---------------------------- Server Launch ----------------------------
 if __name__ == "__main__":
     print(f"🚀 Navigation server running at http://0.0.0.0:{BOAT_PORT}/navigate")
+    decision_loop.start()
     app.run(host="0.0.0.0", port=BOAT_PORT, threaded=True)
@@ -0,0 +1,145 @@
+# occupancy_grid.py
+# Boat-centred log-odds occupancy grid built from the ultrasonic ring, compass heading and GPS.
+# The grid stays north-up and scrolls by whole cells as GPS shows the boat moving; each sensor
+# beam is rotated by the compass heading and ray-cast into it in one vectorized update.
+# navigation_core queries per-sector clearance so obstacles are remembered after turning away.
+
+import math
+import numpy as np
+
+CELL_SIZE_M = 0.25
+GRID_CELLS = 121             # cells per side (~30 m square), boat in the centre cell
+MAX_RANGE_M = 4.0            # HC-SR04 range; a reading at or past it means no echo within it
+BEAM_HALF_WIDTH_DEG = 7.5    # ~15° sensor cone
+RAYS_PER_BEAM = 5
+
+# Log-odds increments and limits
+L_OCC = 0.85
+L_FREE = -0.4
+L_MIN, L_MAX = -4.0, 4.0
+OCCUPIED_THRESHOLD = 0.6
+
+# Sensor bearings relative to the bow, clockwise in degrees
+SENSOR_BEARINGS = {"front": 0.0, "right": 90.0, "back": 180.0, "left": -90.0}
+
+# Heading sectors (relative to the bow) reported by sector_clearance()
+SECTORS = (-135, -90, -45, 0, 45, 90, 135, 180)
+SECTOR_HALF_WIDTH_DEG = 22.5
+EARTH_RADIUS_M = 6371000.0
+
+class OccupancyGrid:
+    def __init__(self, cells=GRID_CELLS, cell_size=CELL_SIZE_M):
+        self.cells = cells
+        self.cell_size = cell_size
+        self.centre = cells // 2
+        self.log_odds = np.zeros((cells, cells), dtype=np.float32)  # [row = north index, col = east index]
+        self.heading = None
+        self._origin = None       # (lat, lon) of the grid centre
+        self._offset = np.zeros(2)  # boat position (east, north) in metres relative to the centre cell
+
+        step = cell_size / 2
+        self._ranges = np.arange(step, MAX_RANGE_M + step, step, dtype=np.float32)
+        self._beam_spread = np.radians(np.linspace(-BEAM_HALF_WIDTH_DEG, BEAM_HALF_WIDTH_DEG, RAYS_PER_BEAM))
+        sector_rays = np.radians(np.linspace(-SECTOR_HALF_WIDTH_DEG, SECTOR_HALF_WIDTH_DEG, 7))
+        self._sector_angles = (np.radians(SECTORS)[:, None] + sector_rays[None, :]).ravel()
+
+    # ---------------- Pose ----------------
+    def update_pose(self, lat=None, lon=None, heading=None):
+        """Record the compass heading and scroll the grid by the GPS displacement since the last call."""
+        if heading is not None:
+            self.heading = heading
+        if lat is None or lon is None:
+            return
+        if self._origin is None:
+            self._origin = (lat, lon)
+            return
+        lat0, lon0 = self._origin
+        north = math.radians(lat - lat0) * EARTH_RADIUS_M
+        east = math.radians(lon - lon0) * EARTH_RADIUS_M * math.cos(math.radians(lat0))
+        shift = np.floor((np.array([east, north]) + self.cell_size / 2) / self.cell_size).astype(int)
+        if shift.any():
+            self._scroll(shift)
+            # Move the grid origin by exactly the whole cells scrolled, keeping the remainder
+            north_cells, east_cells = shift[1] * self.cell_size, shift[0] * self.cell_size
+            lat0 += math.degrees(north_cells / EARTH_RADIUS_M)
+            lon0 += math.degrees(east_cells / (EARTH_RADIUS_M * math.cos(math.radians(lat0))))
+            self._origin = (lat0, lon0)
+            north -= north_cells
+            east -= east_cells
+        self._offset = np.array([east, north])
+
+    def _scroll(self, shift):
+        """Shift contents by (east, north) whole cells; cells entering the grid are unknown (0)."""
+        de, dn = int(shift[0]), int(shift[1])
+        n = self.cells
+        if abs(de) >= n or abs(dn) >= n:
+            self.log_odds.fill(0)
+            return
+        self.log_odds = np.roll(self.log_odds, (-dn, -de), axis=(0, 1))
+        if dn > 0:
+            self.log_odds[n - dn:, :] = 0
+        elif dn < 0:
+            self.log_odds[:-dn, :] = 0
+        if de > 0:
+            self.log_odds[:, n - de:] = 0
+        elif de < 0:
+            self.log_odds[:, :-de] = 0
+
+    def _cells(self, angles, ranges):
+        """Grid (row, col) for points at compass bearings `angles` (rad) and `ranges` (m) from the boat."""
+        east = self._offset[0] + ranges * np.sin(angles)
+        north = self._offset[1] + ranges * np.cos(angles)
+        col = np.rint(east / self.cell_size).astype(np.int32) + self.centre
+        row = np.rint(north / self.cell_size).astype(np.int32) + self.centre
+        return row, col
+
+    # ---------------- Sensor Update ----------------
+    def integrate(self, distances_cm):
+        """Ray-cast one ultrasonic sweep ({sensor: cm or None}) into the grid; failed (None) beams are skipped."""
+        if self.heading is None:
+            return
+        names = [name for name in SENSOR_BEARINGS if distances_cm.get(name) is not None]
+        if not names:
+            return
+        bearings = np.radians([self.heading + SENSOR_BEARINGS[name] for name in names])
+        dist = np.minimum(np.array([distances_cm[name] / 100.0 for name in names], dtype=np.float32),
+                          MAX_RANGE_M)
+        hit = dist < MAX_RANGE_M
+
+        # (beams × rays) angles, broadcast against sample ranges → (beams × rays × samples)
+        angles = (bearings[:, None] + self._beam_spread[None, :])[:, :, None]
+        ranges = self._ranges[None, None, :]
+        d = dist[:, None, None]
+        step = self._ranges[1] - self._ranges[0]
+        free = ranges < d - self.cell_size / 2
+        occupied = (np.abs(ranges - d) <= step / 2) & hit[:, None, None]
+
+        row, col = self._cells(angles, ranges)
+        inside = (row >= 0) & (row < self.cells) & (col >= 0) & (col < self.cells)
+        flat = row * self.cells + col
+        occ_idx = np.unique(flat[occupied & inside])
+        free_idx = np.setdiff1d(flat[free & inside], occ_idx)
+
+        grid = self.log_odds.reshape(-1)
+        grid[free_idx] += L_FREE
+        grid[occ_idx] += L_OCC
+        np.clip(self.log_odds, L_MIN, L_MAX, out=self.log_odds)
+
+    # ---------------- Queries ----------------
+    def sector_clearance(self):
+        """Free distance (m) before the first occupied cell, per sector in SECTORS (relative to the bow)."""
+        heading = 0.0 if self.heading is None else self.heading
+        angles = np.radians(heading) + self._sector_angles
+        row, col = self._cells(angles[:, None], self._ranges[None, :])
+        inside = (row >= 0) & (row < self.cells) & (col >= 0) & (col < self.cells)
+        occupied = np.zeros(row.shape, dtype=bool)
+        occupied[inside] = self.log_odds[row[inside], col[inside]] > OCCUPIED_THRESHOLD
+        first = np.where(occupied.any(axis=1), occupied.argmax(axis=1), len(self._ranges))
+        free_dist = np.append(self._ranges, MAX_RANGE_M)[first]
+        per_sector = free_dist.reshape(len(SECTORS), -1).min(axis=1)
+        return {sector: round(float(d), 2) for sector, d in zip(SECTORS, per_sector)}
+
+    def clearest_sector(self, preferred=0):
+        """Relative bearing of the sector with the most clearance, ties broken towards `preferred`."""
+        clearance = self.sector_clearance()
+        return max(SECTORS, key=lambda s: (clearance[s], -abs(((s - preferred) + 180) % 360 - 180)))
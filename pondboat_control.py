@@ -10,13 +10,18 @@ import os
 import socket
 import time
 
+import threading
+
 import requests
-import serial
+
+import http_client
+from link_monitor import LinkMonitor
+from serial_link import SerialLink
 
 # —— Configuration ——
 SERIAL_PORT    = "/dev/ttyUSB0"
 BAUDRATE       = 115200
-SERIAL_TIMEOUT = 2       # seconds
+SERIAL_TIMEOUT = 0.3     # seconds to wait for the reply line
 ESP_LAST_OCTET = 35
 HTTP_TIMEOUT   = 2       # seconds
 RETRY_DELAY    = 2       # seconds between retries
@@ -39,29 +44,34 @@ def get_esp_ip() -> str:
     parts[-1] = str(ESP_LAST_OCTET)
     return '.'.join(parts)
 
-ESP_IP = get_esp_ip()
+ESP_IP = None   # resolved on first HTTP use
+
+def esp_ip() -> str:
+    """ESP32 address, discovered once and cached."""
+    global ESP_IP
+    if ESP_IP is None:
+        ESP_IP = get_esp_ip()
+    return ESP_IP
 
 # —— Connectivity Checks ——
 def is_serial_connected() -> bool:
-    """Return True if serial port exists."""
-    return os.path.exists(SERIAL_PORT)
+    """Return True if serial port exists and the link has not failed since it was opened."""
+    return os.path.exists(SERIAL_PORT) and get_serial_link().healthy
 
 def ping_http() -> bool:
     """Return True if ESP is reachable via HTTP."""
     try:
         # simple GET to base URL
-        r = requests.get(f"http://{ESP_IP}", timeout=HTTP_TIMEOUT)
+        r = http_client.get(f"http://{esp_ip()}", "probe", timeout=HTTP_TIMEOUT)
         return r.status_code == 200 or r.status_code == 404
     except requests.RequestException:
         return False
 
+link_monitor = LinkMonitor(is_serial_connected, ping_http)
+
 def get_connection_method() -> str:
-    """Determine current connection method: 'serial', 'http', or 'none'."""
-    if is_serial_connected():
-        return 'serial'
-    if ping_http():
-        return 'http'
-    return 'none'
+    """Cached connection method from the background monitor: 'serial', 'http', or 'none'."""
+    return link_monitor.current()
 
 def wait_for_connection(retry_delay: float = RETRY_DELAY) -> str:
     """Block until ESP32 is connected via serial or HTTP, retrying as needed.
@@ -69,40 +79,59 @@ def wait_for_connection(retry_delay: float = RETRY_DELAY) -> str:
     """
     while True:
         method = get_connection_method()
-        if method in ('serial', 'http'):
+        if method in ('serial', 'http') and link_monitor.health[method]:
             print(f"[Info] Connected to ESP32 via {method.upper()}")
             return method
         print(f"[Warning] No connection to ESP32; retrying in {retry_delay}s...")
         time.sleep(retry_delay)
 
 # —— Low-Level Send ——
+_serial_link = None
+_serial_link_lock = threading.Lock()
+
+def get_serial_link() -> SerialLink:
+    """Long-lived serial link (writer thread + reply matching); follows SERIAL_PORT changes."""
+    global _serial_link
+    with _serial_link_lock:
+        if _serial_link is None or _serial_link.port != SERIAL_PORT:
+            if _serial_link is not None:
+                _serial_link.close()
+            _serial_link = SerialLink(SERIAL_PORT, BAUDRATE, reply_timeout=SERIAL_TIMEOUT).start()
+        return _serial_link
+
 def send_serial(cmd: str) -> str:
     """Send 'device fwd|rev|stop' over serial."""
-    try:
-        with serial.Serial(SERIAL_PORT, BAUDRATE, timeout=SERIAL_TIMEOUT) as ser:
-            ser.write((cmd + "\n").encode())
-            time.sleep(0.1)
-            return ser.read_all().decode().strip()
-    except serial.SerialException as e:
-        return f"<Serial error: {e}>"
+    return get_serial_link().send(cmd)
 
 def send_http(endpoint: str, params: dict) -> str:
     """GET http://ESP_IP/endpoint?params..."""
-    url = f"http://{ESP_IP}/{endpoint}"
+    url = f"http://{esp_ip()}/{endpoint}"
     try:
-        r = requests.get(url, params=params, timeout=HTTP_TIMEOUT)
-        return r.text.strip()
+        r = http_client.get(url, "control", params=params, timeout=HTTP_TIMEOUT)
     except requests.RequestException as e:
         return f"<Wi-Fi error: {e}>"
+    if not r.ok:  # e.g. the ESP32 WebServer's "Not found" page on firmware without this endpoint
+        return f"<Wi-Fi error: {r.status_code} {r.text.strip()[:80]}>"
+    return r.text.strip()
 
 def dispatch(cmd: str, endpoint: str, params: dict) -> str:
-    """Use serial if available, else HTTP fallback."""
-    method = get_connection_method()
-    if method == 'serial':
-        return send_serial(cmd)
-    if method == 'http':
-        return send_http(endpoint, params)
-    return "<Error: No connection available>"
+    """Use the monitor's transport; on a send failure report it and retry once on the other."""
+    tried = set()
+    while True:
+        method = get_connection_method()
+        if method == 'none' or method in tried:
+            return out if tried else "<Error: No connection available>"
+        tried.add(method)
+        started = time.perf_counter()
+        if method == 'serial':
+            out = send_serial(cmd)
+            ok = not out.startswith("<Serial error")
+        else:
+            out = send_http(endpoint, params)
+            ok = not out.startswith("<Wi-Fi error")
+        link_monitor.report(method, ok, time.perf_counter() - started if ok and out else None)
+        if ok:
+            return out
 
 # —— Device Definitions ——
 MOTOR_IDS = {
@@ -135,6 +164,30 @@ def control_device(name: str, action: str) -> str:
     cmd = f"{name} {action}"
     return dispatch(cmd, "relay", {"i": idx, "a": a, "b": b})
 
+def control_devices(actions: dict) -> str:
+    """
+    Set several devices at once ({name: action}):
+    "<name> action; <name> action" over serial or
+    /relays?r<i>=<a><b>&... over HTTP.
+    """
+    for name, action in actions.items():
+        if name not in MOTOR_IDS:
+            return f"[Error] Unknown device '{name}'"
+        if action not in ACTION_MAP:
+            return f"[Error] Unknown action '{action}'"
+    cmd = "; ".join(f"{name} {action}" for name, action in actions.items())
+    params = {f"r{MOTOR_IDS[name]}": "%d%d" % ACTION_MAP[action] for name, action in actions.items()}
+    return dispatch(cmd, "relays", params)
+
+def run_devices(actions: dict, duration: float) -> str:
+    """
+    Run several devices together for `duration` seconds, then stop them together.
+    """
+    out = [control_devices(actions)]
+    time.sleep(duration)
+    out.append(control_devices({name: "stop" for name in actions}))
+    return "\n".join(out)
+
 def run_device(name: str, action: str, duration: float) -> str:
     """
     Run device with `action` for `duration` seconds, then stop.
@@ -164,28 +217,25 @@ def control_magnet_hoist(action: str, duration: float = None) -> str:
     return run_device("magnet_hoist", action, duration) if duration else control_device("magnet_hoist", action)
 
 # —— 2. Boat-Wide Macros ——
+def propellers(left: str, right: str, duration: float = None) -> str:
+    """Both propellers in one command, so they switch together."""
+    actions = {"p_left": left, "p_right": right}
+    return run_devices(actions, duration) if duration else control_devices(actions)
+
 def boat_forward(duration: float = None) -> str:
-    if duration:
-        return run_device("p_left", "fwd", duration) + "\n" + run_device("p_right", "fwd", duration)
-    return control_p_left("fwd") + "\n" + control_p_right("fwd")
+    return propellers("fwd", "fwd", duration)
 
 def boat_backward(duration: float = None) -> str:
-    if duration:
-        return run_device("p_left", "rev", duration) + "\n" + run_device("p_right", "rev", duration)
-    return control_p_left("rev") + "\n" + control_p_right("rev")
+    return propellers("rev", "rev", duration)
 
 def boat_left(duration: float = None) -> str:
-    if duration:
-        return run_device("p_left", "rev", duration) + "\n" + run_device("p_right", "fwd", duration)
-    return control_p_left("rev") + "\n" + control_p_right("fwd")
+    return propellers("rev", "fwd", duration)
 
 def boat_right(duration: float = None) -> str:
-    if duration:
-        return run_device("p_left", "fwd", duration) + "\n" + run_device("p_right", "rev", duration)
-    return control_p_left("fwd") + "\n" + control_p_right("rev")
+    return propellers("fwd", "rev", duration)
 
 def boat_stop() -> str:
-    return control_p_left("stop") + "\n" + control_p_right("stop")
+    return propellers("stop", "stop")
 
 # —— 3. Conveyor Belt & Hoist ——
 def start_conveyor(duration: float = None) -> str:
@@ -243,7 +293,7 @@ def stop_cleaning() -> str:
     )
 
 def emergency_stop() -> str:
-    return "\n".join(control_device(name, "stop") for name in MOTOR_IDS)
+    return control_devices({name: "stop" for name in MOTOR_IDS})
 
 # —— Demo / CLI ——
 if __name__ == "__main__":
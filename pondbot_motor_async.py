@@ -0,0 +1,337 @@
+# pondbot_motor_async.py
+"""
+asyncio PondBot motor control, alongside the threaded pondbot_motor_control.
+
+Same devices, actions and ESP32 protocol (see pondbot_motor_control), but every call is a coroutine
+and both transports live on the event loop: the serial port is watched with loop.add_reader and the
+ESP32 web server is spoken to over one keep-alive asyncio connection. Any number of tasks can drive
+the boat from one loop without threads.
+
+    async with AsyncMotorClient() as boat:
+        await boat.boat_forward(2)          # both propellers, stop after 2 s
+        task = asyncio.create_task(boat.run_device("conv_move", "fwd", 30))
+        ...
+        task.cancel()                       # conveyor is stopped right away
+
+A timed run owns its devices until it ends: cancelling it sends `stop` immediately, while a newer
+command for the same device (from any task) ends it early without the stop (the newer command
+wins); the superseded run_device call still returns normally to its caller.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from urllib.parse import urlencode
+import serial
+import pondbot_motor_control as motor
+from motor_protocol import (MAX_ATTEMPTS, LatencyHistogram, RetryBudget, frame, legacy_reply, next_seq,
+                            parse_reply)
+from serial_link import Command, pick_command, LATE_REPLY_GRACE, RTT_WINDOW
+
+RECONNECT_DELAY = 1.0
+
+# ---- Serial Transport ----
+class AsyncSerialTransport:
+    """Serial port read through the event loop; reply lines resolve per-command futures."""
+
+    def __init__(self, port, baudrate=motor.BAUDRATE, reply_timeout=motor.SERIAL_TIMEOUT):
+        self.port = port
+        self.baudrate = baudrate
+        self.reply_timeout = reply_timeout
+        self.last_error = None
+        self.rtt = deque(maxlen=RTT_WINDOW)
+        self._ser = None
+        self._buffer = b""
+        self._inflight = deque()
+        self._next_attempt = 0.0
+
+    @property
+    def healthy(self):
+        return self.last_error is None
+
+    def _open(self):
+        if self._ser is not None:
+            return self._ser
+        if time.monotonic() < self._next_attempt:
+            raise serial.SerialException(self.last_error)
+        try:
+            ser = serial.Serial(self.port, self.baudrate, timeout=0)
+            asyncio.get_running_loop().add_reader(ser.fileno(), self._on_readable)
+        except (serial.SerialException, OSError) as e:
+            self.last_error = str(e)
+            self._next_attempt = time.monotonic() + RECONNECT_DELAY
+            raise
+        self._ser, self._buffer, self.last_error = ser, b"", None
+        return ser
+
+    def _drop(self, error):
+        ser, self._ser = self._ser, None
+        self.last_error = str(error)
+        self._next_attempt = time.monotonic() + RECONNECT_DELAY
+        if ser is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(ser.fileno())
+                ser.close()
+            except (serial.SerialException, OSError, RuntimeError):
+                pass
+        while self._inflight:
+            cmd = self._inflight.popleft()
+            if not cmd.future.done():
+                cmd.future.set_result(f"<Serial error: {error}>")
+
+    def _on_readable(self):
+        try:
+            self._buffer += self._ser.read(self._ser.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            self._drop(e)
+            return
+        now = time.perf_counter()
+        while self._inflight and now - self._inflight[0].sent_at > self.reply_timeout + LATE_REPLY_GRACE:
+            self._inflight.popleft()
+        while b"\n" in self._buffer:
+            raw, self._buffer = self._buffer.split(b"\n", 1)
+            line = raw.decode(errors="ignore").strip()
+            cmd = pick_command(self._inflight, line) if line else None
+            if cmd is None:
+                continue
+            self._inflight.remove(cmd)
+            self.rtt.append(time.perf_counter() - cmd.sent_at)
+            if not cmd.future.done():
+                cmd.future.set_result(line)
+
+    async def send(self, text):
+        try:
+            ser = self._open()
+            cmd = Command(text)
+            cmd.future = asyncio.get_running_loop().create_future()
+            cmd.sent_at = time.perf_counter()
+            self._inflight.append(cmd)
+            ser.write((text + "\n").encode())
+        except (serial.SerialException, OSError) as e:
+            self._drop(e)
+            return f"<Serial error: {e}>"
+        try:
+            return await asyncio.wait_for(asyncio.shield(cmd.future), self.reply_timeout)
+        except asyncio.TimeoutError:
+            return ""  # silent ESP32; the command stays in flight so a late reply is still matched
+        finally:
+            if cmd.future.done() and cmd in self._inflight:
+                self._inflight.remove(cmd)
+
+    def close(self):
+        if self._ser is not None:
+            self._drop("closed")
+
+# ---- HTTP Transport ----
+class AsyncHttpTransport:
+    """Minimal HTTP/1.1 GET client on one keep-alive connection to the ESP32 web server."""
+
+    def __init__(self, host, timeout=motor.HTTP_TIMEOUT):
+        self.host = host
+        self.timeout = timeout
+        self.latency = deque(maxlen=RTT_WINDOW)
+        self._streams = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        if self._streams is None:
+            host, _, port = self.host.partition(":")
+            self._streams = await asyncio.open_connection(host, int(port or 80))
+        return self._streams
+
+    async def _request(self, target):
+        reader, writer = await self._connect()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n\r\n".encode())
+        await writer.drain()
+        status = (await reader.readline()).split()
+        if len(status) < 2:
+            raise ConnectionError("connection closed")
+        code = int(status[1])
+        length, close = None, False
+        while True:
+            header = (await reader.readline()).decode(errors="ignore").strip()
+            if not header:
+                break
+            name, _, value = header.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+            elif name.lower() == "connection" and value.strip().lower() == "close":
+                close = True
+        body = await reader.readexactly(length) if length is not None else await reader.read()
+        if close or length is None:
+            self.close()
+        text = body.decode(errors="ignore").strip()
+        if not 200 <= code < 300 and parse_reply(text) is None:  # a framed NAK may come with a 4xx
+            return f"{motor.HTTP_REJECTED} {code} {text[:80]}>"
+        return text
+
+    async def get(self, endpoint, params):
+        target = f"/{endpoint}?{urlencode(params)}" if params else f"/{endpoint}"
+        async with self._lock:
+            started = time.perf_counter()
+            for attempt in range(2):  # a kept-alive connection the ESP32 already dropped gets one retry
+                try:
+                    text = await asyncio.wait_for(self._request(target), self.timeout)
+                    self.latency.append(time.perf_counter() - started)
+                    return text
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                    self.close()
+                    if attempt or isinstance(e, asyncio.TimeoutError):
+                        return f"<HTTP error: {e!r}>"
+
+    def close(self):
+        if self._streams is not None:
+            self._streams[1].close()
+            self._streams = None
+
+# ---- Client ----
+class AsyncMotorClient:
+    def __init__(self, serial_port=None, esp_ip=None):
+        self.serial_port = serial_port or motor.SERIAL_PORT
+        self.esp_ip = esp_ip
+        self.serial = AsyncSerialTransport(self.serial_port)
+        self.http = None
+        self.retry_budget = RetryBudget()
+        self.latency = LatencyHistogram()
+        self._owners = {}  # device → timer task holding a timed action on it
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        self.serial.close()
+        if self.http is not None:
+            self.http.close()
+
+    def _http(self):
+        if self.http is None:
+            self.http = AsyncHttpTransport(self.esp_ip or motor.esp_ip())
+        return self.http
+
+    async def _send_once(self, seq, cmd, endpoint, params):
+        """Serial while the port exists and has not failed, else (or after a serial error) HTTP."""
+        if os.path.exists(self.serial_port):
+            out = await self.serial.send(frame(seq, cmd))
+            if not out.startswith("<Serial error"):
+                return "serial", out
+        return "http", await self._http().get(endpoint, dict(params, seq=seq))
+
+    async def dispatch(self, cmd, endpoint, params):
+        """One framed command; unacked attempts are retried within the shared budget (motor_protocol)."""
+        seq = next_seq()
+        is_stop = all(part.split()[-1] == "stop" for part in cmd.split(";"))
+        out = "<Error: No connection available>"
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt and not self.retry_budget.take():
+                break
+            started = time.perf_counter()
+            transport, out = await self._send_once(seq, cmd, endpoint, params)
+            reply = parse_reply(out, seq)
+            if reply is not None:
+                self.latency.add(transport, time.perf_counter() - started, is_stop)
+                if reply[1]:
+                    self.retry_budget.success()
+                return out
+            if legacy_reply(out) is not None:  # untagged OK/ERR from firmware without framing
+                return out
+        return out
+
+    def _supersede(self, names):
+        """A newer command takes over these devices: cancel older run timers (they skip their stop)."""
+        for name in names:
+            owner = self._owners.pop(name, None)
+            if owner is not None:
+                owner.cancel()
+
+    # ---- Core Control ----
+    async def control_device(self, name, action):
+        return await self.control_devices({name: action})
+
+    async def control_devices(self, actions):
+        for name, action in actions.items():
+            if name not in motor.MOTOR_IDS:
+                return f"[Error] Unknown device '{name}'"
+            if action not in motor.ACTION_MAP:
+                return f"[Error] Unknown action '{action}'"
+        self._supersede(actions)
+        return await self._send(actions)
+
+    async def _send(self, actions):
+        if len(actions) == 1:
+            (name, action), = actions.items()
+            a, b = motor.ACTION_MAP[action]
+            return await self.dispatch(f"{name} {action}", "relay", {"i": motor.MOTOR_IDS[name], "a": a, "b": b})
+        cmd = "; ".join(f"{name} {action}" for name, action in actions.items())
+        params = {f"r{motor.MOTOR_IDS[name]}": "%d%d" % motor.ACTION_MAP[action] for name, action in actions.items()}
+        return await self.dispatch(cmd, "relays", params)
+
+    async def run_devices(self, actions, duration):
+        """Run several devices together for `duration` seconds, then stop them together."""
+        for name, action in actions.items():
+            if name not in motor.MOTOR_IDS:
+                return f"[Error] Unknown device '{name}'"
+            if action not in motor.ACTION_MAP:
+                return f"[Error] Unknown action '{action}'"
+        self._supersede(actions)
+        # Start, wait and stop all run in one timer task that owns the devices from before the start
+        # command goes out, so a newer command cancels only the timer and a cancel at any point stops
+        timer = asyncio.create_task(self._hold(actions, duration))
+        for name in actions:
+            self._owners[name] = timer
+        try:
+            await asyncio.wait({timer})
+        except asyncio.CancelledError:
+            timer.cancel()  # the caller was cancelled: the timer still sends the stop
+            await asyncio.gather(timer, return_exceptions=True)
+            raise
+        return timer.result()
+
+    async def _hold(self, actions, duration):
+        """Timer of a run: start, wait, then stop the devices it still owns (also when cancelled)."""
+        task = asyncio.current_task()
+        out = []
+        try:
+            out.append(await self._send(actions))
+            await asyncio.sleep(duration)
+        except asyncio.CancelledError:
+            pass
+        owned = {name: "stop" for name in actions if self._owners.get(name) is task}
+        for name in owned:
+            del self._owners[name]
+        if owned:  # shielded, so a second cancel cannot swallow the stop
+            out.append(await asyncio.shield(self._send(owned)))
+        else:
+            out.append("[Superseded] " + ", ".join(actions))
+        return "\n".join(out)
+
+    async def run_device(self, name, action, duration):
+        return await self.run_devices({name: action}, duration)
+
+    # ---- Macros ----
+    async def _propellers(self, left, right, duration=None):
+        actions = {"p_left": left, "p_right": right}
+        if duration:
+            return await self.run_devices(actions, duration)
+        return await self.control_devices(actions)
+
+    async def boat_forward(self, duration=None):
+        return await self._propellers("fwd", "fwd", duration)
+
+    async def boat_backward(self, duration=None):
+        return await self._propellers("rev", "rev", duration)
+
+    async def boat_left(self, duration=None):
+        return await self._propellers("rev", "fwd", duration)
+
+    async def boat_right(self, duration=None):
+        return await self._propellers("fwd", "rev", duration)
+
+    async def boat_stop(self):
+        return await self.control_devices({"p_left": "stop", "p_right": "stop"})
+
+    async def emergency_stop(self):
+        return await self.control_devices({name: "stop" for name in motor.MOTOR_IDS})
@@ -3,6 +3,16 @@
 Modernized PondBot Motor Control Library
 Supports asynchronous (non-blocking) motor operations with optional blocking mode.
 Compatible with serial (/dev/ttyUSB0) and HTTP fallback to ESP32 control.
+The serial port stays open for the life of the process (see serial_link.SerialLink), and the
+transport for each command comes from a background health monitor (see link_monitor.LinkMonitor).
+
+ESP32 protocol:
+  serial  "<device> <action>"                 one relay
+          "<device> <action>; <device> <action>"  several relays switched together
+  HTTP    /relay?i=<idx>&a=<a>&b=<b>          one relay
+          /relays?r<idx>=<a><b>&r<idx>=<a><b>  several relays switched together
+Every command carries a sequence number ("#<seq> ..." on serial, &seq=<seq> over HTTP) and is
+acked or nacked with it; see motor_protocol.
 """
 
 import os
@@ -10,15 +20,22 @@ import socket
 import time
 import threading
 import requests
-import serial
+import http_client
+import mission_log
+from link_monitor import LinkMonitor
+from motor_protocol import (MAX_ATTEMPTS, LatencyHistogram, RetryBudget, frame, legacy_reply,
+                            next_seq, parse_reply)
+from motor_scheduler import MotorScheduler
+from serial_link import SerialLink
 
 # ---- Configuration ----
 SERIAL_PORT = "/dev/ttyUSB0"
 BAUDRATE = 115200
-SERIAL_TIMEOUT = 2
+SERIAL_TIMEOUT = 0.3  # seconds to wait for the ESP32's reply line
 ESP_LAST_OCTET = 35
 HTTP_TIMEOUT = 2
 RETRY_DELAY = 2
+KEEPALIVE_INTERVAL = 2.0  # seconds; an unchanged command still goes out this often (ESP32 watchdog), None: never
 
 # ---- Network Helpers ----
 def get_local_ip() -> str:
@@ -26,6 +43,8 @@ def get_local_ip() -> str:
     try:
         s.connect(("8.8.8.8", 80))
         return s.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
     finally:
         s.close()
 
@@ -34,51 +53,131 @@ def get_esp_ip() -> str:
     parts[-1] = str(ESP_LAST_OCTET)
     return '.'.join(parts)
 
-ESP_IP = get_esp_ip()
+ESP_IP = None  # resolved on first HTTP use; assign it to skip discovery
+
+def esp_ip() -> str:
+    global ESP_IP
+    if ESP_IP is None:
+        ESP_IP = get_esp_ip()
+    return ESP_IP
 
 # ---- Connectivity Checks ----
 def is_serial_connected() -> bool:
-    return os.path.exists(SERIAL_PORT)
+    return os.path.exists(SERIAL_PORT) and get_serial_link().healthy
 
 def ping_http() -> bool:
     try:
-        r = requests.get(f"http://{ESP_IP}", timeout=HTTP_TIMEOUT)
+        r = http_client.get(f"http://{esp_ip()}", "probe", timeout=HTTP_TIMEOUT)
         return r.status_code in (200, 404)
     except:
         return False
 
+link_monitor = LinkMonitor(is_serial_connected, ping_http)
+
 def get_connection_method() -> str:
-    if is_serial_connected():
-        return 'serial'
-    if ping_http():
-        return 'http'
-    return 'none'
+    """Cached transport ('serial', 'http' or 'none') from the background link monitor."""
+    return link_monitor.current()
+
+def link_status() -> dict:
+    """Current transport, per-transport health and recent latency, plus serial link counters."""
+    out = link_monitor.status()
+    out["esp_ip"] = ESP_IP
+    out["serial"]["link"] = get_serial_link().stats()
+    out["protocol"] = protocol_stats()
+    return out
 
 # ---- Low-Level Send ----
+_serial_link = None
+_serial_link_lock = threading.Lock()
+
+def get_serial_link() -> SerialLink:
+    """The process-wide link; reopened on the new port if SERIAL_PORT is reassigned."""
+    global _serial_link
+    with _serial_link_lock:
+        if _serial_link is None or _serial_link.port != SERIAL_PORT:
+            if _serial_link is not None:
+                _serial_link.close()
+            _serial_link = SerialLink(SERIAL_PORT, BAUDRATE, reply_timeout=SERIAL_TIMEOUT).start()
+        return _serial_link
+
 def send_serial(cmd: str) -> str:
-    try:
-        with serial.Serial(SERIAL_PORT, BAUDRATE, timeout=SERIAL_TIMEOUT) as ser:
-            ser.write((cmd + "\n").encode())
-            time.sleep(0.1)
-            return ser.read_all().decode().strip()
-    except serial.SerialException as e:
-        return f"<Serial error: {e}>"
+    return get_serial_link().send(cmd)
+
+def serial_stats() -> dict:
+    """Link counters and per-command round-trip latency (ms)."""
+    return get_serial_link().stats()
+
+HTTP_REJECTED = "<HTTP error: status"  # the ESP32 answered, but not with a 2xx (unacked, link is up)
 
 def send_http(endpoint: str, params: dict) -> str:
-    url = f"http://{ESP_IP}/{endpoint}"
+    url = f"http://{esp_ip()}/{endpoint}"
     try:
-        r = requests.get(url, params=params, timeout=HTTP_TIMEOUT)
-        return r.text.strip()
+        r = http_client.get(url, "control", params=params, timeout=HTTP_TIMEOUT)
     except requests.RequestException as e:
         return f"<HTTP error: {e}>"
+    text = r.text.strip()
+    if not r.ok and parse_reply(text) is None:  # a framed NAK may come with a 4xx; anything else failed
+        return f"{HTTP_REJECTED} {r.status_code} {text[:80]}>"
+    return text
+
+retry_budget = RetryBudget()
+command_latency = LatencyHistogram()
+protocol_counters = {"acked": 0, "nacked": 0, "unframed": 0, "unacked": 0, "retries": 0}
+_protocol_lock = threading.Lock()
+
+def _count(key: str):
+    with _protocol_lock:
+        protocol_counters[key] += 1
+
+def protocol_stats() -> dict:
+    """Ack/nack/retry counters, retry tokens left and per-transport round-trip histograms (ms)."""
+    return dict(protocol_counters, retry_tokens=round(retry_budget.tokens, 1),
+                latency=command_latency.snapshot())
 
 def dispatch(cmd: str, endpoint: str, params: dict) -> str:
-    method = get_connection_method()
-    if method == 'serial':
-        return send_serial(cmd)
-    elif method == 'http':
-        return send_http(endpoint, params)
-    return "<Error: No connection available>"
+    """Send one framed command, retrying unacked attempts (possibly on the other transport)."""
+    seq = next_seq()
+    is_stop = all(part.split()[-1] == "stop" for part in cmd.split(";"))
+    out = "<Error: No connection available>"
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt:
+            if not retry_budget.take():
+                break
+            _count("retries")
+        method = get_connection_method()
+        if method == 'none':
+            break
+        started = time.perf_counter()
+        if method == 'serial':
+            out = send_serial(frame(seq, cmd))
+            reachable = not out.startswith("<Serial error")
+        else:
+            out = send_http(endpoint, dict(params, seq=seq))
+            reachable = out.startswith(HTTP_REJECTED) or not out.startswith("<HTTP error")
+        elapsed = time.perf_counter() - started
+        reply = parse_reply(out, seq) if reachable else None
+        if reply is None and not (reachable and out):
+            # Transport error, or the ESP32 stayed silent (reachable, so no failover for that).
+            link_monitor.report(method, reachable)
+            continue
+        link_monitor.report(method, True, elapsed)
+        if reply is None:  # untagged: only pre-framing firmware's own OK/ERR text settles it
+            legacy = legacy_reply(out)
+            if legacy is None:
+                continue
+            _count("unframed")
+            if not legacy:
+                _count("nacked")
+            return out
+        command_latency.add(method, elapsed, is_stop)
+        if reply[1]:
+            _count("acked")
+            retry_budget.success()
+        else:
+            _count("nacked")  # rejected by the board: resending would not help
+        return out
+    _count("unacked")
+    return out
 
 # ---- Device Definitions ----
 MOTOR_IDS = {
@@ -96,16 +195,115 @@ ACTION_MAP = {
     "stop": (1, 1)
 }
 
+# Timed actions (the stop after a non-blocking run); a direct command to a device supersedes them.
+scheduler = MotorScheduler()
+
+def scheduled_actions(device: str = None) -> list:
+    return scheduler.pending(device)
+
+def cancel_scheduled(job_id: int = None, device: str = None) -> int:
+    """Cancel one scheduled job, or everything pending for a device; returns how many were dropped."""
+    if job_id is not None:
+        return int(scheduler.cancel(job_id))
+    return scheduler.cancel_device(device) if device else 0
+
+# ---- Motor State Cache ----
+# Last acknowledged action per device. Commands that would not change it are dropped, except once
+# per KEEPALIVE_INTERVAL. A transport switch or serial reconnect (which resets the ESP32) forgets it.
+# "stop" is never dropped: other processes (autopilot, the controller tasks, pondboat_control) drive
+# the same board, so this process's cache cannot know the relay is still stopped.
+motor_state = {}  # name → {"action", "acked_at", "epoch"}
+command_counters = {"sent": 0, "suppressed": 0, "keepalive": 0, "failed": 0}
+_state_lock = threading.Lock()
+
+def _link_epoch() -> tuple:
+    return link_monitor.switches, get_serial_link().counters["connects"]
+
+def _acknowledged(out: str) -> bool:
+    reply = parse_reply(out)
+    if reply is not None:
+        return reply[1]
+    return legacy_reply(out) is True
+
+def _filter_unchanged(actions: dict) -> dict:
+    """The subset of `actions` that must go out; counts the rest as suppressed. Stops always go out."""
+    now, epoch = time.monotonic(), _link_epoch()
+    out = {}
+    with _state_lock:
+        for name, action in actions.items():
+            known = motor_state.get(name)
+            if action == "stop" or known is None or known["action"] != action or known["epoch"] != epoch:
+                out[name] = action
+            elif KEEPALIVE_INTERVAL is not None and now - known["acked_at"] >= KEEPALIVE_INTERVAL:
+                out[name] = action
+                command_counters["keepalive"] += 1
+            else:
+                command_counters["suppressed"] += 1
+    return out
+
+def _record(actions: dict, out: str):
+    acked = _acknowledged(out)
+    now, epoch = time.monotonic(), _link_epoch()
+    mission_log.record("motor", {"actions": actions, "acked": acked, "reply": out}, now)
+    with _state_lock:
+        command_counters["sent" if acked else "failed"] += len(actions)
+        for name, action in actions.items():
+            if acked:
+                motor_state[name] = {"action": action, "acked_at": now, "epoch": epoch}
+            else:
+                motor_state.pop(name, None)  # unknown: the next command goes out whatever it is
+
+def command_stats() -> dict:
+    """Commands sent / suppressed / resent as keep-alive / failed, and the cached state per device."""
+    with _state_lock:
+        return dict(command_counters, state={name: s["action"] for name, s in motor_state.items()})
+
 # ---- Core Control ----
-def control_device(name: str, action: str) -> str:
+def control_device(name: str, action: str, force: bool = False) -> str:
     if name not in MOTOR_IDS:
         return f"[Error] Unknown device '{name}'"
     if action not in ACTION_MAP:
         return f"[Error] Unknown action '{action}'"
+    scheduler.cancel_device(name, "superseded")
+    if not force and not _filter_unchanged({name: action}):
+        return f"[Suppressed] {name} {action}"
     idx = MOTOR_IDS[name]
     a, b = ACTION_MAP[action]
     cmd = f"{name} {action}"
-    return dispatch(cmd, "relay", {"i": idx, "a": a, "b": b})
+    out = dispatch(cmd, "relay", {"i": idx, "a": a, "b": b})
+    _record({name: action}, out)
+    return out
+
+def control_devices(actions: dict, force: bool = False) -> str:
+    """Set several relays at once ({name: action}) in one serial line or one HTTP request."""
+    for name, action in actions.items():
+        if name not in MOTOR_IDS:
+            return f"[Error] Unknown device '{name}'"
+        if action not in ACTION_MAP:
+            return f"[Error] Unknown action '{action}'"
+    for name in actions:
+        scheduler.cancel_device(name, "superseded")
+    pending = actions if force else _filter_unchanged(actions)
+    if not pending:
+        return "[Suppressed] " + "; ".join(f"{name} {action}" for name, action in actions.items())
+    cmd = "; ".join(f"{name} {action}" for name, action in pending.items())
+    params = {f"r{MOTOR_IDS[name]}": "%d%d" % ACTION_MAP[action] for name, action in pending.items()}
+    out = dispatch(cmd, "relays", params)
+    _record(pending, out)
+    return out
+
+def run_devices(actions: dict, duration: float, blocking: bool = True) -> str:
+    """Like run_device, for several relays that start and stop together."""
+    stops = {name: "stop" for name in actions}
+    if blocking:
+        out = [control_devices(actions)]
+        time.sleep(duration)
+        out.append(control_devices(stops))
+        return "\n".join(out)
+    else:
+        control_devices(actions)
+        job = scheduler.schedule(tuple(actions), duration, control_devices, stops, label="stop " + ", ".join(actions))
+        return f"[Info] {', '.join(actions)} running for {duration}s (non-blocking, job {job})"
 
 def run_device(name: str, action: str, duration: float, blocking: bool = True) -> str:
     if blocking:
@@ -114,40 +312,31 @@ def run_device(name: str, action: str, duration: float, blocking: bool = True) -
         out.append(control_device(name, "stop"))
         return "\n".join(out)
     else:
-        def task():
-            control_device(name, action)
-            time.sleep(duration)
-            control_device(name, "stop")
-        threading.Thread(target=task, daemon=True).start()
-        return f"[Info] {name} running '{action}' for {duration}s (non-blocking)"
+        control_device(name, action)
+        job = scheduler.schedule(name, duration, control_device, name, "stop", label=f"stop {name}")
+        return f"[Info] {name} running '{action}' for {duration}s (non-blocking, job {job})"
 
 # ---- Macros ----
-def boat_forward(duration: float = None, blocking: bool = True) -> str:
+def _propellers(left: str, right: str, duration: float = None, blocking: bool = True) -> str:
+    actions = {"p_left": left, "p_right": right}
     if duration:
-        return run_device("p_left", "fwd", duration, blocking) + "\n" + \
-               run_device("p_right", "fwd", duration, blocking)
-    return control_device("p_left", "fwd") + "\n" + control_device("p_right", "fwd")
+        return run_devices(actions, duration, blocking)
+    return control_devices(actions)
+
+def boat_forward(duration: float = None, blocking: bool = True) -> str:
+    return _propellers("fwd", "fwd", duration, blocking)
 
 def boat_backward(duration: float = None, blocking: bool = True) -> str:
-    if duration:
-        return run_device("p_left", "rev", duration, blocking) + "\n" + \
-               run_device("p_right", "rev", duration, blocking)
-    return control_device("p_left", "rev") + "\n" + control_device("p_right", "rev")
+    return _propellers("rev", "rev", duration, blocking)
 
 def boat_left(duration: float = None, blocking: bool = True) -> str:
-    if duration:
-        return run_device("p_left", "rev", duration, blocking) + "\n" + \
-               run_device("p_right", "fwd", duration, blocking)
-    return control_device("p_left", "rev") + "\n" + control_device("p_right", "fwd")
+    return _propellers("rev", "fwd", duration, blocking)
 
 def boat_right(duration: float = None, blocking: bool = True) -> str:
-    if duration:
-        return run_device("p_left", "fwd", duration, blocking) + "\n" + \
-               run_device("p_right", "rev", duration, blocking)
-    return control_device("p_left", "fwd") + "\n" + control_device("p_right", "rev")
+    return _propellers("fwd", "rev", duration, blocking)
 
 def boat_stop() -> str:
-    return control_device("p_left", "stop") + "\n" + control_device("p_right", "stop")
+    return control_devices({"p_left": "stop", "p_right": "stop"})
 
 def emergency_stop() -> str:
-    return "\n".join(control_device(name, "stop") for name in MOTOR_IDS)
+    return control_devices({name: "stop" for name in MOTOR_IDS}, force=True)
@@ -0,0 +1,120 @@
+# sensor_history.py
+# Fixed-size NumPy ring buffers of timestamped sensor samples.
+# Used by ultrasonic_host, compass_host and gps_host to serve filtered values and /history slices.
+
+import math
+import threading
+import time
+import warnings
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+# ---------------------------- Ring Buffer ----------------------------
+class SampleHistory:
+    """Ring buffer of (timestamp, values...) rows; missing values are stored as NaN."""
+
+    def __init__(self, fields, capacity=256):
+        self.fields = list(fields)
+        self.capacity = capacity
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._v = np.full((capacity, len(self.fields)), np.nan, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, values, t=None):
+        row = [np.nan if values.get(f) is None else float(values[f]) for f in self.fields]
+        with self._lock:
+            i = self._next
+            self._t[i] = time.time() if t is None else t
+            self._v[i] = row
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def recent(self, n=None):
+        """Return the newest `n` rows (oldest first) as (timestamps, values) copies."""
+        with self._lock:
+            n = self._count if n is None else min(n, self._count)
+            idx = (self._next - n + np.arange(n)) % self.capacity
+            return self._t[idx], self._v[idx]
+
+    def since(self, t0):
+        """Return all rows strictly newer than `t0`, found by binary search on the timestamps."""
+        t, v = self.recent()
+        start = np.searchsorted(t, t0, side="right")
+        return t[start:], v[start:]
+
+    def latest_time(self):
+        with self._lock:
+            if not self._count:
+                return None
+            return float(self._t[(self._next - 1) % self.capacity])
+
+    def column(self, field, n=None):
+        t, v = self.recent(n)
+        return t, v[:, self.fields.index(field)]
+
+    def history_payload(self, since=0.0):
+        """JSON-ready slice for the /history endpoint (NaN becomes null)."""
+        t, v = self.since(since)
+        rows = v.astype(object)
+        rows[np.isnan(v)] = None
+        return {"fields": self.fields, "t": t.tolist(), "values": rows.tolist()}
+
+# ---------------------------- Filters ----------------------------
+def _nan_to_none(x, ndigits=2):
+    return None if x is None or np.isnan(x) else round(float(x), ndigits)
+
+def median_filter(history, n=5, ndigits=2):
+    """Per-field median of the last `n` samples, ignoring missing readings."""
+    _, v = history.recent(n)
+    if not len(v):
+        return {f: None for f in history.fields}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN column → NaN, handled below
+        med = np.nanmedian(v, axis=0)
+    return {f: _nan_to_none(m, ndigits) for f, m in zip(history.fields, med)}
+
+def circular_mean(angles_deg):
+    """Mean of angles in degrees, correct across the 359°→0° wrap. Returns None if empty."""
+    a = np.radians(np.asarray(angles_deg, dtype=np.float64))
+    a = a[~np.isnan(a)]
+    if not len(a):
+        return None
+    s, c = np.sin(a).mean(), np.cos(a).mean()
+    if math.hypot(s, c) < 1e-9:
+        return None
+    return math.degrees(math.atan2(s, c)) % 360
+
+def circular_mean_filter(history, field, n=5, ndigits=2):
+    _, col = history.column(field, n)
+    mean = circular_mean(col)
+    return None if mean is None else round(mean, ndigits) % 360
+
+def position_filter(history, n=10, max_dev_m=8.0, mad_scale=3.0):
+    """Mean lat/lon of recent fixes after rejecting outliers by distance from the median fix.
+
+    A fix is rejected if it lies further than `mad_scale` median absolute deviations
+    (never less than `max_dev_m` metres) from the median position.
+    """
+    _, v = history.recent(n)
+    lat = v[:, history.fields.index("lat")]
+    lon = v[:, history.fields.index("lon")]
+    ok = ~(np.isnan(lat) | np.isnan(lon))
+    if "fix" in history.fields:
+        ok &= v[:, history.fields.index("fix")] > 0
+    lat, lon = lat[ok], lon[ok]
+    if not len(lat):
+        return None, None
+
+    lat0, lon0 = np.median(lat), np.median(lon)
+    dy = np.radians(lat - lat0) * EARTH_RADIUS_M
+    dx = np.radians(lon - lon0) * EARTH_RADIUS_M * math.cos(math.radians(lat0))
+    dist = np.hypot(dx, dy)
+    limit = max(max_dev_m, mad_scale * float(np.median(dist)))
+    keep = dist <= limit
+    return round(float(lat[keep].mean()), 7), round(float(lon[keep].mean()), 7)
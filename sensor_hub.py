@@ -0,0 +1,216 @@
+# sensor_hub.py
+# Unified sensor-state hub: subscribes once to every sensor stream and keeps one timestamped
+# world-state snapshot, served from /state and from a shared-memory segment on the same Pi.
+# Navigation modules call read_state() instead of making four HTTP requests per decision.
+
+import math
+import struct
+import threading
+import time
+import requests
+import http_client
+from multiprocessing import shared_memory, resource_tracker
+from flask import Flask, jsonify
+import mission_log
+from sensor_stream import SensorMirror, SampleBroadcaster, sse_response
+
+app = Flask(__name__)
+HUB_PORT = 8007
+HUB_URL = f"http://localhost:{HUB_PORT}/state"
+SHM_NAME = "boat_sensor_hub"
+TICK_RATE_HZ = 20  # snapshot refresh rate (keeps source ages current)
+HUB_MAX_AGE = 0.5  # a snapshot older than this means the hub itself has stopped
+
+# Source streams and how old (s) a sample may get before the source is flagged stale
+SOURCES = {
+    "direction": "http://localhost:8002/analyze/stream",
+    "ultrasonic": "http://localhost:8004/distance/stream",
+    "compass": "http://localhost:8005/heading/stream",
+    "gps": "http://localhost:8006/location/stream",
+}
+MAX_AGE = {"direction": 1.0, "ultrasonic": 1.0, "compass": 1.5, "gps": 2.5}
+
+ULTRASONIC_KEYS = ("front", "left", "right", "back", "dustbin")
+DIRECTIONS = (None, "FORWARD", "LEFT", "RIGHT", "BACK", "STOP")
+
+# ---------------------------- Shared-Memory Layout ----------------------------
+# Seqlock counter (odd while the hub is writing) followed by one fixed record:
+#   timestamp, 5 ultrasonic distances, heading, lat, lon, gps fix, direction code,
+#   and the age of each source in SOURCES order. Missing values (and never-seen sources) are NaN.
+_SEQ = struct.Struct("<I")
+_RECORD = struct.Struct("<d5fddd?B4f")
+SHM_SIZE = _SEQ.size + _RECORD.size
+
+def _nan(x):
+    return math.nan if x is None else float(x)
+
+def _none(x, ndigits=None):
+    if math.isnan(x):
+        return None
+    return round(x, ndigits) if ndigits is not None else x
+
+def pack_state(state):
+    us = state["ultrasonic"] or {}
+    compass = state["compass"] or {}
+    gps = state["gps"] or {}
+    direction = (state["direction"] or {}).get("direction")
+    return _RECORD.pack(
+        state["timestamp"],
+        *(_nan(us.get(k)) for k in ULTRASONIC_KEYS),
+        _nan(compass.get("heading")),
+        _nan(gps.get("lat")), _nan(gps.get("lon")), bool(gps.get("fix")),
+        DIRECTIONS.index(direction) if direction in DIRECTIONS else 0,
+        *(_nan(state["age"][name]) for name in SOURCES))
+
+def unpack_state(buf):
+    fields = _RECORD.unpack(buf)
+    ts = fields[0]
+    us = fields[1:6]
+    heading, lat, lon, fix, dir_code = fields[6:11]
+    age = {name: _none(a, 3) for name, a in zip(SOURCES, fields[11:])}
+    values = {
+        "direction": {"direction": DIRECTIONS[dir_code]},
+        "ultrasonic": {k: _none(d, 2) for k, d in zip(ULTRASONIC_KEYS, us)},
+        "compass": {"heading": _none(heading, 2)},
+        "gps": {"lat": _none(lat), "lon": _none(lon), "fix": fix},
+    }
+    state = {name: None if age[name] is None else values[name] for name in SOURCES}
+    state.update(timestamp=ts, age=age)
+    return _with_staleness(state, time.time() - ts)
+
+def _with_staleness(state, extra_age=0.0):
+    """Add `stale` flags; `extra_age` accounts for time since the snapshot was taken."""
+    stale = {}
+    for name in SOURCES:
+        age = state["age"][name]
+        stale[name] = age is None or age + extra_age > MAX_AGE[name]
+    state["stale"] = stale
+    return state
+
+# ---------------------------- Hub Side ----------------------------
+class SharedStateWriter:
+    def __init__(self, name=SHM_NAME):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=SHM_SIZE)
+        except FileExistsError:
+            # Left behind by a previous hub run; reuse it
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._seq = 0
+        _SEQ.pack_into(self.shm.buf, 0, 0)
+
+    def write(self, state):
+        record = pack_state(state)
+        self._seq += 1  # odd: write in progress
+        _SEQ.pack_into(self.shm.buf, 0, self._seq & 0xFFFFFFFF)
+        self.shm.buf[_SEQ.size:SHM_SIZE] = record
+        self._seq += 1  # even: record consistent
+        _SEQ.pack_into(self.shm.buf, 0, self._seq & 0xFFFFFFFF)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+sample_arrived = threading.Event()
+
+def _on_sample(name):
+    def on_update(value):
+        mission_log.record_sample(name, value)
+        sample_arrived.set()
+    return on_update
+
+mirrors = {name: SensorMirror(url, on_update=_on_sample(name)) for name, url in SOURCES.items()}
+broadcaster = SampleBroadcaster()
+state_lock = threading.Lock()
+latest_state = None
+
+def build_state():
+    state = {"timestamp": time.time(), "age": {}}
+    for name, mirror in mirrors.items():
+        value, age = mirror.latest()
+        state[name] = value
+        state["age"][name] = None if age is None else round(age, 3)
+    return _with_staleness(state)
+
+def hub_loop(writer):
+    global latest_state
+    period = 1.0 / TICK_RATE_HZ
+    while True:
+        # Rebuild as soon as any source pushes a sample, and at least every tick
+        sample_arrived.wait(period)
+        sample_arrived.clear()
+        state = build_state()
+        with state_lock:
+            latest_state = state
+        writer.write(state)
+        broadcaster.publish(state)
+
+@app.route("/state")
+def get_state():
+    with state_lock:
+        return jsonify(latest_state or build_state())
+
+# GET /state/stream → SSE stream of every snapshot
+@app.route("/state/stream")
+def state_stream():
+    return sse_response(broadcaster)
+
+@app.route("/ping")
+def ping():
+    return "Sensor hub online"
+
+# ---------------------------- Client Side ----------------------------
+_reader = None
+
+def _attach():
+    global _reader
+    if _reader is None:
+        shm = shared_memory.SharedMemory(name=SHM_NAME)
+        # Readers must not unlink the hub's segment when they exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        _reader = shm
+    return _reader
+
+def read_shared_state(retries=10):
+    """Read the hub snapshot from shared memory; None if the hub is not running."""
+    try:
+        buf = _attach().buf
+    except FileNotFoundError:
+        return None
+    for _ in range(retries):
+        (seq1,) = _SEQ.unpack_from(buf, 0)
+        record = bytes(buf[_SEQ.size:SHM_SIZE])
+        (seq2,) = _SEQ.unpack_from(buf, 0)
+        if seq1 == seq2 and seq1 % 2 == 0:
+            return None if seq1 == 0 else unpack_state(record)
+    return None
+
+def read_state(timeout=0.5):
+    """Latest world-state snapshot: shared memory if local, else the hub's /state endpoint.
+
+    Each source carries its age and a `stale` flag. Returns None if the hub is not running.
+    """
+    global _reader
+    state = read_shared_state()
+    if state is not None and time.time() - state["timestamp"] > HUB_MAX_AGE:
+        _reader = None  # segment from a hub that has stopped; re-attach next time
+        state = None
+    if state is None:
+        try:
+            state = http_client.get(HUB_URL, "sensor", timeout=timeout).json()
+        except (requests.RequestException, ValueError):
+            return None
+        if time.time() - state["timestamp"] > HUB_MAX_AGE:
+            return None
+        state = _with_staleness(state, time.time() - state["timestamp"])
+    return state
+
+if __name__ == "__main__":
+    print(f"🛰️  Sensor hub running at http://0.0.0.0:{HUB_PORT}/state (shared memory '{SHM_NAME}')")
+    for mirror in mirrors.values():
+        mirror.start()
+    writer = SharedStateWriter()
+    threading.Thread(target=hub_loop, args=(writer,), daemon=True).start()
+    try:
+        app.run(host="0.0.0.0", port=HUB_PORT, threaded=True)
+    finally:
+        writer.close()
@@ -0,0 +1,123 @@
+# sensor_stream.py
+# Push-based sample streaming shared by the sensor hosts and their consumers.
+# Hosts publish each new sample to a SampleBroadcaster and expose it as a server-sent-events stream;
+# consumers keep a SensorMirror that holds the latest value in memory instead of polling over HTTP.
+
+import json
+import threading
+import time
+import requests
+import http_client
+from flask import Response
+
+KEEPALIVE_INTERVAL = 10.0  # seconds between SSE comments when no new sample arrives
+RECONNECT_DELAY = 1.0
+
+# ---------------------------- Server Side ----------------------------
+class SampleBroadcaster:
+    """Latest-value slot with a sequence number that stream generators block on."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._sample = None
+
+    def publish(self, sample):
+        with self._cond:
+            self._seq += 1
+            self._sample = sample
+            self._cond.notify_all()
+
+    def latest(self):
+        with self._cond:
+            return self._seq, self._sample
+
+    def wait_next(self, after_seq, timeout=None):
+        """Block until a sample newer than `after_seq` is published (or timeout)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq, timeout)
+            return self._seq, self._sample
+
+def sse_response(broadcaster, keepalive=KEEPALIVE_INTERVAL):
+    """Flask response streaming every published sample as an SSE `data:` event.
+
+    The current sample (if any) is sent immediately so a new subscriber is never empty-handed.
+    Intermediate samples are skipped if the client reads slower than they are produced.
+    """
+    def generate():
+        seq = 0
+        while True:
+            new_seq, sample = broadcaster.wait_next(seq, keepalive)
+            if new_seq == seq:
+                yield ": keep-alive\n\n"
+                continue
+            seq = new_seq
+            yield f"id: {seq}\ndata: {json.dumps(sample)}\n\n"
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ---------------------------- Client Side ----------------------------
+class SensorMirror:
+    """Background subscriber to an SSE stream that mirrors the latest sample in memory."""
+
+    def __init__(self, url, on_update=None, reconnect_delay=RECONNECT_DELAY):
+        self.url = url
+        self.on_update = on_update
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._lock = threading.Lock()
+        self._value = None
+        self._updated = None  # time.monotonic() of the last sample
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def latest(self):
+        """Return (value, age_seconds); age is None if nothing has been received yet."""
+        with self._lock:
+            if self._updated is None:
+                return None, None
+            return self._value, time.monotonic() - self._updated
+
+    def get(self, max_age=None):
+        """Latest value, or None if nothing was received or it is older than `max_age` seconds."""
+        value, age = self.latest()
+        if age is None or (max_age is not None and age > max_age):
+            return None
+        return value
+
+    def _set(self, value):
+        with self._lock:
+            self._value = value
+            self._updated = time.monotonic()
+        if self.on_update:
+            try:
+                self.on_update(value)
+            except Exception as e:
+                print(f"[SensorMirror] on_update error for {self.url}: {e}")
+
+    def _run(self):
+        while True:
+            try:
+                with http_client.get(self.url, "stream", stream=True,
+                                     timeout=(3, KEEPALIVE_INTERVAL * 2)) as r:
+                    r.raise_for_status()
+                    self.connected = True
+                    data = []
+                    for line in r.iter_lines(decode_unicode=True):
+                        if line is None:
+                            continue
+                        if line.startswith("data:"):
+                            data.append(line[5:].strip())
+                        elif not line and data:
+                            self._set(json.loads("\n".join(data)))
+                            data = []
+            except (requests.RequestException, ValueError) as e:
+                print(f"[SensorMirror] {self.url} disconnected: {e}")
+            self.connected = False
+            time.sleep(self.reconnect_delay)
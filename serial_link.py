@@ -0,0 +1,241 @@
+# serial_link.py
+# Long-lived serial connection to the ESP32 relay board, shared by pondbot_motor_control and
+# pondboat_control. Opening /dev/ttyUSB0 resets the ESP32 on many USB adapters, so the port is
+# opened once and owned by a writer thread that drains a command queue; a reader thread matches
+# reply lines to in-flight commands as they arrive, so nothing sleeps waiting for a reply.
+
+import queue
+import threading
+import time
+from collections import deque
+import serial
+
+REPLY_TIMEOUT = 0.3       # seconds a caller waits for the reply line
+LATE_REPLY_GRACE = 2.0    # timed-out commands still claim replies this long, so later ones stay matched
+RECONNECT_DELAY = 1.0     # seconds between reconnect attempts
+READ_TIMEOUT = 0.1        # reader poll interval (lets it notice a closed port)
+RTT_WINDOW = 256          # round trips kept for latency stats
+
+class Command:
+    """One queued command; `wait()` returns its reply line, '' on timeout or an error string."""
+
+    def __init__(self, text):
+        self.text = text
+        words = text.split()
+        self.tag = words.pop(0) if words and words[0].startswith("#") else None  # "#<seq>" framing
+        self.device = words[0] if words else ""
+        self.sent_at = None   # perf_counter() when written
+        self.reply = None
+        self.rtt = None
+        self._done = threading.Event()
+
+    def complete(self, reply):
+        if not self._done.is_set():
+            self.reply = reply
+            self._done.set()
+
+    def wait(self, timeout=REPLY_TIMEOUT):
+        self._done.wait(timeout)
+        return self.reply if self.reply is not None else ""
+
+def pick_command(inflight, line):
+    """The in-flight command a reply line answers.
+
+    A "#<seq>" tagged reply matches only its own command, the newest attempt if it was retried
+    (that is the one still waiting); an untagged one (older firmware) goes to the oldest command
+    for a device it names, else to the oldest.
+    """
+    if line.startswith("#"):
+        tag = line.split()[0]
+        return next((c for c in reversed(inflight) if c.tag == tag), None)
+    words = set(line.replace(",", " ").replace(";", " ").split())
+    cmd = next((c for c in inflight if c.device in words), None)
+    if cmd is None and inflight:
+        cmd = inflight[0]
+    return cmd
+
+class SerialLink:
+    def __init__(self, port, baudrate, reply_timeout=REPLY_TIMEOUT, reconnect_delay=RECONNECT_DELAY):
+        self.port = port
+        self.baudrate = baudrate
+        self.reply_timeout = reply_timeout
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self.last_error = None
+        self.counters = {"sent": 0, "replies": 0, "late_replies": 0, "unmatched": 0,
+                         "timeouts": 0, "errors": 0, "connects": 0}
+        self._queue = queue.Queue()
+        self._inflight = deque()  # written commands awaiting a reply, oldest first
+        self._lock = threading.Lock()
+        self._ser = None
+        self._next_attempt = 0.0
+        self._rtt = deque(maxlen=RTT_WINDOW)
+        self._thread = None
+        self._closed = False  # set by close(): no reconnects, both threads exit
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, daemon=True, name="serial-writer")
+            self._thread.start()
+        return self
+
+    # ---------------- Caller API ----------------
+    def submit(self, text):
+        """Queue a command without waiting; returns its Command."""
+        self.start()
+        cmd = Command(text)
+        if self._closed:
+            cmd.complete("<Serial error: link closed>")
+        else:
+            self._queue.put(cmd)
+        return cmd
+
+    def send(self, text, timeout=None):
+        """Queue a command and wait for its reply line."""
+        cmd = self.submit(text)
+        reply = cmd.wait(self.reply_timeout if timeout is None else timeout)
+        if cmd.reply is None:
+            with self._lock:
+                self.counters["timeouts"] += 1
+        return reply
+
+    @property
+    def healthy(self):
+        """False from a failed open/read/write until the port is reopened."""
+        return self.last_error is None
+
+    def stats(self):
+        with self._lock:
+            rtts = sorted(self._rtt)
+            out = dict(self.counters, connected=self.connected, port=self.port,
+                       queued=self._queue.qsize(), in_flight=len(self._inflight),
+                       last_error=self.last_error)
+        if rtts:
+            pick = lambda q: round(rtts[min(len(rtts) - 1, int(q * len(rtts)))] * 1000, 2)
+            out["rtt_ms"] = {"p50": pick(0.5), "p95": pick(0.95), "max": round(rtts[-1] * 1000, 2),
+                             "n": len(rtts)}
+        else:
+            out["rtt_ms"] = None
+        return out
+
+    def close(self):
+        """Close the port for good: the threads exit and queued or in-flight commands fail."""
+        with self._lock:
+            self._closed = True
+            ser, self._ser = self._ser, None
+            self.connected = False
+            pending, self._inflight = list(self._inflight), deque()
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for cmd in pending:
+            cmd.complete("<Serial error: link closed>")
+        if ser is not None:
+            try:
+                ser.close()
+            except serial.SerialException:
+                pass
+
+    # ---------------- Connection ----------------
+    def _connect(self):
+        """Open the port if needed; returns the open Serial or None (rate-limited retries)."""
+        with self._lock:
+            if self._closed:
+                return None
+            if self._ser is not None:
+                return self._ser
+            if time.monotonic() < self._next_attempt:
+                return None
+        try:
+            ser = serial.Serial(self.port, self.baudrate, timeout=READ_TIMEOUT)
+        except (serial.SerialException, OSError) as e:
+            with self._lock:
+                self.last_error = str(e)
+                self._next_attempt = time.monotonic() + self.reconnect_delay
+            return None
+        with self._lock:
+            if self._closed:  # closed while the port was opening
+                ser.close()
+                return None
+            self._ser = ser
+            self.connected = True
+            self.last_error = None
+            self.counters["connects"] += 1
+        threading.Thread(target=self._reader, args=(ser,), daemon=True, name="serial-reader").start()
+        print(f"[SerialLink] Connected to {self.port}")
+        return ser
+
+    def _drop(self, ser, error):
+        """Forget a failed port and fail everything still waiting on it."""
+        with self._lock:
+            if self._ser is not ser:
+                return
+            self._ser = None
+            self.connected = False
+            self.last_error = str(error)
+            self.counters["errors"] += 1
+            self._next_attempt = time.monotonic() + self.reconnect_delay
+            inflight, self._inflight = list(self._inflight), deque()
+        for cmd in inflight:
+            cmd.complete(f"<Serial error: {error}>")
+        try:
+            ser.close()
+        except (serial.SerialException, OSError):
+            pass
+        print(f"[SerialLink] Lost {self.port}: {error}")
+
+    # ---------------- Threads ----------------
+    def _writer(self):
+        while not self._closed:
+            try:
+                cmd = self._queue.get(timeout=self.reconnect_delay)
+            except queue.Empty:
+                self._connect()  # keep the port open (and retrying) while idle
+                continue
+            ser = self._connect()
+            if ser is None:
+                cmd.complete("<Serial error: link closed>" if self._closed else f"<Serial error: {self.last_error}>")
+                continue
+            try:
+                with self._lock:
+                    if self._ser is not ser:  # closed or dropped since _connect
+                        cmd.complete("<Serial error: link closed>")
+                        continue
+                    cmd.sent_at = time.perf_counter()
+                    self._inflight.append(cmd)
+                    self.counters["sent"] += 1
+                ser.write((cmd.text + "\n").encode())
+            except (serial.SerialException, OSError) as e:
+                self._drop(ser, e)
+
+    def _reader(self, ser):
+        while True:
+            with self._lock:
+                if self._ser is not ser:
+                    return
+            try:
+                raw = ser.readline()
+            except (serial.SerialException, OSError, TypeError) as e:
+                self._drop(ser, e)
+                return
+            line = raw.decode(errors="ignore").strip()
+            if line:
+                self._match(line)
+
+    def _match(self, line):
+        now = time.perf_counter()
+        with self._lock:
+            while self._inflight and now - self._inflight[0].sent_at > self.reply_timeout + LATE_REPLY_GRACE:
+                self._inflight.popleft()
+            cmd = pick_command(self._inflight, line)
+            if cmd is None:
+                self.counters["unmatched"] += 1
+                return
+            self._inflight.remove(cmd)
+            cmd.rtt = now - cmd.sent_at
+            self._rtt.append(cmd.rtt)
+            late = cmd.reply is None and cmd.rtt > self.reply_timeout
+            self.counters["late_replies" if late else "replies"] += 1
+        cmd.complete(line)
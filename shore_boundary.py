@@ -1,11 +1,16 @@
 # shore_boundary.py
 # Detects shoreline boundary using camera input to keep the boat within safe water area.
-# Processes frames from /video_feed and returns shoreline mask + danger signal if near boundary.
+# A background loop keeps one /video_feed connection open and analyzes every frame; each result
+# is published as the shore-proximity signal (/shore_status and the /shore_status/stream SSE feed).
 
+import threading
+import time
 import cv2
 import numpy as np
 import requests
+import http_client
 from flask import Flask, Response, jsonify
+from sensor_stream import SampleBroadcaster, sse_response
 
 app = Flask(__name__)
 VIDEO_FEED_URL = "http://localhost:8001/video_feed"
@@ -15,22 +20,33 @@ SHORE_PORT = 8009
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 BORDER_SAFETY_RATIO = 0.15  # % of frame height considered dangerous near top/bottom (shore proximity)
+STALE_AFTER = 1.0           # seconds without an analyzed frame before /shore_status reports an error
+RECONNECT_DELAY = 1.0
 
-# Helper function to fetch a single frame from MJPEG stream
-def fetch_video_frame():
-    try:
-        stream = requests.get(VIDEO_FEED_URL, stream=True, timeout=3)
+broadcaster = SampleBroadcaster()
+latest_mask = {"frame": None}  # last annotated frame, for /shore_mask
+lock = threading.Lock()
+
+# Decoded frames from one long-lived MJPEG connection
+def iter_video_frames():
+    with http_client.get(VIDEO_FEED_URL, "stream", stream=True, timeout=3) as stream:
         byte_data = bytes()
-        for chunk in stream.iter_content(chunk_size=1024):
+        for chunk in stream.iter_content(chunk_size=4096):
             byte_data += chunk
             a = byte_data.find(b'\xff\xd8')
-            b = byte_data.find(b'\xff\xd9')
+            b = byte_data.find(b'\xff\xd9', a + 2) if a != -1 else -1
             if a != -1 and b != -1:
                 jpg = byte_data[a:b+2]
                 byte_data = byte_data[b+2:]
                 frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
-                return frame
-    except:
+                if frame is not None:
+                    yield frame
+
+# Helper function to fetch a single frame from MJPEG stream
+def fetch_video_frame():
+    try:
+        return next(iter_video_frames(), None)
+    except requests.RequestException:
         return None
 
 # Main image processing logic for shoreline detection
@@ -60,29 +76,56 @@ def detect_shore(frame):
 
     return frame, proximity_alert
 
+# Analyze every frame as it arrives and publish the proximity signal
+def shore_loop():
+    count = 0
+    while True:
+        try:
+            for frame in iter_video_frames():
+                captured = time.time()
+                started = time.perf_counter()
+                processed, alert = detect_shore(frame)
+                count += 1
+                with lock:
+                    latest_mask["frame"] = processed
+                broadcaster.publish({"danger": alert, "frame": count, "timestamp": captured,
+                                     "analysis_ms": round((time.perf_counter() - started) * 1000, 2)})
+        except requests.RequestException as e:
+            print(f"[Shore] Video feed error: {e}")
+        time.sleep(RECONNECT_DELAY)
+
+def latest_status():
+    _, sample = broadcaster.latest()
+    if sample is None or time.time() - sample["timestamp"] > STALE_AFTER:
+        return None
+    return sample
+
 @app.route("/shore_mask")
 def shore_mask():
-    frame = fetch_video_frame()
-    if frame is None:
+    with lock:
+        processed = latest_mask["frame"]
+    if processed is None or latest_status() is None:
         return "Could not fetch frame", 500
-
-    processed, alert = detect_shore(frame)
     _, buffer = cv2.imencode(".jpg", processed)
     return Response(buffer.tobytes(), mimetype='image/jpeg')
 
 @app.route("/shore_status")
 def shore_status():
-    frame = fetch_video_frame()
-    if frame is None:
+    sample = latest_status()
+    if sample is None:
         return jsonify({"status": "error", "message": "Frame not available"}), 500
+    return jsonify(sample)
 
-    _, alert = detect_shore(frame)
-    return jsonify({"danger": alert})
+# GET /shore_status/stream → SSE stream pushing the danger flag for every analyzed frame
+@app.route("/shore_status/stream")
+def shore_status_stream():
+    return sse_response(broadcaster)
 
 @app.route("/")
 def index():
-    return "Shoreline boundary detection online. Use /shore_status or /shore_mask"
+    return "Shoreline boundary detection online. Use /shore_status, /shore_status/stream or /shore_mask"
 
 if __name__ == "__main__":
     print(f"🌊 Shore boundary detector running at http://0.0.0.0:{SHORE_PORT}")
+    threading.Thread(target=shore_loop, daemon=True).start()
     app.run(host="0.0.0.0", port=SHORE_PORT, threaded=True)
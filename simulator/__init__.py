@@ -0,0 +1,10 @@
+# simulator package
+# Local stand-ins for the boat's hardware (camera, ultrasonic GPIO, compass I2C, GPS NMEA serial,
+# ESP32 relay board) driven by a 2D boat model on a simulated clock.
+#   python -m simulator batch --runs 10 --duration 300   stepped episodes, many times real time
+#   python -m simulator live --speed 5                    sensor hosts, navigation and autopilot
+#                                                         served on their usual ports
+
+from simulator.clock import SimClock
+from simulator.world import World
+from simulator.hardware import Hardware
@@ -0,0 +1,26 @@
+# python -m simulator {batch,live} — see simulator/__init__.py
+
+import argparse
+from simulator.batch import run_batch
+from simulator.live import run_live, SERVICES
+
+parser = argparse.ArgumentParser(prog="python -m simulator", description="Simulated pond boat")
+sub = parser.add_subparsers(dest="mode", required=True)
+
+batch = sub.add_parser("batch", help="stepped episodes as fast as possible")
+batch.add_argument("--runs", type=int, default=10)
+batch.add_argument("--duration", type=float, default=300.0, help="simulated seconds per episode")
+batch.add_argument("--seed", type=int, default=0, help="first scenario seed")
+
+live = sub.add_parser("live", help="serve the hosts, navigation and autopilot on simulated hardware")
+live.add_argument("--seed", type=int, default=0)
+live.add_argument("--speed", type=float, default=1.0, help="simulated seconds per wall-clock second")
+live.add_argument("--transport", choices=["serial", "http"], default="serial")
+live.add_argument("--engage", action="store_true", help="engage the autopilot at start")
+live.add_argument("--services", nargs="+", choices=[name for name, _, _ in SERVICES])
+
+args = parser.parse_args()
+if args.mode == "batch":
+    run_batch(args.runs, args.duration, args.seed)
+else:
+    run_live(args.seed, args.speed, args.transport, args.engage, args.services)
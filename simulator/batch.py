@@ -0,0 +1,137 @@
+# simulator/batch.py
+# Faster-than-real-time episodes on a stepped clock: the real navigation_core decision logic and
+# the real autopilot control tick drive pondbot_motor_control, whose serial commands reach the
+# simulated relay board. Sensor values come straight from the World in the shape each host serves,
+# so no Flask services or threads are involved and an episode runs as fast as the CPU allows.
+
+import importlib
+import os
+import tempfile
+import time
+import mission_log
+from simulator.clock import SimClock
+from simulator.hardware import Hardware
+from simulator.world import World
+from simulator import camera
+
+DECISION_RATE_HZ = 10
+ULTRASONIC_PERIOD = 0.2   # ultrasonic_host sweep interval
+GPS_PERIOD = 0.2          # 5 Hz fixes
+
+class CoverageError(RuntimeError):
+    """A batch whose decisions never left vision_only did not test the sensor decision path."""
+
+class SensorFeed:
+    """Latest readings per source, refreshed at each host's own rate (like the sensor hub).
+
+    Every refreshed reading goes to the mission log, so an episode can be replayed (mission_replay).
+    """
+
+    def __init__(self, world, clock):
+        self.world, self.clock = world, clock
+        self.next = {"ultrasonic": 0.0, "gps": 0.0}
+        self.values = {}
+        self.times = {}
+
+    def read(self):
+        t = self.clock.elapsed()
+        if t >= self.next["ultrasonic"]:
+            self.values["ultrasonic"] = self.world.ultrasonic_cm(t)
+            self.times["ultrasonic"] = self.clock.time()
+            self.next["ultrasonic"] = t + ULTRASONIC_PERIOD
+        if t >= self.next["gps"]:
+            self.values["gps"] = self.world.gps(t)
+            self.times["gps"] = self.clock.time()
+            self.next["gps"] = t + GPS_PERIOD
+        self.values["compass"] = self.world.compass(t)
+        self.values["direction"] = {"direction": camera.waste_direction(self.world.visible_waste(t))}
+        self.times["compass"] = self.times["direction"] = self.clock.time()
+        for name, sampled in self.times.items():
+            if sampled == self.clock.time():
+                mission_log.record_sample(name, self.values[name])
+        return dict(self.values), {"stale": [], "timed_out": [], "input_times": dict(self.times)}
+
+def _load_stack(hardware, workdir):
+    """Import (or re-point) motor control, navigation_core and autopilot at this episode's hardware."""
+    motor_port = os.path.join(workdir, "ttyUSB0")
+    open(motor_port, "a").close()  # is_serial_connected() checks that the port exists
+    hardware.install(motor_port)
+    motor = importlib.import_module("pondbot_motor_control")
+    motor.SERIAL_PORT = motor_port
+    navigation_core = importlib.import_module("navigation_core")
+    autopilot = importlib.import_module("autopilot")
+    return motor, navigation_core, autopilot
+
+def run_episode(seed=0, duration=300.0, world=None, workdir=None):
+    """Simulate `duration` seconds; returns the world summary plus decision and timing stats."""
+    from occupancy_grid import OccupancyGrid
+
+    world = world or World.random(seed)
+    clock = SimClock(speed=None).install()
+    workdir = workdir or tempfile.mkdtemp(prefix="boat_sim_")
+    try:
+        hardware = Hardware(world, clock)
+        motor, navigation_core, autopilot = _load_stack(hardware, workdir)
+        log = mission_log.start(workdir, role=f"batch_seed{seed}")
+        feed = SensorFeed(world, clock)
+        navigation_core.gather_sensors = feed.read
+        navigation_core.pond_fence = world.fence
+        navigation_core.grid = OccupancyGrid()
+        navigation_core.grid_input["ultrasonic"] = None
+        autopilot.status.update(engaged=True, watchdog_tripped=False, command=None, commands_sent=0, ticks=0)
+
+        modes = {}
+        period = 1.0 / DECISION_RATE_HZ
+        started = time.perf_counter()
+        seq = 0
+        while clock.elapsed() < duration:
+            tick = clock.elapsed()
+            decision, inputs = navigation_core.compute_decision()
+            seq += 1
+            decision.update(seq=seq, timestamp=clock.time(), inputs=inputs)
+            mission_log.record_decision(decision)
+            modes[decision["mode"]] = modes.get(decision["mode"], 0) + 1
+            with autopilot.lock:
+                autopilot.latest_decision.update(decision=decision, received=clock.time())
+            autopilot.control_tick()
+            clock.sleep_until(tick + period)
+        wall = time.perf_counter() - started
+        world.advance(clock.elapsed())
+
+        summary = world.summary()
+        summary.update(
+            seed=seed,
+            decisions=seq,
+            modes=modes,
+            relay_commands=hardware.relay.commands,
+            wall_time_s=round(wall, 2),
+            speedup=round(clock.elapsed() / wall, 1) if wall > 0 else None,
+            mission_log=log.path,
+        )
+        log.flush()
+        return summary
+    finally:
+        SimClock.uninstall()
+
+def run_batch(runs=10, duration=300.0, first_seed=0):
+    """Run `runs` seeded episodes and print one line each plus totals.
+
+    Raises CoverageError if no episode made a single decision outside vision_only: the ultrasonic,
+    grid and geofence path would then have gone untested without anything looking wrong.
+    """
+    results = []
+    for seed in range(first_seed, first_seed + runs):
+        r = run_episode(seed, duration)
+        results.append(r)
+        print(f"seed {seed:3d}: {r['waste_collected']:2d}/{r['waste_total']} waste, "
+              f"{r['collisions']:2d} collisions, {r['distance_m']:6.1f} m, "
+              f"{r['relay_commands']:4d} relay cmds, {r['speedup']:6.1f}x real time, modes {r['modes']}")
+    sim = sum(r["sim_time_s"] for r in results)
+    wall = sum(r["wall_time_s"] for r in results)
+    print(f"total: {sim:.0f} simulated s in {wall:.1f} s wall ({sim / wall if wall else 0:.0f}x), "
+          f"{sum(r['waste_collected'] for r in results)} waste, "
+          f"{sum(r['collisions'] for r in results)} collisions")
+    if results and not any(set(r["modes"]) - {"vision_only"} for r in results):
+        raise CoverageError(f"all {sum(r['decisions'] for r in results)} decisions were vision_only; "
+                            "the sensor decision path was not exercised")
+    return results
@@ -0,0 +1,57 @@
+# simulator/camera.py
+# Synthetic forward camera: renders pond frames (water, shoreline band, waste blobs) with numpy
+# only, and computes the waste direction the way waste_detector.navigate would bin those blobs,
+# so batch runs can skip rendering and contour detection entirely.
+
+import math
+import numpy as np
+
+FRAME_WIDTH, FRAME_HEIGHT = 640, 480
+FOV_DEG = 66.0
+HORIZON_Y = 180
+WASTE_SIZE_M = 0.3
+MIN_CONTOUR_AREA = 500          # waste_detector ignores smaller contours
+SHORE_VIEW_M = 6.0              # shoreline closer than this fills the top of the frame
+
+WATER_BGR = (140, 100, 40)      # dominant blue, excluded by waste_detector as background
+SKY_BGR = (235, 206, 135)
+SHORE_BGR = (40, 110, 60)
+WASTE_BGR = ((40, 40, 220), (40, 220, 230), (245, 245, 245))  # red, yellow, white
+
+_focal = (FRAME_WIDTH / 2) / math.tan(math.radians(FOV_DEG / 2))
+
+def project(items):
+    """[(relative bearing °, distance m)] → [(cx, cy, radius px)] for blobs large enough to detect."""
+    blobs = []
+    for rel, dist in items:
+        cx = FRAME_WIDTH / 2 + _focal * math.tan(math.radians(rel))
+        radius = _focal * WASTE_SIZE_M / 2 / dist
+        cy = HORIZON_Y + _focal * 0.6 / dist  # camera ~0.6 m above the water
+        if math.pi * radius * radius >= MIN_CONTOUR_AREA and cy < FRAME_HEIGHT:
+            blobs.append((cx, cy, radius))
+    return blobs
+
+def waste_direction(items):
+    """Direction waste_detector.navigate returns for these items (its thirds binning, fewest wins)."""
+    bins = {"LEFT": 0, "FORWARD": 0, "RIGHT": 0}
+    for cx, _, _ in project(items):
+        if cx < FRAME_WIDTH / 3:
+            bins["RIGHT"] += 1
+        elif cx < 2 * FRAME_WIDTH / 3:
+            bins["FORWARD"] += 1
+        else:
+            bins["LEFT"] += 1
+    return min(bins, key=bins.get)
+
+def render(items, shore_distance=None):
+    """BGR frame with sky, optional shoreline band, water and waste blobs."""
+    frame = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    frame[:HORIZON_Y] = SKY_BGR
+    frame[HORIZON_Y:] = WATER_BGR
+    if shore_distance is not None and shore_distance < SHORE_VIEW_M:
+        band = int(HORIZON_Y + _focal * 0.6 / max(shore_distance, 0.3))
+        frame[HORIZON_Y - 20:min(band, FRAME_HEIGHT)] = SHORE_BGR
+    yy, xx = np.ogrid[:FRAME_HEIGHT, :FRAME_WIDTH]
+    for i, (cx, cy, radius) in enumerate(project(items)):
+        frame[(xx - cx) ** 2 + (yy - cy) ** 2 <= radius * radius] = WASTE_BGR[i % len(WASTE_BGR)]
+    return frame
@@ -0,0 +1,66 @@
+# simulator/clock.py
+# Simulated time for the boat stack. install() swaps time.time / time.monotonic / time.sleep so
+# every module that calls them (sensor loops, decision loop, autopilot, motor control) runs on it.
+#
+#   SimClock(speed=20)    scaled: simulated time runs 20x faster than the wall clock (threads OK)
+#   SimClock(speed=None)  stepped: sleep() advances time instantly; for single-threaded batch runs
+
+import threading
+import time
+
+EPOCH = 1_700_000_000.0  # simulated unix time at start, so timestamps look like real ones
+
+_real_time, _real_monotonic, _real_sleep = time.time, time.monotonic, time.sleep
+
+class SimClock:
+    def __init__(self, speed=None, start=EPOCH):
+        self.speed = speed
+        self._start = start
+        self._lock = threading.Lock()
+        self._now = 0.0                      # stepped mode: seconds since start
+        self._real_origin = _real_monotonic()  # scaled mode: wall-clock origin
+
+    @property
+    def stepped(self):
+        return self.speed is None
+
+    def elapsed(self):
+        """Simulated seconds since the clock started."""
+        if self.stepped:
+            with self._lock:
+                return self._now
+        return (_real_monotonic() - self._real_origin) * self.speed
+
+    def time(self):
+        return self._start + self.elapsed()
+
+    def monotonic(self):
+        return self.elapsed()
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        if self.stepped:
+            with self._lock:
+                self._now += seconds
+        else:
+            _real_sleep(seconds / self.speed)
+
+    def sleep_until(self, elapsed):
+        self.sleep(elapsed - self.elapsed())
+
+    # ---------------- Patching ----------------
+    def install(self):
+        time.time, time.monotonic, time.sleep = self.time, self.monotonic, self.sleep
+        return self
+
+    @staticmethod
+    def uninstall():
+        time.time, time.monotonic, time.sleep = _real_time, _real_monotonic, _real_sleep
+
+def real_time():
+    """Wall-clock time, unaffected by an installed SimClock."""
+    return _real_time()
+
+def real_sleep(seconds):
+    _real_sleep(seconds)
@@ -0,0 +1,442 @@
+# simulator/hardware.py
+# Stand-ins for every hardware dependency, registered in sys.modules before the hosts import them:
+#   RPi.GPIO                          HC-SR04 trigger/echo timing from World.ultrasonic_m
+#   board, busio, adafruit_hmc5883l   magnetometer readings from World.magnetic
+#   serial                            /dev/serial0 → NMEA receiver, motor port → ESP32 relay board
+#   picamera2                         synthetic frames from simulator.camera at 30 fps
+# plus an HTTP server speaking the ESP32's /relay?i=&a=&b= protocol.
+
+import datetime
+import math
+import os
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from simulator import camera
+
+# Wiring from ultrasonic_host.sensors: trigger pin → sensor, echo pin → sensor
+TRIGGER_PINS = {5: "front", 13: "left", 16: "right", 21: "back", 17: "dustbin"}
+ECHO_PINS = {6: "front", 19: "left", 20: "right", 26: "back", 27: "dustbin"}
+SPEED_OF_SOUND = 343.0
+NO_ECHO_PULSE = 0.038       # HC-SR04 holds echo high this long when nothing is in range
+GPIO_POLL_STEP = 5e-6       # stepped clock: each GPIO.input() read takes this long
+STEPPED_READ_WAIT = 0.05    # stepped clock: real seconds an idle serial readline() blocks
+
+GPS_PORT = "/dev/serial0"
+GPS_RATE_HZ = 5
+CAMERA_FPS = 30
+
+# ESP32 relay protocol: relay index order and (a, b) pin states per action
+RELAY_NAMES = ["p_right", "p_left", "bin_hoist", "conv_move", "conv_hoist", "magnet_hoist"]
+RELAY_ACTIONS = {(1, 0): "fwd", (0, 1): "rev", (1, 1): "stop"}
+
+class SerialException(IOError):
+    pass
+
+# ---------------------------- ESP32 Relay Board ----------------------------
+class RelayBoard:
+    """Applies relay commands to the world and keeps a command log for assertions and stats."""
+
+    def __init__(self, world, clock):
+        self.world, self.clock = world, clock
+        self.commands = 0
+        self.log = []  # (sim time, name, action)
+
+    def apply(self, name, action, t=None):
+        if name not in RELAY_NAMES or action not in RELAY_ACTIONS.values():
+            return f"ERR {name} {action}"
+        t = self.clock.elapsed() if t is None else t
+        self.world.set_relay(name, action, t)
+        self.commands += 1
+        self.log.append((round(t, 3), name, action))
+        if len(self.log) > 10000:
+            del self.log[:5000]
+        return f"OK {name} {action}"
+
+    def apply_batch(self, pairs):
+        """Several relays switched at one instant; nothing is applied if any pair is invalid."""
+        bad = [f"{n} {a}" for n, a in pairs if n not in RELAY_NAMES or a not in RELAY_ACTIONS.values()]
+        if bad:
+            return "ERR " + "; ".join(bad)
+        t = self.clock.elapsed()
+        return "; ".join(self.apply(n, a, t) for n, a in pairs)
+
+    @staticmethod
+    def framed(seq, reply):
+        """`#<seq> ACK <reply>` / `#<seq> NAK <reply>` (motor_protocol framing)."""
+        return f"#{seq} {'NAK' if reply.startswith('ERR') else 'ACK'} {reply}"
+
+    def serial_line(self, line):
+        """`[#<seq> ]<device> <action>[; <device> <action>...]` as sent by pondbot_motor_control."""
+        tag, _, rest = line.partition(" ")
+        if tag.startswith("#") and tag[1:].isdigit():
+            return self.framed(tag[1:], self.serial_line(rest))
+        parts = [p.split() for p in line.split(";") if p.strip()]
+        if not parts or any(len(p) != 2 for p in parts):
+            return f"ERR {line}"
+        return self.apply(*parts[0]) if len(parts) == 1 else self.apply_batch(parts)
+
+    def http_relay(self, i, a, b):
+        action = RELAY_ACTIONS.get((a, b))
+        if not 0 <= i < len(RELAY_NAMES) or action is None:
+            return "ERR"
+        return self.apply(RELAY_NAMES[i], action)
+
+    def http_relays(self, query):
+        """`/relays?r<i>=<a><b>&...` → one batch."""
+        pairs = []
+        for key, value in query.items():
+            i = int(key[1:]) if key[:1] == "r" and key[1:].isdigit() else -1
+            action = RELAY_ACTIONS.get(tuple(int(c) for c in value)) if len(value) == 2 and value.isdigit() else None
+            if not 0 <= i < len(RELAY_NAMES) or action is None:
+                return "ERR"
+            pairs.append((RELAY_NAMES[i], action))
+        return self.apply_batch(pairs) if pairs else "ERR"
+
+class EspHttpServer:
+    """Simulated ESP32 web server on localhost (GET /relay?i=&a=&b=, /relays?r<i>=<a><b>, GET / for pings)."""
+
+    def __init__(self, board, port=0):
+        def respond(handler, code, text):
+            body = text.encode()
+            handler.send_response(code)
+            handler.send_header("Content-Type", "text/plain")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real board
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                seq = q.pop("seq", None)
+                if url.path in ("/relay", "/relays"):
+                    if url.path == "/relay":
+                        try:
+                            reply = board.http_relay(int(q["i"]), int(q["a"]), int(q["b"]))
+                        except (KeyError, ValueError):
+                            reply = "ERR"
+                    else:
+                        reply = board.http_relays(q)
+                    code = 400 if reply.startswith("ERR") else 200
+                    respond(self, code, board.framed(seq, reply) if seq is not None else reply)
+                else:
+                    respond(self, 200, "ESP32 relay (simulated)")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="sim-esp32").start()
+        return self
+
+# ---------------------------- Serial Devices ----------------------------
+class _Device:
+    """Line-oriented device behind a FakeSerial; subclasses fill `_pending` with reply lines."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._pending = []
+        self._cond = threading.Condition()
+        self._notify = None  # (r, w) pipe, readable while replies are pending (for select/asyncio)
+
+    def write(self, data):
+        pass
+
+    def fileno(self):
+        with self._cond:
+            if self._notify is None:
+                self._notify = os.pipe()
+                os.set_blocking(self._notify[0], False)
+                if self._pending:
+                    os.write(self._notify[1], b"\0")
+            return self._notify[0]
+
+    def _drained(self):
+        # caller holds _cond; keeps the pipe readable exactly while something is pending
+        if self._notify is not None and not self._pending:
+            try:
+                while os.read(self._notify[0], 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def _reply(self, line):
+        with self._cond:
+            if self._notify is not None and not self._pending:
+                os.write(self._notify[1], b"\0")
+            self._pending.append(line.encode() + b"\r\n")
+            self._cond.notify_all()
+
+    def readline(self, timeout):
+        if self.clock.stepped:
+            # A background reader (the motor SerialLink) polls here; advancing simulated time
+            # from it would race the episode loop, so wait for a reply in real time instead.
+            with self._cond:
+                if not self._pending:
+                    self._cond.wait(STEPPED_READ_WAIT)
+                line = self._pending.pop(0) if self._pending else b""
+                self._drained()
+                return line
+        deadline = self.clock.elapsed() + (timeout if timeout is not None else 1e9)
+        while True:
+            with self._cond:
+                if self._pending:
+                    line = self._pending.pop(0)
+                    self._drained()
+                    return line
+            if self.clock.elapsed() >= deadline:
+                return b""
+            self.clock.sleep(min(0.01, deadline - self.clock.elapsed()))
+
+    def read_all(self):
+        with self._cond:
+            data, self._pending = b"".join(self._pending), []
+            self._drained()
+        return data
+
+    def read(self, size):
+        with self._cond:
+            data = b"".join(self._pending)
+            self._pending = [data[size:]] if len(data) > size else []
+            self._drained()
+        return data[:size]
+
+    def in_waiting(self):
+        with self._cond:
+            return sum(len(line) for line in self._pending)
+
+class RelayDevice(_Device):
+    def __init__(self, clock, board):
+        super().__init__(clock)
+        self.board = board
+        self._buffer = b""
+
+    def write(self, data):
+        self._buffer += data
+        while b"\n" in self._buffer:
+            line, self._buffer = self._buffer.split(b"\n", 1)
+            line = line.decode(errors="ignore").strip()
+            if line:
+                self._reply(self.board.serial_line(line))
+
+class GpsDevice(_Device):
+    """NMEA receiver emitting GGA/GSA/RMC/VTG every 1/GPS_RATE_HZ seconds of simulated time."""
+
+    def __init__(self, clock, world):
+        super().__init__(clock)
+        self.world = world
+        self._next_epoch = clock.elapsed()
+
+    def readline(self, timeout):
+        with self._cond:
+            if self._pending:
+                line = self._pending.pop(0)
+                self._drained()
+                return line
+        wait = self._next_epoch - self.clock.elapsed()
+        if timeout is not None and wait > timeout:
+            self.clock.sleep(timeout)
+            return b""
+        self.clock.sleep(wait)
+        self._next_epoch = max(self._next_epoch + 1.0 / GPS_RATE_HZ, self.clock.elapsed())
+        for sentence in nmea_epoch(self.world.gps(self.clock.elapsed()), self.clock.time()):
+            self._reply(sentence)
+        return super().readline(timeout)
+
+def _checksum(body):
+    c = 0
+    for ch in body.encode("ascii"):
+        c ^= ch
+    return f"${body}*{c:02X}"
+
+def _dm(value, deg_digits):
+    value = abs(value)
+    degrees = int(value)
+    return f"{degrees:0{deg_digits}d}{(value - degrees) * 60:07.4f}"
+
+def nmea_epoch(fix, unix_time):
+    """One fix epoch as NMEA sentences."""
+    utc = datetime.datetime.fromtimestamp(unix_time, datetime.timezone.utc)
+    hms, dmy = utc.strftime("%H%M%S.") + f"{utc.microsecond // 10000:02d}", utc.strftime("%d%m%y")
+    lat = f"{_dm(fix['lat'], 2)},{'N' if fix['lat'] >= 0 else 'S'}"
+    lon = f"{_dm(fix['lon'], 3)},{'E' if fix['lon'] >= 0 else 'W'}"
+    knots, kmh = fix["speed"] / 0.514444, fix["speed"] * 3.6
+    return [
+        _checksum(f"GPGGA,{hms},{lat},{lon},1,09,0.9,12.0,M,-80.0,M,,"),
+        _checksum("GPGSA,A,3,01,03,07,08,11,17,19,22,28,,,,1.6,0.9,1.3"),
+        _checksum(f"GPRMC,{hms},A,{lat},{lon},{knots:.2f},{fix['course']:.1f},{dmy},,,A"),
+        _checksum(f"GPVTG,{fix['course']:.1f},T,,M,{knots:.2f},N,{kmh:.2f},K,A"),
+    ]
+
+class FakeSerial:
+    """pyserial.Serial look-alike routed to the simulated device registered for `port`."""
+
+    devices = {}  # port → _Device
+
+    def __init__(self, port=None, baudrate=9600, timeout=None, **kwargs):
+        if port not in self.devices:
+            raise SerialException(f"could not open port {port}: [Errno 2] No such file or directory")
+        self.port, self.baudrate, self.timeout = port, baudrate, timeout
+        self.is_open = True
+
+    @property
+    def _device(self):
+        # Looked up per call: batch episodes register fresh devices while the motor link stays open.
+        device = self.devices.get(self.port)
+        if device is None or not self.is_open:
+            raise SerialException(f"device disconnected: {self.port}")
+        return device
+
+    def write(self, data):
+        self._device.write(data)
+        return len(data)
+
+    def readline(self):
+        return self._device.readline(self.timeout)
+
+    def read_all(self):
+        return self._device.read_all()
+
+    def read(self, size=1):
+        return self._device.read(size)
+
+    def fileno(self):
+        return self._device.fileno()
+
+    @property
+    def in_waiting(self):
+        return self._device.in_waiting()
+
+    def reset_input_buffer(self):
+        self._device.read_all()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------------------- GPIO / I2C / Camera ----------------------------
+def _gpio_module(world, clock):
+    gpio = types.ModuleType("RPi.GPIO")
+    gpio.BCM, gpio.BOARD, gpio.OUT, gpio.IN, gpio.HIGH, gpio.LOW = 11, 10, 0, 1, 1, 0
+    echoes = {}  # echo pin → (rise, fall) in simulated seconds
+    levels = {}
+
+    def output(pin, value):
+        was_high = levels.get(pin, False)
+        levels[pin] = bool(value)
+        if pin in TRIGGER_PINS and was_high and not value:  # falling edge fires the burst
+            name = TRIGGER_PINS[pin]
+            t = clock.elapsed()
+            d = world.ultrasonic_m(name, t)
+            rise = t + 0.0002
+            echo = next(p for p, n in ECHO_PINS.items() if n == name)
+            if d is None:  # dropout: the echo line never rises, so ultrasonic_host reports a failure
+                echoes[echo] = (0.0, 0.0)
+            else:
+                echoes[echo] = (rise, rise + (NO_ECHO_PULSE if d == math.inf else 2 * d / SPEED_OF_SOUND))
+
+    def input(pin):
+        if clock.stepped:
+            clock.sleep(GPIO_POLL_STEP)
+        rise, fall = echoes.get(pin, (0.0, 0.0))
+        return 1 if rise <= clock.elapsed() < fall else 0
+
+    gpio.setmode = gpio.setwarnings = lambda *a, **k: None
+    gpio.setup = lambda *a, **k: None
+    gpio.cleanup = lambda *a, **k: None
+    gpio.output, gpio.input = output, input
+    return gpio
+
+def _compass_modules(world, clock):
+    board = types.ModuleType("board")
+    board.SCL, board.SDA = "SCL", "SDA"
+    busio = types.ModuleType("busio")
+    busio.I2C = lambda scl, sda, **kwargs: (scl, sda)
+    hmc = types.ModuleType("adafruit_hmc5883l")
+    hmc.DATARATE_75_HZ = 6
+
+    class HMC5883L:
+        def __init__(self, i2c):
+            self.data_rate = None
+
+        @property
+        def magnetic(self):
+            return world.magnetic(clock.elapsed())
+
+    hmc.HMC5883L = HMC5883L
+    return board, busio, hmc
+
+def _camera_module(world, clock):
+    module = types.ModuleType("picamera2")
+
+    class Picamera2:
+        def __init__(self, *args, **kwargs):
+            self._next_frame = clock.elapsed()
+
+        def create_video_configuration(self, **kwargs):
+            return kwargs
+
+        def configure(self, config):
+            pass
+
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+        def capture_array(self):
+            clock.sleep_until(self._next_frame)
+            self._next_frame = max(self._next_frame + 1.0 / CAMERA_FPS, clock.elapsed())
+            t = clock.elapsed()
+            frame = camera.render(world.visible_waste(t), world.bow_clearance(t))
+            return frame[..., ::-1].copy()  # RGB; video_host converts it back to BGR
+
+    module.Picamera2 = Picamera2
+    return module
+
+# ---------------------------- Installation ----------------------------
+class Hardware:
+    """Fake hardware for one World; install() must run before the host modules are imported."""
+
+    def __init__(self, world, clock):
+        self.world, self.clock = world, clock
+        self.relay = RelayBoard(world, clock)
+        self.esp = None
+
+    def install(self, motor_port="/dev/ttyUSB0"):
+        rpi = types.ModuleType("RPi")
+        rpi.GPIO = _gpio_module(self.world, self.clock)
+        board, busio, hmc = _compass_modules(self.world, self.clock)
+        serial = types.ModuleType("serial")
+        serial.Serial, serial.SerialException = FakeSerial, SerialException
+        sys.modules.update({
+            "RPi": rpi, "RPi.GPIO": rpi.GPIO, "board": board, "busio": busio,
+            "adafruit_hmc5883l": hmc, "serial": serial,
+            "picamera2": _camera_module(self.world, self.clock),
+        })
+        FakeSerial.devices = {
+            GPS_PORT: GpsDevice(self.clock, self.world),
+            motor_port: RelayDevice(self.clock, self.relay),
+        }
+        return self
+
+    def start_esp_http(self, port=0):
+        self.esp = EspHttpServer(self.relay, port).start()
+        return self.esp.address
@@ -0,0 +1,92 @@
+# simulator/live.py
+# Runs the real services in one process against the simulated hardware, on their usual ports,
+# with a scaled clock. Anything that talks to them over HTTP (dashboards, navigation_server,
+# dumping_sequence, ...) can run unchanged in a separate process.
+
+import importlib
+import inspect
+import os
+import tempfile
+import threading
+from werkzeug.serving import make_server
+from simulator.clock import SimClock, real_sleep
+from simulator.hardware import Hardware
+from simulator.world import World
+
+# (module, port, background loops started like the module's __main__ block)
+SERVICES = [
+    ("video_host", 8001, []),
+    ("ultrasonic_host", 8004, ["sensor_loop"]),
+    ("compass_host", 8005, ["read_heading_loop"]),
+    ("gps_host", 8006, ["gps_loop"]),
+    ("waste_detector", 8002, ["processed_video_stream"]),
+    ("shore_boundary", 8009, ["shore_loop"]),
+    ("navigation_core", 8008, ["decision_loop.start"]),
+    ("autopilot", 8011, ["decision_feed", "control_loop"]),
+]
+
+def _resolve(module, path):
+    target = module
+    for part in path.split("."):
+        target = getattr(target, part)
+    return target
+
+def _run_loop(fn):
+    result = fn()
+    if inspect.isgenerator(result):  # e.g. waste_detector's frame processor
+        for _ in result:
+            pass
+
+def start_service(name, port, loops, host="127.0.0.1"):
+    module = importlib.import_module(name)
+    for loop in loops:
+        threading.Thread(target=_run_loop, args=(_resolve(module, loop),), daemon=True,
+                         name=f"sim-{name}-{loop}").start()
+    server = make_server(host, port, module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True, name=f"sim-{name}").start()
+    return module
+
+def run_live(seed=0, speed=1.0, transport="serial", engage=False, services=None, workdir=None):
+    """Start the simulated boat and block forever; `transport` picks serial or ESP32 HTTP relays."""
+    world = World.random(seed)
+    clock = SimClock(speed=speed).install()
+    workdir = workdir or tempfile.mkdtemp(prefix="boat_sim_")
+    os.chdir(workdir)  # track file, calibration and stored points stay out of the source tree
+    hardware = Hardware(world, clock)
+    motor_port = os.path.join(workdir, "ttyUSB0")
+    hardware.install(motor_port)
+    motor = importlib.import_module("pondbot_motor_control")
+    if transport == "http":
+        motor.SERIAL_PORT = os.path.join(workdir, "no-serial")
+        motor.ESP_IP = hardware.start_esp_http()
+    else:
+        open(motor_port, "a").close()
+        motor.SERIAL_PORT = motor_port
+
+    selected = [s for s in SERVICES if services is None or s[0] in services]
+    modules = {name: start_service(name, port, loops) for name, port, loops in selected}
+    navigation_core = modules.get("navigation_core")
+    if navigation_core is not None:
+        navigation_core.pond_fence = world.fence
+    if engage and "autopilot" in modules:
+        autopilot = modules["autopilot"]
+        for _ in range(100):  # engaging before the first decision arrives would trip the watchdog
+            if autopilot.latest_decision["decision"] is not None:
+                break
+            real_sleep(0.1)
+        autopilot.status.update(engaged=True)
+
+    print(f"🛶 Simulated boat (seed {seed}, {speed}x real time, {transport} relays) in {workdir}")
+    for name, port, _ in selected:
+        print(f"   - {name:<16} http://127.0.0.1:{port}")
+    try:
+        while True:
+            real_sleep(5)
+            s = world.summary()
+            print(f"[Sim] t={s['sim_time_s']:.0f}s pos={s['position']} heading={s['heading']} "
+                  f"waste {s['waste_collected']}/{s['waste_total']} collisions {s['collisions']} "
+                  f"relay cmds {hardware.relay.commands}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        SimClock.uninstall()
@@ -0,0 +1,264 @@
+# simulator/world.py
+# 2D pond world: the boat's physics, the pond outline (a geofence.Geofence), obstacles, floating
+# waste, and the sensor models every fake hardware backend reads from. Physics is integrated
+# lazily up to the time a sensor is read or a relay is switched, so the same World works under a
+# stepped clock (batch runs) and a scaled one (live services).
+
+import math
+import random
+import threading
+import numpy as np
+from geofence import Geofence
+from telemetry_codec import NO_ECHO_CM
+
+LAT0, LON0 = 12.9715987, 77.5945627
+M_PER_DEG_LAT = 111320.0
+
+PHYSICS_DT = 0.02        # s
+BOAT_RADIUS_M = 0.9      # collision circle for the 2.5 m x 1.5 m hull
+COLLECT_RADIUS_M = 0.6   # waste within this distance of the bow is scooped up
+
+# Propellers: thrust per relay state and hull response
+THRUST_N = {"fwd": 20.0, "rev": -14.0, "stop": 0.0}
+MASS_KG = 60.0
+YAW_INERTIA = 15.0       # kg·m²
+PROP_ARM_M = 0.5         # propeller offset from the centreline
+DRAG_LINEAR = 8.0        # N per m/s
+DRAG_QUAD = 80.0         # N per (m/s)²
+YAW_DAMPING = 25.0       # N·m per rad/s
+
+# Ultrasonic sensors: mount position (forward, right) in metres and bearing relative to the bow
+ULTRASONIC_MOUNTS = {
+    "front": ((1.25, 0.0), 0.0),
+    "right": ((0.0, 0.75), 90.0),
+    "back": ((-1.25, 0.0), 180.0),
+    "left": ((0.0, -0.75), -90.0),
+}
+ULTRASONIC_MAX_M = 4.0
+ULTRASONIC_BEAM_DEG = (-7.5, 0.0, 7.5)
+ULTRASONIC_NOISE_CM = 1.0
+ULTRASONIC_DROPOUT = 0.02
+BIN_DEPTH_CM = 40.0      # dustbin sensor reads this when empty
+BIN_ITEM_CM = 1.5        # each collected item raises the fill level
+
+# Magnetometer (µT) and GPS noise
+MAG_FIELD_UT = 40.0
+MAG_OFFSET_UT = (6.0, -3.0)   # hard-iron offset, so calibration has something to remove
+COMPASS_NOISE_DEG = 1.0
+GPS_NOISE_M = 0.8
+
+def _to_latlon(x, y):
+    return LAT0 + y / M_PER_DEG_LAT, LON0 + x / (M_PER_DEG_LAT * math.cos(math.radians(LAT0)))
+
+class World:
+    """Pond geometry in geofence-local metres (x east, y north) plus the boat state."""
+
+    def __init__(self, shore, islands=(), obstacles=(), waste=(), start=(0.0, 0.0), heading=0.0, seed=0):
+        # Geometry arrives in metres around (LAT0, LON0) and is re-projected into the fence frame
+        self.fence = Geofence([_to_latlon(*p) for p in shore],
+                              [[_to_latlon(*p) for p in ring] for ring in islands])
+        to_fence = lambda p: self.fence.project(*_to_latlon(*p))
+        self.obstacles = np.array([(*to_fence(c), r) for c, r in obstacles]).reshape(-1, 3)
+        self.waste = np.array([to_fence(p) for p in waste]).reshape(-1, 2)
+        self.collected = np.zeros(len(self.waste), dtype=bool)
+        self.rng = random.Random(seed)
+        self.lock = threading.RLock()
+
+        self.t = 0.0
+        self.x, self.y = to_fence(start)
+        self.heading = heading % 360  # degrees true, clockwise from north
+        self.speed = 0.0              # m/s along the bow
+        self.yaw_rate = 0.0           # rad/s, positive = turning right
+        self.props = {"p_left": "stop", "p_right": "stop"}
+        self.relays = {}
+        self.distance_m = 0.0
+        self.collisions = 0
+        self._touching = False
+
+    # ---------------- Scenarios ----------------
+    @classmethod
+    def random(cls, seed=0, size=(60.0, 40.0), islands=1, obstacles=8, waste=25):
+        """An irregular elliptical pond with round islands, posts and floating waste."""
+        rng = random.Random(seed)
+        a, b = size[0] / 2, size[1] / 2
+        phase = rng.uniform(0, 2 * math.pi)
+        shore = [(a * (1 + 0.08 * math.sin(5 * t + phase)) * math.cos(t),
+                  b * (1 + 0.08 * math.sin(5 * t + phase)) * math.sin(t))
+                 for t in np.linspace(0, 2 * math.pi, 120, endpoint=False)]
+
+        def free_point(margin):
+            while True:
+                x, y = rng.uniform(-a, a) * 0.8, rng.uniform(-b, b) * 0.8
+                if (x / a) ** 2 + (y / b) ** 2 < 0.6 and all(
+                        math.hypot(x - c[0], y - c[1]) > r + margin for c, r in placed):
+                    return x, y
+
+        placed = [((0.0, 0.0), 4.0)]  # keep the start area clear
+        island_rings = []
+        for _ in range(islands):
+            (cx, cy), r = free_point(6.0), rng.uniform(2.0, 4.0)
+            placed.append(((cx, cy), r))
+            island_rings.append([(cx + r * math.cos(t), cy + r * math.sin(t))
+                                 for t in np.linspace(0, 2 * math.pi, 24, endpoint=False)])
+        posts = []
+        for _ in range(obstacles):
+            c, r = free_point(2.0), rng.uniform(0.2, 0.8)
+            placed.append((c, r))
+            posts.append((c, r))
+        items = [free_point(0.5) for _ in range(waste)]
+        return cls(shore, island_rings, posts, items, heading=rng.uniform(0, 360), seed=seed)
+
+    # ---------------- Physics ----------------
+    def set_relay(self, name, action, t):
+        """Apply one relay command at simulated time t (propellers change the boat's thrust)."""
+        with self.lock:
+            self.advance(t)
+            self.relays[name] = action
+            if name in self.props:
+                self.props[name] = action
+
+    def advance(self, t):
+        with self.lock:
+            while self.t + PHYSICS_DT <= t:
+                self._step(PHYSICS_DT)
+
+    def _step(self, dt):
+        left, right = THRUST_N[self.props["p_left"]], THRUST_N[self.props["p_right"]]
+        drag = DRAG_LINEAR * self.speed + DRAG_QUAD * self.speed * abs(self.speed)
+        self.speed += (left + right - drag) / MASS_KG * dt
+        torque = (left - right) * PROP_ARM_M - YAW_DAMPING * self.yaw_rate
+        self.yaw_rate += torque / YAW_INERTIA * dt
+        self.heading = (self.heading + math.degrees(self.yaw_rate * dt)) % 360
+
+        h = math.radians(self.heading)
+        nx, ny = self.x + self.speed * math.sin(h) * dt, self.y + self.speed * math.cos(h) * dt
+        if self._collides(nx, ny):
+            if not self._touching:
+                self.collisions += 1
+            self._touching = True
+            self.speed = 0.0
+        else:
+            self._touching = False
+            self.distance_m += math.hypot(nx - self.x, ny - self.y)
+            self.x, self.y = nx, ny
+            self._collect(h)
+        self.t += dt
+
+    def _collides(self, x, y):
+        status = self.fence.status(*self.fence.unproject(x, y))
+        if not status["inside"] or status["distance_m"] < BOAT_RADIUS_M:
+            return True
+        if len(self.obstacles):
+            gap = np.hypot(self.obstacles[:, 0] - x, self.obstacles[:, 1] - y) - self.obstacles[:, 2]
+            return bool((gap < BOAT_RADIUS_M).any())
+        return False
+
+    def _collect(self, h):
+        if not len(self.waste):
+            return
+        bow = (self.x + 1.25 * math.sin(h), self.y + 1.25 * math.cos(h))
+        near = np.hypot(self.waste[:, 0] - bow[0], self.waste[:, 1] - bow[1]) < COLLECT_RADIUS_M
+        self.collected |= near
+
+    # ---------------- Sensors ----------------
+    def _ray_distance(self, ox, oy, bearing_deg):
+        """Distance along a ray to the first shore/island edge or obstacle (inf if none)."""
+        b = math.radians(bearing_deg)
+        dx, dy = math.sin(b), math.cos(b)
+        e = self.fence.edges
+        ex, ey = e[:, 2] - e[:, 0], e[:, 3] - e[:, 1]
+        denom = dx * ey - dy * ex
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = ((e[:, 0] - ox) * ey - (e[:, 1] - oy) * ex) / denom
+            s = ((e[:, 0] - ox) * dy - (e[:, 1] - oy) * dx) / denom
+        hits = t[(denom != 0) & (t >= 0) & (s >= 0) & (s <= 1)]
+        best = hits.min() if len(hits) else math.inf
+        if len(self.obstacles):
+            cx, cy, r = self.obstacles[:, 0] - ox, self.obstacles[:, 1] - oy, self.obstacles[:, 2]
+            along = cx * dx + cy * dy
+            perp2 = cx * cx + cy * cy - along * along
+            ok = (along > 0) & (perp2 <= r * r)
+            if ok.any():
+                best = min(best, float((along[ok] - np.sqrt(r[ok] ** 2 - perp2[ok])).min()))
+        return best
+
+    def ultrasonic_m(self, name, t):
+        """One echo distance in metres for a sensor: inf if nothing is within range, None on a dropout."""
+        with self.lock:
+            self.advance(t)
+            if name == "dustbin":
+                return max(2.0, BIN_DEPTH_CM - BIN_ITEM_CM * int(self.collected.sum())) / 100.0
+            (fwd, right), rel = ULTRASONIC_MOUNTS[name]
+            h = math.radians(self.heading)
+            ox = self.x + fwd * math.sin(h) + right * math.cos(h)
+            oy = self.y + fwd * math.cos(h) - right * math.sin(h)
+            d = min(self._ray_distance(ox, oy, self.heading + rel + spread) for spread in ULTRASONIC_BEAM_DEG)
+            if self.rng.random() < ULTRASONIC_DROPOUT:
+                return None
+            if d > ULTRASONIC_MAX_M:
+                return math.inf
+            return max(0.02, d + self.rng.gauss(0, ULTRASONIC_NOISE_CM / 100))
+
+    def ultrasonic_cm(self, t):
+        """One sweep as ultrasonic_host reports it: {sensor: cm, NO_ECHO_CM or None}."""
+        sweep = {}
+        for name in list(ULTRASONIC_MOUNTS) + ["dustbin"]:
+            d = self.ultrasonic_m(name, t)
+            sweep[name] = None if d is None else min(NO_ECHO_CM, round(d * 100, 2))
+        return sweep
+
+    def bow_clearance(self, t):
+        """Distance (m) straight ahead of the bow to the shore, an island or an obstacle."""
+        with self.lock:
+            self.advance(t)
+            h = math.radians(self.heading)
+            return self._ray_distance(self.x + 1.25 * math.sin(h), self.y + 1.25 * math.cos(h), self.heading)
+
+    def magnetic(self, t):
+        """(x, y, z) µT as the HMC5883L reports it; heading = atan2(y, x) after calibration."""
+        with self.lock:
+            self.advance(t)
+            h = math.radians(self.heading + self.rng.gauss(0, COMPASS_NOISE_DEG))
+        return (MAG_FIELD_UT * math.cos(h) + MAG_OFFSET_UT[0],
+                MAG_FIELD_UT * math.sin(h) + MAG_OFFSET_UT[1], -20.0)
+
+    def compass(self, t):
+        """Filtered heading as compass_host serves it."""
+        with self.lock:
+            self.advance(t)
+            heading = (self.heading + self.rng.gauss(0, COMPASS_NOISE_DEG)) % 360
+            return {"heading": round(heading, 2), "rate_of_turn": round(math.degrees(self.yaw_rate), 2)}
+
+    def gps(self, t):
+        """Noisy fix → dict with lat, lon, speed (m/s) and course (° true)."""
+        with self.lock:
+            self.advance(t)
+            x = self.x + self.rng.gauss(0, GPS_NOISE_M)
+            y = self.y + self.rng.gauss(0, GPS_NOISE_M)
+            speed, course = abs(self.speed), (self.heading + (180 if self.speed < 0 else 0)) % 360
+        lat, lon = self.fence.unproject(x, y)
+        return {"lat": round(lat, 7), "lon": round(lon, 7), "fix": True, "speed": speed, "course": course}
+
+    def visible_waste(self, t, fov_deg=66.0, max_range=15.0):
+        """Uncollected waste in the camera's view → [(relative bearing °, distance m)]."""
+        with self.lock:
+            self.advance(t)
+            if not len(self.waste):
+                return []
+            dx, dy = self.waste[:, 0] - self.x, self.waste[:, 1] - self.y
+            dist = np.hypot(dx, dy)
+            rel = (np.degrees(np.arctan2(dx, dy)) - self.heading + 180) % 360 - 180
+            ok = ~self.collected & (dist < max_range) & (np.abs(rel) < fov_deg / 2) & (dist > 0.5)
+            return list(zip(rel[ok].tolist(), dist[ok].tolist()))
+
+    def summary(self):
+        with self.lock:
+            return {
+                "sim_time_s": round(self.t, 1),
+                "distance_m": round(self.distance_m, 1),
+                "collisions": self.collisions,
+                "waste_collected": int(self.collected.sum()),
+                "waste_total": int(len(self.waste)),
+                "position": (round(float(self.x), 2), round(float(self.y), 2)),
+                "heading": round(self.heading, 1),
+            }
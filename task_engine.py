@@ -0,0 +1,203 @@
+# task_engine.py
+# Runs autonomous_controller tasks one at a time from a priority queue on a single worker thread.
+# Tasks take a CancelToken and call its checkpoint()/sleep() between steps, so a cancel, an
+# emergency stop or a higher-priority task ends them mid-sequence; the engine then stops the
+# motors. Everything that happens lands in a fixed-size, timestamped EventLog.
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+import mission_log
+
+EVENT_LOG_SIZE = 500      # events kept; older ones fall off
+JOB_HISTORY = 50          # finished jobs kept for /tasks
+CHECKPOINT_INTERVAL = 0.05  # seconds between cancel checks inside CancelToken.sleep
+
+class TaskCancelled(Exception):
+    pass
+
+class CancelToken:
+    """Cooperative cancellation; `is_set()` also makes it usable as waypoint_nav's `cancel`."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def checkpoint(self):
+        if self._event.is_set():
+            raise TaskCancelled(self.reason)
+
+    def sleep(self, seconds):
+        """time.sleep that wakes up to a cancel within CHECKPOINT_INTERVAL."""
+        deadline = time.monotonic() + seconds
+        while True:
+            self.checkpoint()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(CHECKPOINT_INTERVAL, remaining))
+
+class EventLog:
+    """Ring buffer of {"id", "time", "message", ...}; ids keep increasing so clients poll with since=."""
+
+    def __init__(self, size=EVENT_LOG_SIZE):
+        self._events = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def append(self, message, **fields):
+        with self._lock:
+            event = {"id": next(self._ids), "time": time.time(), "message": message, **fields}
+            self._events.append(event)
+        mission_log.record("task", event)
+        return event
+
+    def since(self, event_id=0):
+        with self._lock:
+            return [e for e in self._events if e["id"] > event_id]
+
+    def last_id(self):
+        with self._lock:
+            return self._events[-1]["id"] if self._events else 0
+
+class Job:
+    def __init__(self, job_id, name, priority):
+        self.id, self.name, self.priority = job_id, name, priority
+        self.state = "queued"   # queued → running → completed | failed | cancelled | preempted
+        self.token = CancelToken()
+        self.submitted, self.started, self.finished = time.time(), None, None
+        self.error = None
+
+    def to_dict(self):
+        return {"id": self.id, "task": self.name, "priority": self.priority, "state": self.state,
+                "submitted": self.submitted, "started": self.started, "finished": self.finished,
+                "error": self.error}
+
+class TaskEngine:
+    def __init__(self, tasks, priorities=None, on_stop=None, log=None):
+        self.tasks = tasks                  # name → fn(cancel)
+        self.priorities = priorities or {}  # name → default priority (higher runs first)
+        self.on_stop = on_stop              # called after a task is cancelled or preempted
+        self.log = log or EventLog()
+        self.current = None
+        self.history = deque(maxlen=JOB_HISTORY)
+        self._queue = []                    # (-priority, id, job)
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="task-engine")
+                self._thread.start()
+        return self
+
+    # ---------------- API ----------------
+    def submit(self, name, priority=None):
+        """Queue a task; a higher priority than the running task preempts it."""
+        if name not in self.tasks:
+            raise KeyError(name)
+        self.start()
+        priority = self.priorities.get(name, 0) if priority is None else priority
+        with self._cond:
+            job = Job(next(self._ids), name, priority)
+            heapq.heappush(self._queue, (-priority, job.id, job))
+            running = self.current
+            self._cond.notify()
+        self.log.append(f"Queued: {name}", task=name, job=job.id, priority=priority)
+        if running is not None and priority > running.priority:
+            self._cancel_job(running, "preempted", f"by {name} (job {job.id})")
+        return job
+
+    def cancel(self, job_id=None, reason="cancelled"):
+        """Cancel the running task (or the queued/running job `job_id`); the job, or None."""
+        with self._cond:
+            job = self.current if job_id is None else self._find(job_id)
+        if job is None or job.state not in ("queued", "running"):
+            return None
+        self._cancel_job(job, reason)
+        return job
+
+    def emergency_stop(self):
+        """Drop the queue, cancel the running task and stop the motors now."""
+        with self._cond:
+            queued = [job for _, _, job in self._queue]
+            self._queue.clear()
+            running = self.current
+        for job in queued:
+            self._finish(job, "cancelled", "emergency stop")
+        if running is not None:
+            running.token.cancel("emergency stop")
+        self.log.append("Emergency stop", level="error")
+        if self.on_stop is not None:
+            self.on_stop()
+
+    def snapshot(self):
+        with self._cond:
+            return {"running": self.current.to_dict() if self.current else None,
+                    "queue": [job.to_dict() for _, _, job in sorted(self._queue)],
+                    "history": [job.to_dict() for job in self.history]}
+
+    # ---------------- Internals ----------------
+    def _find(self, job_id):
+        if self.current is not None and self.current.id == job_id:
+            return self.current
+        return next((job for _, _, job in self._queue if job.id == job_id), None)
+
+    def _cancel_job(self, job, reason, detail=""):
+        with self._cond:
+            queued = job.state == "queued"
+            if queued:
+                self._queue = [entry for entry in self._queue if entry[2] is not job]
+                heapq.heapify(self._queue)
+        if queued:
+            self._finish(job, reason, detail or None)
+        else:
+            job.token.cancel(reason)
+            self.log.append(f"Cancelling: {job.name} ({reason}{', ' + detail if detail else ''})",
+                            task=job.name, job=job.id)
+
+    def _finish(self, job, state, error=None):
+        with self._cond:
+            job.state, job.finished, job.error = state, time.time(), error
+            self.history.append(job)
+            if self.current is job:
+                self.current = None
+        message = {"completed": "Completed", "failed": "Error in", "cancelled": "Cancelled",
+                   "preempted": "Preempted"}[state]
+        self.log.append(f"{message}: {job.name}" + (f" ({error})" if error else ""), task=job.name,
+                        job=job.id, level="error" if state == "failed" else "info")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                _, _, job = heapq.heappop(self._queue)
+                job.state, job.started = "running", time.time()
+                self.current = job
+            self.log.append(f"Started: {job.name}", task=job.name, job=job.id)
+            try:
+                self.tasks[job.name](cancel=job.token)
+                job.token.checkpoint()  # a cancel that landed after the last step still counts
+                self._finish(job, "completed")
+            except TaskCancelled as e:
+                if self.on_stop is not None:
+                    self.on_stop()
+                self._finish(job, "preempted" if str(e) == "preempted" else "cancelled",
+                             None if str(e) in ("preempted", "cancelled") else str(e))
+            except Exception as e:
+                if self.on_stop is not None:
+                    self.on_stop()
+                self._finish(job, "failed", str(e))
@@ -0,0 +1,155 @@
+# telemetry_codec.py
+# Compact fixed-layout binary encoding for sensor and decision endpoints, offered alongside JSON.
+# A client asks for it with "Accept: application/x-boat-telemetry" (or ?format=bin) and decodes
+# the reply straight into a namedtuple with decode()/fetch_record().
+
+import math
+import struct
+from collections import namedtuple
+import requests
+import http_client
+from flask import Response, jsonify, request
+
+TELEMETRY_MIME = "application/x-boat-telemetry"
+SCHEMA_VERSION = 3  # v2: heading record carries rate of turn; v3: navigate carries the full /navigate reply
+
+DIRECTIONS = (None, "FORWARD", "LEFT", "RIGHT", "BACK", "STOP")
+MODES = (None, "normal", "vision_fallback", "sensor", "vision_only", "error")
+ULTRASONIC_KEYS = ("front", "left", "right", "back", "dustbin")
+NO_ECHO_CM = 400.0  # distance reported when nothing echoes within range; a failed sensor is None
+STATUS_BITS = ("ultrasonic", "compass", "gps")
+SOURCES = ("direction", "ultrasonic", "compass", "gps")  # stale/timed-out bitmasks and input times
+EDGES = (None, "shore", "island")
+TRISTATE = (None, False, True)
+
+# Every record starts with (schema version, record type); missing numeric values are NaN
+_HEADER = struct.Struct("<BB")
+
+Distance = namedtuple("Distance", ULTRASONIC_KEYS)
+Heading = namedtuple("Heading", ["heading", "rate_of_turn"])
+Location = namedtuple("Location", ["lat", "lon", "fix"])
+Analyze = namedtuple("Analyze", ["direction"])
+Navigate = namedtuple("Navigate", ["direction", "mode", "confidence", "ultrasonic", "compass",
+                                   "gps", "safe", "seq", "timestamp", "compute_ms", "stale_sources",
+                                   "timed_out", "geofence", "inputs", "reason"])
+
+# record type id → (layout after the header, namedtuple)
+# navigate is followed by its UTF-8 reason text, the only variable-length part of any record
+RECORDS = {
+    "distance": (1, struct.Struct("<5f"), Distance),
+    "heading": (2, struct.Struct("<ff"), Heading),
+    "location": (3, struct.Struct("<dd?"), Location),
+    "analyze": (4, struct.Struct("<B"), Analyze),
+    # direction, mode, confidence, status bits, safe, seq, timestamp, compute_ms, stale and
+    # timed-out source bits, geofence (inside, edge, distance_m, bearing), input time per source
+    "navigate": (5, struct.Struct("<BBfBBIdfBBBBff4d"), Navigate),
+}
+_BY_ID = {type_id: (kind, layout, cls) for kind, (type_id, layout, cls) in RECORDS.items()}
+# v2 records still decode (mission logs outlive schema changes); only navigate was shorter
+_NAVIGATE_V2 = struct.Struct("<BBfB")
+
+def _nan(x):
+    return math.nan if x is None else float(x)
+
+def _none(x, ndigits=None):
+    if math.isnan(x):
+        return None
+    return round(x, ndigits) if ndigits is not None else x
+
+def _code(table, value):
+    return table.index(value) if value in table else 0
+
+def _tristate(value):
+    return 0 if value is None else 2 if value else 1
+
+def _bits(names, table=SOURCES):
+    return sum(1 << i for i, name in enumerate(table) if name in (names or ()))
+
+def _names(bits, table=SOURCES):
+    return [name for i, name in enumerate(table) if bits >> i & 1]
+
+# ---------------------------- Encoding ----------------------------
+def encode(kind, data):
+    """Pack an endpoint's JSON-shaped dict into its binary record."""
+    type_id, layout, _ = RECORDS[kind]
+    header = _HEADER.pack(SCHEMA_VERSION, type_id)
+    if kind == "distance":
+        return header + layout.pack(*(_nan(data.get(k)) for k in ULTRASONIC_KEYS))
+    if kind == "heading":
+        return header + layout.pack(_nan(data.get("heading")), _nan(data.get("rate_of_turn")))
+    if kind == "location":
+        return header + layout.pack(_nan(data.get("lat")), _nan(data.get("lon")), bool(data.get("fix")))
+    if kind == "analyze":
+        return header + layout.pack(_code(DIRECTIONS, data.get("direction")))
+    # navigate: navigation_server reports confidence/sensor_status/reason (geofence inside
+    # sensor_status), navigation_core `safe` and a top-level geofence; absent fields stay empty
+    status = data.get("sensor_status") or {}
+    bits = sum(1 << i for i, name in enumerate(STATUS_BITS) if status.get(name))
+    fence = data.get("geofence") or status.get("geofence") or {}
+    inputs = data.get("inputs") or {}
+    return (header +
+            layout.pack(_code(DIRECTIONS, data.get("direction")), _code(MODES, data.get("mode")),
+                        _nan(data.get("confidence")), bits, _tristate(data.get("safe")),
+                        data.get("seq") or 0, _nan(data.get("timestamp")), _nan(data.get("compute_ms")),
+                        _bits(data.get("stale_sources")), _bits(status.get("timed_out")),
+                        _tristate(fence.get("inside")), _code(EDGES, fence.get("edge")),
+                        _nan(fence.get("distance_m")), _nan(fence.get("bearing")),
+                        *(_nan(inputs.get(name)) for name in SOURCES)) +
+            (data.get("reason") or "").encode("utf-8"))
+
+# ---------------------------- Decoding ----------------------------
+def decode(buf):
+    """Unpack a binary record into its namedtuple (Distance, Heading, ...)."""
+    version, type_id = _HEADER.unpack_from(buf, 0)
+    if version not in (2, SCHEMA_VERSION):
+        raise ValueError(f"Unsupported telemetry schema version {version}")
+    kind, layout, cls = _BY_ID[type_id]
+    if kind == "navigate" and version == 2:
+        direction, mode, confidence, bits = _NAVIGATE_V2.unpack_from(buf, _HEADER.size)
+        reason = bytes(buf[_HEADER.size + _NAVIGATE_V2.size:]).decode("utf-8")
+        return Navigate(DIRECTIONS[direction], MODES[mode], _none(confidence),
+                        *(bool(bits >> i & 1) for i in range(len(STATUS_BITS))), None, None, None,
+                        None, [], [], None, {}, reason)
+    fields = layout.unpack_from(buf, _HEADER.size)
+    if kind == "distance":
+        return Distance(*map(_none, fields))
+    if kind == "heading":
+        return Heading(*map(_none, fields))
+    if kind == "location":
+        return Location(_none(fields[0]), _none(fields[1]), fields[2])
+    if kind == "analyze":
+        return Analyze(DIRECTIONS[fields[0]])
+    (direction, mode, confidence, bits, safe, seq, timestamp, compute_ms, stale, timed_out,
+     inside, edge, distance, bearing) = fields[:14]
+    fence = None
+    if inside:
+        fence = {"inside": TRISTATE[inside], "distance_m": _none(distance, 2), "bearing": _none(bearing, 1),
+                 "edge": EDGES[edge]}
+    inputs = {name: _none(t) for name, t in zip(SOURCES, fields[14:])}
+    reason = bytes(buf[_HEADER.size + layout.size:]).decode("utf-8")
+    return Navigate(DIRECTIONS[direction], MODES[mode], _none(confidence),
+                    *(bool(bits >> i & 1) for i in range(len(STATUS_BITS))), TRISTATE[safe],
+                    seq or None, _none(timestamp), _none(compute_ms, 2), _names(stale), _names(timed_out),
+                    fence, inputs, reason)
+
+# ---------------------------- Flask / Client Helpers ----------------------------
+def wants_binary():
+    if request.args.get("format") == "bin":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", TELEMETRY_MIME]) == TELEMETRY_MIME
+
+def respond(kind, data):
+    """JSON by default, the binary record if the client negotiated it."""
+    if wants_binary():
+        return Response(encode(kind, data), mimetype=TELEMETRY_MIME)
+    return jsonify(data)
+
+def fetch_record(url, timeout=1.5, policy="sensor"):
+    """GET `url` asking for the binary encoding; returns the decoded namedtuple or None."""
+    try:
+        r = http_client.get(url, policy, headers={"Accept": TELEMETRY_MIME}, timeout=timeout)
+        if r.status_code != 200 or r.headers.get("Content-Type", "").split(";")[0] != TELEMETRY_MIME:
+            return None
+        return decode(r.content)
+    except (requests.RequestException, ValueError, KeyError, struct.error):
+        return None
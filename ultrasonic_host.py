@@ -2,7 +2,10 @@
 import RPi.GPIO as GPIO
 import time
 import threading
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
+from sensor_history import SampleHistory, median_filter
+from sensor_stream import SampleBroadcaster, sse_response
+from telemetry_codec import respond, NO_ECHO_CM
 
 app = Flask(__name__)
 GPIO.setmode(GPIO.BCM)
@@ -25,39 +28,66 @@ for s in sensors.values():
 distance_data = {key: None for key in sensors}
 lock = threading.Lock()
 
-# Measure distance
+# Recent sweeps for filtering (~50 s at 5 Hz); /distance serves the median of the last few
+HISTORY_SIZE = 256
+MEDIAN_WINDOW = 5
+history = SampleHistory(sensors.keys(), capacity=HISTORY_SIZE)
+broadcaster = SampleBroadcaster()
+
+# Measure distance → cm, NO_ECHO_CM when nothing is within 4 m, None when the sensor failed
 def measure_distance(trigger_pin, echo_pin):
     GPIO.output(trigger_pin, True)
     time.sleep(0.00001)
     GPIO.output(trigger_pin, False)
 
     start_time = time.time()
-    stop_time = time.time()
-
     timeout = start_time + 0.04
-    while GPIO.input(echo_pin) == 0 and time.time() < timeout:
+    while GPIO.input(echo_pin) == 0:
         start_time = time.time()
-    while GPIO.input(echo_pin) == 1 and time.time() < timeout:
+        if start_time >= timeout:
+            return None  # echo never rose: sensor not responding
+    stop_time = start_time
+    while GPIO.input(echo_pin) == 1:
         stop_time = time.time()
+        if stop_time >= timeout:
+            return None  # echo stuck high
 
     elapsed = stop_time - start_time
     distance = round((elapsed * 34300) / 2, 2)  # in cm
-    return distance if distance < 400 else None  # cap at 4m
+    return distance if distance < NO_ECHO_CM else NO_ECHO_CM  # the no-echo pulse (~38 ms) reads past 4 m
 
 # Update readings periodically
 def sensor_loop():
     global distance_data
     while True:
+        sweep = {name: measure_distance(pins["trigger"], pins["echo"])
+                 for name, pins in sensors.items()}
         with lock:
-            for name, pins in sensors.items():
-                dist = measure_distance(pins["trigger"], pins["echo"])
-                distance_data[name] = dist
+            distance_data.update(sweep)
+        history.append(sweep)
+        broadcaster.publish(median_filter(history, MEDIAN_WINDOW))
         time.sleep(0.2)  # Sampling delay
 
+# GET /distance → median of recent sweeps, so one spurious echo or dropout is ignored
+# GET /distance?raw=1 → latest unfiltered sweep
+# Accept: application/x-boat-telemetry → binary record instead of JSON
 @app.route("/distance", methods=["GET"])
 def get_distances():
-    with lock:
-        return jsonify(distance_data)
+    if request.args.get("raw"):
+        with lock:
+            return respond("distance", distance_data)
+    return respond("distance", median_filter(history, MEDIAN_WINDOW))
+
+# GET /distance/stream → SSE stream pushing the filtered distances after every sweep
+@app.route("/distance/stream", methods=["GET"])
+def stream_distances():
+    return sse_response(broadcaster)
+
+# GET /history?since=<unix time> → all buffered sweeps newer than `since`
+@app.route("/history", methods=["GET"])
+def get_history():
+    since = request.args.get("since", default=0.0, type=float)
+    return jsonify(history.history_payload(since))
 
 @app.route("/ping")
 def ping():
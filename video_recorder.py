@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import cv2
 import requests
+import http_client
 import os
 import time
 import numpy as np
@@ -28,8 +29,8 @@ os.makedirs(RECORDING_FOLDER, exist_ok=True)
 # Utility to check stream availability
 def is_stream_live(url):
     try:
-        r = requests.get(url, stream=True, timeout=5)
-        return r.status_code == 200
+        with http_client.get(url, "probe", stream=True, timeout=5) as r:
+            return r.status_code == 200
     except:
         return False
 
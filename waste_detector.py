@@ -4,11 +4,14 @@ import numpy as np
 import requests
 from flask import Flask, jsonify, Response
 import threading
+from sensor_stream import SampleBroadcaster, sse_response
+from telemetry_codec import respond
 
 app = Flask(__name__)
 VIDEO_STREAM_URL = "http://localhost:8001/video_feed"  # From video_host.py
 latest_direction = "FORWARD"
 lock = threading.Lock()
+broadcaster = SampleBroadcaster()
 
 # Waste Detection with dynamic exclusion
 def detect_waste(frame):
@@ -81,6 +84,7 @@ def processed_video_stream():
                 waste_objects = detect_waste(frame)
                 direction = navigate(waste_objects, frame.shape[1])
                 latest_direction = direction
+            broadcaster.publish({"direction": direction})
 
             # Annotate frame
             for cnt in waste_objects:
@@ -108,11 +112,16 @@ def index():
     </html>
     '''
 
-# GET /analyze → returns JSON direction
+# GET /analyze → returns JSON direction (binary record with Accept: application/x-boat-telemetry)
 @app.route("/analyze", methods=["GET"])
 def analyze():
     with lock:
-        return jsonify({"direction": latest_direction})
+        return respond("analyze", {"direction": latest_direction})
+
+# GET /analyze/stream → SSE stream pushing the direction for every analyzed frame
+@app.route("/analyze/stream", methods=["GET"])
+def analyze_stream():
+    return sse_response(broadcaster)
 
 # GET /processed_video → MJPEG stream of annotated frame
 @app.route("/processed_video")
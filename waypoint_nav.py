@@ -0,0 +1,183 @@
+# waypoint_nav.py
+# GPS waypoint following for return-to-home and dump runs.
+# Great-circle bearing/distance to the target, a PID on compass heading error, and a mapping of the
+# PID output onto the on/off p_left/p_right relays. The loop wakes on every compass sample pushed by
+# compass_host (~15 Hz) instead of moving in blocking one-second steps.
+
+import json
+import math
+import threading
+import time
+import pondbot_motor_control as motor
+from sensor_stream import SensorMirror
+
+COMPASS_STREAM_URL = "http://localhost:8005/heading/stream"
+GPS_STREAM_URL = "http://localhost:8006/location/stream"
+POINTS_FILE = "nav_points.json"    # stored "home" and "dump" positions
+
+ARRIVAL_RADIUS_M = 3.0
+COMPASS_MAX_AGE = 0.5   # seconds; older headings stop the boat until a fresh one arrives
+GPS_MAX_AGE = 2.0
+NAV_TIMEOUT = 300       # seconds before a leg is abandoned
+EARTH_RADIUS_M = 6371000.0
+
+# Heading PID (output in [-1, 1], positive = turn right)
+KP, KI, KD = 0.02, 0.002, 0.01
+INTEGRAL_LIMIT = 100.0  # °·s
+STRAIGHT_BAND = 0.25    # |output| below this drives both propellers forward
+SPIN_BAND = 0.7         # |output| above this spins in place (inner propeller reverses)
+
+# ---------------------------- Geodesy ----------------------------
+def haversine_m(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """Great-circle bearing (° true) from point 1 towards point 2."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dl = math.radians(lon2 - lon1)
+    y = math.sin(dl) * math.cos(p2)
+    x = math.cos(p1) * math.sin(p2) - math.sin(p1) * math.cos(p2) * math.cos(dl)
+    return math.degrees(math.atan2(y, x)) % 360
+
+def wrap180(angle):
+    return (angle + 180) % 360 - 180
+
+# ---------------------------- Control ----------------------------
+class HeadingPID:
+    """PID on heading error; the D term uses the compass rate of turn when available."""
+
+    def __init__(self, kp=KP, ki=KI, kd=KD, integral_limit=INTEGRAL_LIMIT):
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.prev_error = None
+
+    def update(self, error, dt, rate_of_turn=None):
+        self.integral = max(-self.integral_limit, min(self.integral_limit, self.integral + error * dt))
+        if rate_of_turn is not None:
+            derivative = -rate_of_turn  # d(error)/dt for a fixed target bearing
+        elif self.prev_error is None or dt <= 0:
+            derivative = 0.0
+        else:
+            derivative = wrap180(error - self.prev_error) / dt
+        self.prev_error = error
+        out = self.kp * error + self.ki * self.integral + self.kd * derivative
+        return max(-1.0, min(1.0, out))
+
+def propeller_actions(output):
+    """PID output → (p_left action, p_right action) for the on/off relays."""
+    if abs(output) < STRAIGHT_BAND:
+        return "fwd", "fwd"
+    inner = "rev" if abs(output) >= SPIN_BAND else "stop"
+    return ("fwd", inner) if output > 0 else (inner, "fwd")
+
+# ---------------------------- Stored Points ----------------------------
+def load_points():
+    try:
+        with open(POINTS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_point(name, lat, lon):
+    points = load_points()
+    points[name] = {"lat": lat, "lon": lon}
+    with open(POINTS_FILE, "w") as f:
+        json.dump(points, f, indent=2)
+
+# ---------------------------- Navigator ----------------------------
+class WaypointNavigator:
+    def __init__(self, arrival_radius=ARRIVAL_RADIUS_M):
+        self.arrival_radius = arrival_radius
+        self.pid = HeadingPID()
+        self.status = {"target": None, "distance_m": None, "bearing": None, "heading_error": None,
+                       "actions": None, "leg": None}
+        self._heading_event = threading.Event()
+        self.compass = SensorMirror(COMPASS_STREAM_URL, on_update=lambda _: self._heading_event.set()).start()
+        self.gps = SensorMirror(GPS_STREAM_URL).start()
+        self._actions = None
+
+    def _drive(self, actions):
+        if actions != self._actions:
+            motor.control_devices({"p_left": actions[0], "p_right": actions[1]})
+            self._actions = actions
+            self.status["actions"] = actions
+
+    def stop(self):
+        self._drive(("stop", "stop"))
+
+    def go_to(self, lat, lon, timeout=NAV_TIMEOUT, cancel=None):
+        """Steer to (lat, lon); True once within the arrival radius, False on timeout or cancel."""
+        self.pid.reset()
+        self._actions = None
+        self.status["target"] = {"lat": lat, "lon": lon}
+        deadline = time.monotonic() + timeout
+        last = None
+        try:
+            while time.monotonic() < deadline:
+                if cancel is not None and cancel.is_set():
+                    return False
+                self._heading_event.wait(COMPASS_MAX_AGE)
+                self._heading_event.clear()
+                compass = self.compass.get(COMPASS_MAX_AGE)
+                gps = self.gps.get(GPS_MAX_AGE)
+                if not compass or compass.get("heading") is None or not gps or not gps.get("fix"):
+                    self.stop()  # hold position until both sensors are fresh again
+                    last = None
+                    continue
+
+                distance = haversine_m(gps["lat"], gps["lon"], lat, lon)
+                bearing = initial_bearing(gps["lat"], gps["lon"], lat, lon)
+                error = wrap180(bearing - compass["heading"])
+                self.status.update(distance_m=round(distance, 1), bearing=round(bearing, 1),
+                                   heading_error=round(error, 1))
+                if distance <= self.arrival_radius:
+                    return True
+
+                now = time.monotonic()
+                dt = 0.0 if last is None else now - last
+                last = now
+                self._drive(propeller_actions(self.pid.update(error, dt, compass.get("rate_of_turn"))))
+            return False
+        finally:
+            self.stop()
+
+    def follow(self, waypoints, cancel=None):
+        """Visit (lat, lon) waypoints in order; False as soon as one leg fails."""
+        for i, (lat, lon) in enumerate(waypoints):
+            self.status["leg"] = f"{i + 1}/{len(waypoints)}"
+            if not self.go_to(lat, lon, cancel=cancel):
+                return False
+        return True
+
+_navigator = None
+
+def navigator():
+    """Shared navigator, started on first use so importing this module opens no streams."""
+    global _navigator
+    if _navigator is None:
+        _navigator = WaypointNavigator()
+    return _navigator
+
+def go_to_point(name, cancel=None):
+    """Navigate to a stored point ("home" or "dump"); False if it is not set or not reached."""
+    point = load_points().get(name)
+    if point is None:
+        print(f"⚠️ No '{name}' point stored in {POINTS_FILE}")
+        return False
+    print(f"🧭 Heading to {name} ({point['lat']:.6f}, {point['lon']:.6f})")
+    reached = navigator().go_to(point["lat"], point["lon"], cancel=cancel)
+    print(f"✅ Reached {name}" if reached else f"❌ Could not reach {name}")
+    return reached
+
+def return_home(cancel=None):
+    return go_to_point("home", cancel=cancel)
+
+if __name__ == "__main__":
+    return_home()